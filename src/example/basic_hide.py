@@ -15,14 +15,13 @@ import cv2
 
 from background import Background
 from frame.camera import add_camera_parameters, parse_camera_settings
-from frame.producer import FrameData, VideoCaptureProducer
+from frame.producer import FrameData, VideoCaptureProducer, release_frame
 from frame.shared import create_frame_pool
 from ocsort.timer import Timer
 from pipeline.data import DataCollection
 from segmentation.mobile_sam import MobileSam
 from segmentation.sam import Sam
 from tracking.producer import TrackingData, TrackProducer
-from util.image import scale_image
 from util.mask import add_masks, apply_mask, dilate, scale_mask
 from util.visualize import show_box
 
@@ -47,7 +46,8 @@ def main(args: Dict) -> None:
     background = Background()
 
     frame_queue: Queue[DataCollection] = Queue()
-    frame_pool = create_frame_pool(100, camera_settings)
+    frame_pool = create_frame_pool(
+        100, camera_settings, scales=[1.0 / down_scale])
 
     tracking_queue: Queue[DataCollection] = Queue()
     tracker = TrackProducer(frame_queue, tracking_queue,
@@ -72,7 +72,8 @@ def main(args: Dict) -> None:
                 if background.avg is None:
                     background.add_black(image.shape)
 
-                scaled_image = scale_image(image, 1.0 / down_scale)
+                scaled_image = data.get(FrameData).get_frame(
+                    frame_pool, 1.0 / down_scale)
                 segment.set_image(scaled_image)
                 segment.prepare_prompts(scaled_image)
 
@@ -98,8 +99,7 @@ def main(args: Dict) -> None:
                     image = show_box(image, input_box)
 
                 cv2.imshow('application', image)
-                if frame_pool:
-                    frame_pool.free_frame(data.get(FrameData).frame)
+                release_frame(data, frame_pool)
 
                 if chr(cv2.waitKey(1) & 255) == 'q':
                     break
@@ -16,7 +16,7 @@ from multiprocessing import Queue, freeze_support
 import cv2
 
 from frame.camera import add_camera_parameters, parse_camera_settings
-from frame.producer import FrameData, VideoCaptureProducer
+from frame.producer import FrameData, VideoCaptureProducer, release_frame
 from frame.shared import create_frame_pool
 from ocsort.timer import Timer
 from pipeline.data import DataCollection
@@ -106,8 +106,7 @@ def main(args: Dict) -> None:
                     pose_image = show_box(pose_image, input_box)
 
                 cv2.imshow('application', pose_image)
-                if frame_pool:
-                    frame_pool.free_frame(data.get(FrameData).frame)
+                release_frame(data, frame_pool)
 
                 if chr(cv2.waitKey(1) & 255) == 'q':
                     break
@@ -0,0 +1,61 @@
+import argparse
+from dataclasses import replace
+from typing import Dict
+
+import torch
+
+from segmentation.export import (export_decoder, export_encoder,
+                                 quantize_encoder)
+from segmentation.onnx_sam import (ONNX_MODELS, OnnxSamSettings, decoder_path,
+                                   encoder_path)
+
+# model type and default checkpoint of the PyTorch backends
+CHECKPOINTS = {
+    'mobile_sam': ('vit_t', 'models/mobile_sam.pt'),
+    'sam': ('vit_b', 'models/sam_vit_b_01ec64.pth'),
+}
+
+
+def parse_args() -> Dict:
+    parser = argparse.ArgumentParser(
+        'Export the image encoder and mask decoder of SAM to ONNX.')
+    parser.add_argument('--model', type=str, default='mobile_sam',
+                        choices=ONNX_MODELS, help='SAM variant.')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='PyTorch checkpoint, defaults to the one of the PyTorch backend.')
+    parser.add_argument('--model-dir', type=str, default='models',
+                        help='Directory the ONNX models are saved to.')
+    parser.add_argument('--int8', default=False, action='store_true',
+                        help='Also save an INT8 quantized image encoder.')
+    parser.add_argument('--opset', type=int, default=17,
+                        help='ONNX opset version.')
+
+    return vars(parser.parse_args())
+
+
+def load_model(model: str, checkpoint: str) -> torch.nn.Module:
+    model_type, _ = CHECKPOINTS[model]
+    if model == 'mobile_sam':
+        from mobile_sam import sam_model_registry
+    else:
+        from segment_anything import sam_model_registry
+    return sam_model_registry[model_type](checkpoint=checkpoint).eval()
+
+
+def main(args: Dict) -> None:
+    settings = OnnxSamSettings(args['model'], model_dir=args['model_dir'])
+    sam = load_model(
+        settings.model,
+        args['checkpoint'] or CHECKPOINTS[settings.model][1])
+    export_encoder(sam, encoder_path(settings), args['opset'])
+    print(f'Saved {encoder_path(settings)}')
+    export_decoder(sam, decoder_path(settings), args['opset'])
+    print(f'Saved {decoder_path(settings)}')
+    if args['int8']:
+        quantized = replace(settings, quantized=True)
+        quantize_encoder(encoder_path(settings), encoder_path(quantized))
+        print(f'Saved {encoder_path(quantized)}')
+
+
+if __name__ == '__main__':
+    main(parse_args())
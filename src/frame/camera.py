@@ -4,7 +4,7 @@ import threading
 from argparse import ArgumentParser
 from dataclasses import dataclass
 from queue import Queue as BasicQueue
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 
 import cv2
 import numpy as np
@@ -12,17 +12,19 @@ import numpy as np
 
 @dataclass
 class CameraSettings:
-    input: int = 0
+    input: Union[int, str] = 0
     width: int = 1920
     height: int = 1080
     fps: int = 30
     codec: str = 'MJPG'
     api: Optional[int] = cv2.CAP_DSHOW if os.name == 'nt' else None
+    zero_copy: bool = False
+    realtime: bool = True
 
 
 def add_camera_parameters(parser: ArgumentParser) -> ArgumentParser:
-    parser.add_argument('--cam-input', type=int,
-                        default=0, help='Camera input to use')
+    parser.add_argument('--cam-input', type=parse_input, default=0,
+                        help='Camera input to use, or a video file or image directory')
     parser.add_argument('--cam-width', type=int,
                         default=1920, help='Camera image width')
     parser.add_argument('--cam-height', type=int,
@@ -31,10 +33,20 @@ def add_camera_parameters(parser: ArgumentParser) -> ArgumentParser:
                         default=30, help='Camera fps')
     parser.add_argument('--cam-codec', type=str, default='MJPG',
                         help='Camera codec (e.g. MJPG, H264, YUV2)')
+    parser.add_argument('--cam-zero-copy', dest='cam_zero_copy',
+                        default=False, action='store_true',
+                        help='Decode camera frames directly into the shared frame pool.')
+    parser.add_argument('--cam-fast', dest='cam_fast',
+                        default=False, action='store_true',
+                        help='Read file input as fast as possible without dropping frames.')
 
     return parser
 
 
+def parse_input(input: str) -> Union[int, str]:
+    return int(input) if input.isdigit() else input
+
+
 def get_codec(cv2_codec_info: float) -> str:
     codec = int(cv2_codec_info)
     codec_str = str(chr(codec & 0xff) + chr((codec >> 8) & 0xff) +
@@ -48,7 +60,9 @@ def parse_camera_settings(args: Dict[str, Any]) -> CameraSettings:
         args['cam_width'],
         args['cam_height'],
         args['cam_fps'],
-        args['cam_codec'])
+        args['cam_codec'],
+        zero_copy=args.get('cam_zero_copy', False),
+        realtime=not args.get('cam_fast', False))
 
 
 def check_camera(capture: cv2.VideoCapture, settings: CameraSettings) -> None:
@@ -1,67 +1,239 @@
 from __future__ import annotations
 
 import queue
+import time
 from multiprocessing import Process, Queue, Value
 from multiprocessing.sharedctypes import Synchronized
-from typing import Optional, Union
+from typing import Any, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
-from frame.camera import CameraSettings, check_camera, set_camera_parameters
+from frame.camera import CameraSettings
 from frame.shared import FramePool
-from pipeline.data import BaseData, DataCollection
+from frame.source import FileCapture, is_file_input, open_capture
+from pipeline.data import BaseData, CloseData, DataCollection
 from pipeline.producer import interruptible
+from util.image import scale_image
 
 
 class FrameData(BaseData):
     def __init__(
         self,
         frame: Union[np.ndarray, int],
-        frame_pool: Optional[FramePool] = None
+        frame_pool: Optional[FramePool] = None,
+        sequence: int = 0
     ) -> None:
         super().__init__()
+        # order in which the pose stage hands the frames to the parallel
+        # segmentation workers, frames discarded after that are listed in
+        # skipped of the next frame so the reordering does not wait for them
+        self.sequence = sequence
+        self.skipped: List[int] = []
         if frame_pool:
             self.using_shared_pool = True
             self.frame = frame_pool.put(frame)
+            self.generation = frame_pool.generation(self.frame)
         else:
             self.using_shared_pool = False
             self.frame = frame
+            self.generation = 0
 
-    def get_frame(self, frame_pool: Optional[FramePool] = None) -> np.ndarray:
+    def get_frame(
+        self,
+        frame_pool: Optional[FramePool] = None,
+        scale: Optional[float] = None
+    ) -> np.ndarray:
         if frame_pool and type(self.frame) is not np.ndarray:
-            return frame_pool.get(self.frame)
+            if frame_pool.has_scale(scale):
+                return frame_pool.get(self.frame, scale)
+            frame = frame_pool.get(self.frame)
         else:
-            return self.frame
+            frame = self.frame
+        if scale is None or scale == 1.0:
+            return frame
+        return scale_image(frame, scale)
+
+    def acquire(self, frame_pool: Optional[FramePool] = None) -> bool:
+        if not frame_pool or not self.using_shared_pool:
+            return False
+        return frame_pool.acquire(self.frame, self.generation)
+
+    def release(self, frame_pool: Optional[FramePool] = None) -> bool:
+        if not frame_pool or not self.using_shared_pool:
+            return False
+        return frame_pool.release(self.frame, self.generation)
+
+
+def get_slot(data: DataCollection) -> Optional[int]:
+    if data.has(FrameData) and data.get(FrameData).using_shared_pool:
+        return int(data.get(FrameData).frame)
+    return None
+
+
+def discarded_sequences(data: DataCollection) -> List[int]:
+    if not data.has(FrameData):
+        return []
+    return [*data.get(FrameData).skipped, data.get(FrameData).sequence]
+
+
+def release_frame(
+    data: DataCollection,
+    frame_pool: Optional[FramePool] = None
+) -> None:
+    if frame_pool and data.has(FrameData):
+        data.get(FrameData).release(frame_pool)
+
+
+class CaptureStats:
+    def __init__(self) -> None:
+        self.frames = 0
+        self.allocations = 0
+        self.copies = 0
+        self.without_slot = 0  # dropped in live mode, all slots were in use
+
+    def add(self, allocations: int, copies: int) -> None:
+        self.frames += 1
+        self.allocations += allocations
+        self.copies += copies
+
+    def get_per_frame(self) -> Tuple[float, float]:
+        if self.frames == 0:
+            return 0.0, 0.0
+        return self.allocations / self.frames, self.copies / self.frames
+
+
+def reserve_slot(frame_pool: FramePool, block: bool) -> Optional[int]:
+    try:
+        return frame_pool.reserve(block)
+    except queue.Empty:
+        return None
+
+
+def read_frame(
+    cap: Any,
+    stats: CaptureStats,
+    frame_pool: Optional[FramePool] = None,
+    block: bool = True
+) -> Tuple[bool, Optional[Union[np.ndarray, int]]]:
+    """
+    Reads a frame and copies it into a slot of the frame pool. Without
+    blocking the frame is None if no slot is free.
+    """
+    ret, frame = cap.read()
+    if not ret:
+        return False, frame
+    frame.flags.writeable = False
+    if frame_pool is None:
+        stats.add(1, 0)
+        return True, frame
+    index = reserve_slot(frame_pool, block)
+    if index is None:
+        stats.without_slot += 1
+        return True, None
+    frame_pool.get(index)[:] = frame
+    stats.add(1, 1)
+    return True, index
+
+
+def read_frame_into_pool(
+    cap: Any,
+    stats: CaptureStats,
+    frame_pool: FramePool,
+    block: bool = True
+) -> Tuple[bool, Optional[Union[np.ndarray, int]]]:
+    """
+    Decodes a frame directly into a slot of the frame pool. Without
+    blocking the frame is read but None if no slot is free.
+    """
+    index = reserve_slot(frame_pool, block)
+    if index is None:
+        ret, _ = cap.read()
+        if ret:
+            stats.without_slot += 1
+        return ret, None
+    slot = frame_pool.get(index)
+    try:
+        ret, frame = cap.read(image=slot)
+    except BaseException:
+        frame_pool.free_frame(index)
+        raise
+    if not ret:
+        frame_pool.free_frame(index)
+        return False, index
+    if frame.ctypes.data == slot.ctypes.data:
+        stats.add(0, 0)
+    else:
+        # driver could not decode into the slot (e.g. size mismatch)
+        slot[:] = frame[:]
+        stats.add(1, 1)
+    return True, index
+
+
+def put_until_stopped(
+    output_queue: Queue[DataCollection],
+    data: DataCollection,
+    stop_condition: Synchronized
+) -> bool:
+    # bounded queues block until the next stage caught up
+    while not stop_condition.value:
+        try:
+            output_queue.put(data, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
 
 
 def produce_capture(
         output_queue: Queue[DataCollection],
         settings: Optional[CameraSettings],
         stop_condition: Synchronized,
-        frame_pool: Optional[FramePool] = None
+        frame_pool: Optional[FramePool] = None,
+        lossless: bool = False
 ) -> None:
-    if settings:
-        cap = cv2.VideoCapture(settings.input, settings.api)
-        set_camera_parameters(cap, settings)
-        check_camera(cap, settings)
-    else:
-        cap = cv2.VideoCapture(0, CameraSettings().api)
+    cap = open_capture(settings)
     print('Camera-FPS: ', int(cap.get(cv2.CAP_PROP_FPS)))
+    zero_copy = frame_pool is not None and settings is not None \
+        and settings.zero_copy
+    # file input in fast mode must not lose any frame
+    lossless = lossless or settings is not None \
+        and is_file_input(settings.input) and not settings.realtime
+    stats = CaptureStats()
+    start_time = time.perf_counter()
 
     while True:
-        ret, frame = cap.read()
+        # live mode drops frames instead of waiting for a free slot
+        if zero_copy:
+            assert frame_pool is not None
+            ret, frame = read_frame_into_pool(
+                cap, stats, frame_pool, lossless)
+        else:
+            ret, frame = read_frame(cap, stats, frame_pool, lossless)
         if not ret or stop_condition.value:
+            if ret and frame_pool is not None and isinstance(frame, int):
+                frame_pool.free_frame(frame)
+            if not ret and isinstance(cap, FileCapture):
+                print('Input finished, capture-FPS:', stats.frames /
+                      (time.perf_counter() - start_time),
+                      'dropped frames:', cap.dropped_frames)
+                put_until_stopped(output_queue, DataCollection().add(
+                    CloseData()), stop_condition)
             break
-        frame.flags.writeable = False
-        if not output_queue.empty():
+        if frame is None:
+            continue
+        if stats.frames % 100 == 0:
+            print('Capture allocations/copies per frame:',
+                  *stats.get_per_frame(),
+                  'frames without free slot:', stats.without_slot)
+        if not lossless and not output_queue.empty():
             try:
-                discarded_frame = output_queue.get_nowait()
-                if frame_pool and discarded_frame.has(FrameData):
-                    frame_pool.free_frame(discarded_frame.get(FrameData).frame)
+                release_frame(output_queue.get_nowait(), frame_pool)
             except queue.Empty:
                 pass
-        output_queue.put(DataCollection().add(FrameData(frame, frame_pool)))
+        data = DataCollection().add(FrameData(frame, frame_pool))
+        if not put_until_stopped(output_queue, data, stop_condition):
+            release_frame(data, frame_pool)
 
 
 class VideoCaptureProducer:
@@ -69,13 +241,15 @@ class VideoCaptureProducer:
         self,
         frame_queue: Queue[DataCollection],
         settings: Optional[CameraSettings] = None,
-        frame_pool: Optional[FramePool] = None
+        frame_pool: Optional[FramePool] = None,
+        lossless: bool = False
     ) -> None:
         self.settings = settings
         self.frame_queue = frame_queue
         self.process: Optional[Process] = None
         self.stop_condition: Synchronized[int] = Value('i', 0)  # type: ignore
         self.frame_pool = frame_pool
+        self.lossless = lossless
 
     def start(self) -> None:
         self.process = Process(target=interruptible, args=(
@@ -83,7 +257,8 @@ class VideoCaptureProducer:
             self.frame_queue,
             self.settings,
             self.stop_condition,
-            self.frame_pool
+            self.frame_pool,
+            self.lossless
         ))
         self.process.start()
 
@@ -1,26 +1,135 @@
-from multiprocessing import Manager
+import queue
+import time
+from dataclasses import replace
+from multiprocessing import Lock, Manager, Semaphore
 from multiprocessing.managers import SharedMemoryManager
 from multiprocessing.shared_memory import SharedMemory
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import cv2
 import numpy as np
 
-from frame.camera import CameraSettings, set_camera_parameters
+from frame.camera import CameraSettings
+from frame.source import open_capture
+from pipeline.metadata import MaskStore, MetadataStore
+
+
+class SharedFreeList:
+    """
+    Queue of free slot indices stored as a ring buffer in shared memory.
+
+    Head and tail counters live next to the ring and are guarded by a lock,
+    the number of available indices is tracked by a semaphore. Compared to a
+    `Manager().Queue` no round trip to a manager process is required.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        memory_manager: SharedMemoryManager
+    ) -> None:
+        self.maxsize = maxsize
+        self.lock = Lock()
+        self.available = Semaphore(0)
+        self.shared_memory = memory_manager.SharedMemory(
+            (maxsize + 2) * np.dtype(np.int64).itemsize)
+        self._create_views()
+        self.counters[:] = 0
+
+    def _create_views(self) -> None:
+        buffer = np.frombuffer(
+            self.shared_memory.buf,
+            dtype=np.int64,
+            count=self.maxsize + 2
+        )
+        self.counters = buffer[:2]
+        self.ring = buffer[2:]
+
+    def __getstate__(self) -> Dict:
+        d = dict(self.__dict__)
+        del d['counters']
+        del d['ring']
+        return d
+
+    def __setstate__(self, d: Dict) -> None:
+        self.__dict__.update(d)
+        self._create_views()
+
+    def put(self, index: int) -> None:
+        with self.lock:
+            head, tail = self.counters
+            if tail - head >= self.maxsize:
+                raise queue.Full
+            self.ring[tail % self.maxsize] = index
+            self.counters[1] = tail + 1
+        self.available.release()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> int:
+        if not self.available.acquire(block, timeout):
+            raise queue.Empty
+        with self.lock:
+            head = self.counters[0]
+            index = int(self.ring[head % self.maxsize])
+            self.counters[0] = head + 1
+        return index
+
+    def qsize(self) -> int:
+        return int(self.counters[1] - self.counters[0])
+
+    def empty(self) -> bool:
+        return self.qsize() <= 0
+
+    def close(self) -> None:
+        del self.counters
+        del self.ring
+        self.shared_memory.close()
 
 
 class FramePool:
-    def __init__(self, template: np.ndarray, maxsize: int) -> None:
+    def __init__(
+        self,
+        template: np.ndarray,
+        maxsize: int,
+        shared_free_list: bool = True,
+        max_frame_age: Optional[float] = None,
+        scales: Sequence[float] = (),
+        shared_metadata: bool = True
+    ) -> None:
         self.dtype = template.dtype
         self.shape = template.shape
         self.byte_count = template.nbytes
-        self.queue_manager = Manager()
+        self.maxsize = maxsize
+        # leak diagnostic: slots held longer are reported when no slot is
+        # free, they are never freed since a slow stage may still read them
+        self.max_frame_age = max_frame_age
+        self.last_leak_report = 0.0
+        # pre-scaled variants of every slot, same rounding as scale_image
+        self.scales = tuple(scale for scale in scales if scale != 1.0)
+        self.scaled_shapes = [
+            (int(self.shape[0] * scale), int(self.shape[1] * scale),
+             *self.shape[2:])
+            for scale in self.scales
+        ]
         self.memory_manager = SharedMemoryManager()
         self.memory_manager.start()
 
+        # per slot: reference count, generation and reservation time
+        self.slot_lock = Lock()
+        self.slot_memory = self.memory_manager.SharedMemory(
+            3 * maxsize * np.dtype(np.int64).itemsize)
+        self._create_slot_views()
+        self.references[:] = 0
+        self.generations[:] = 0
+        self.reserve_times[:] = 0.0
+
         self.frame_pool: List[np.ndarray] = []
         self.shared_memory: List[SharedMemory] = []
-        self.free_frames = self.queue_manager.Queue(maxsize)
+        self.free_frames: Any
+        if shared_free_list:
+            self.free_frames = SharedFreeList(maxsize, self.memory_manager)
+        else:
+            self.queue_manager = Manager()
+            self.free_frames = self.queue_manager.Queue(maxsize)
         for index in range(maxsize):
             self.shared_memory.append(self.memory_manager.SharedMemory(
                 self.byte_count))
@@ -29,6 +138,19 @@ class FramePool:
                 dtype=self.dtype
             ).reshape(self.shape))
             self.free_frames.put(index)
+        self.scaled_memory: List[List[SharedMemory]] = [
+            [self.memory_manager.SharedMemory(
+                int(np.prod(shape)) * self.dtype.itemsize)
+             for _ in range(maxsize)]
+            for shape in self.scaled_shapes
+        ]
+        self._create_scaled_views()
+        self.metadata: Optional[MetadataStore] = None
+        self.mask_store: Optional[MaskStore] = None
+        if shared_metadata:
+            self.metadata = MetadataStore(maxsize, self.memory_manager)
+            self.mask_store = MaskStore(
+                maxsize, self.shape[:2], self.memory_manager)
 
     def __getstate__(self) -> Dict:
         d = dict(self.__dict__)
@@ -38,6 +160,10 @@ class FramePool:
             del d['memory_manager']
         if 'frame_pool' in d:
             del d['frame_pool']
+        if 'scaled_pool' in d:
+            del d['scaled_pool']
+        for view in ['references', 'generations', 'reserve_times']:
+            del d[view]
         return d
 
     def __setstate__(self, d: Dict) -> None:
@@ -53,36 +179,163 @@ class FramePool:
         # for array in d['frame_pool']:
         #   array.flags.writeable = False
         self.__dict__.update(d)
+        self._create_slot_views()
+        self._create_scaled_views()
+
+    def _create_slot_views(self) -> None:
+        counters = np.frombuffer(
+            self.slot_memory.buf, dtype=np.int64, count=2 * self.maxsize)
+        self.references = counters[:self.maxsize]
+        self.generations = counters[self.maxsize:]
+        self.reserve_times = np.frombuffer(
+            self.slot_memory.buf,
+            dtype=np.float64,
+            count=self.maxsize,
+            offset=counters.nbytes
+        )
+
+    def _create_scaled_views(self) -> None:
+        self.scaled_pool: List[List[np.ndarray]] = [
+            [np.frombuffer(
+                sm.buf,
+                dtype=self.dtype,
+                count=int(np.prod(shape))
+            ).reshape(shape) for sm in shared_memories]
+            for shape, shared_memories in zip(
+                self.scaled_shapes, self.scaled_memory)
+        ]
+
+    def generation(self, index: int) -> int:
+        return int(self.generations[index])
+
+    def acquire(self, index: int, generation: Optional[int] = None) -> bool:
+        with self.slot_lock:
+            if self.references[index] <= 0 or (
+                    generation is not None
+                    and self.generations[index] != generation):
+                return False
+            self.references[index] += 1
+        return True
+
+    def release(self, index: int, generation: Optional[int] = None) -> bool:
+        with self.slot_lock:
+            if self.references[index] <= 0 or (
+                    generation is not None
+                    and self.generations[index] != generation):
+                return False
+            self.references[index] -= 1
+            freed = self.references[index] == 0
+        if freed:
+            self.free_frames.put(index)
+        return True
 
     def free_frame(self, index: int) -> None:
-        self.free_frames.put(index)
+        self.release(index)
+
+    def leak_report(
+        self,
+        max_age: float = 0.0
+    ) -> List[Tuple[int, int, float]]:
+        current_time = time.time()
+        with self.slot_lock:
+            return [
+                (index, int(self.references[index]),
+                 current_time - self.reserve_times[index])
+                for index in range(self.maxsize)
+                if self.references[index] > 0
+                and current_time - self.reserve_times[index] >= max_age
+            ]
+
+    def report_leaks(self) -> None:
+        if not self.max_frame_age \
+                or time.time() - self.last_leak_report < self.max_frame_age:
+            return
+        self.last_leak_report = time.time()
+        leaks = self.leak_report(self.max_frame_age)
+        if leaks:
+            print('Frames held longer than', self.max_frame_age,
+                  's (index, references, age):', leaks)
+
+    def reserve(
+        self,
+        block: bool = True,
+        timeout: Optional[float] = None
+    ) -> int:
+        if block and timeout is None and self.max_frame_age:
+            while True:
+                try:
+                    index: int = self.free_frames.get(
+                        True, self.max_frame_age)
+                    break
+                except queue.Empty:
+                    self.report_leaks()
+        else:
+            try:
+                index = self.free_frames.get(block, timeout)
+            except queue.Empty:
+                self.report_leaks()
+                raise
+        with self.slot_lock:
+            self.references[index] = 1
+            self.generations[index] += 1
+            self.reserve_times[index] = time.time()
+        return index
 
     def put(self, frame: Union[np.ndarray, int]) -> int:
         if type(frame) is not np.ndarray:
-            return frame
-        index: int = self.free_frames.get()
-        self.frame_pool[index][:] = frame[:]
+            index = int(frame)
+        else:
+            index = self.reserve()
+            self.frame_pool[index][:] = frame[:]
+        self.update_scales(index)
         return index
 
-    def get(self, index: int) -> np.ndarray:
-        return self.frame_pool[index]
+    def update_scales(self, index: int) -> None:
+        for shape, scaled_frames in zip(self.scaled_shapes, self.scaled_pool):
+            cv2.resize(
+                self.frame_pool[index],
+                (shape[1], shape[0]),
+                dst=scaled_frames[index],
+                interpolation=cv2.INTER_AREA
+            )
+
+    def has_scale(self, scale: Optional[float]) -> bool:
+        return scale is None or scale == 1.0 or scale in self.scales
+
+    def get(self, index: int, scale: Optional[float] = None) -> np.ndarray:
+        if scale is None or scale == 1.0:
+            return self.frame_pool[index]
+        return self.scaled_pool[self.scales.index(scale)][index]
 
     def close(self) -> None:
+        if isinstance(self.free_frames, SharedFreeList):
+            self.free_frames.close()
+        if self.metadata:
+            self.metadata.close()
+        if self.mask_store:
+            self.mask_store.close()
+        del self.references
+        del self.generations
+        del self.reserve_times
+        del self.scaled_pool
+        self.slot_memory.close()
         self.memory_manager.shutdown()
 
 
 def create_frame_pool(
     maxsize: int,
-    settings: Optional[CameraSettings] = None
+    settings: Optional[CameraSettings] = None,
+    shared_free_list: bool = True,
+    scales: Sequence[float] = ()
 ) -> FramePool:
     if not settings:
         settings = CameraSettings()
-    cap = cv2.VideoCapture(settings.input, settings.api)
-    set_camera_parameters(cap, settings)
+    cap = open_capture(replace(settings, realtime=False), check=False)
 
     while True:
         ret, frame = cap.read()
         if ret:
-            frame_pool = FramePool(frame, maxsize)
+            frame_pool = FramePool(
+                frame, maxsize, shared_free_list, scales=scales)
             cap.release()
             return frame_pool
@@ -0,0 +1,133 @@
+import os
+import time
+from typing import Any, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from frame.camera import CameraSettings, check_camera, set_camera_parameters
+
+IMAGE_EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff')
+
+
+def is_file_input(input: Union[int, str]) -> bool:
+    return isinstance(input, str)
+
+
+def list_image_files(directory: str) -> List[str]:
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+class FileCapture:
+    """
+    Capture reading a video file or a directory of images.
+
+    In realtime mode frames are paced by the input fps and frames the
+    consumer is too slow for are skipped, as a camera would do. Otherwise
+    every frame is returned as fast as it can be read.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fps: int = 30,
+        realtime: bool = True
+    ) -> None:
+        self.path = path
+        self.realtime = realtime
+        self.image_files: Optional[List[str]] = None
+        self.cap: Optional[cv2.VideoCapture] = None
+        if os.path.isdir(path):
+            self.image_files = list_image_files(path)
+            self.fps = float(fps)
+        else:
+            self.cap = cv2.VideoCapture(path)
+            file_fps = self.cap.get(cv2.CAP_PROP_FPS)
+            self.fps = file_fps if file_fps > 0 else float(fps)
+        self.position = 0
+        self.dropped_frames = 0
+        self.start_time: Optional[float] = None
+
+    def isOpened(self) -> bool:
+        if self.image_files is not None:
+            return len(self.image_files) > 0
+        assert self.cap is not None
+        return self.cap.isOpened()
+
+    def get(self, property_id: int) -> float:
+        if property_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        if self.image_files is not None:
+            if property_id == cv2.CAP_PROP_FRAME_COUNT:
+                return float(len(self.image_files))
+            return 0.0
+        assert self.cap is not None
+        return self.cap.get(property_id)
+
+    def set(self, property_id: int, value: Any) -> bool:
+        return False
+
+    def _skip(self) -> bool:
+        self.position += 1
+        if self.image_files is not None:
+            return self.position <= len(self.image_files)
+        assert self.cap is not None
+        return self.cap.grab()
+
+    def _wait_for_frame(self) -> None:
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        due_frame = int((time.perf_counter() - self.start_time) * self.fps)
+        while self.position < due_frame:
+            if not self._skip():
+                return
+            self.dropped_frames += 1
+        delay = self.start_time + self.position / self.fps \
+            - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def read(
+        self,
+        image: Optional[np.ndarray] = None
+    ) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.realtime:
+            self._wait_for_frame()
+        if self.image_files is None:
+            assert self.cap is not None
+            self.position += 1
+            return self.cap.read(image=image)
+        if self.position >= len(self.image_files):
+            return False, None
+        frame = cv2.imread(self.image_files[self.position])
+        self.position += 1
+        if frame is None:
+            return False, None
+        if image is not None and image.shape == frame.shape:
+            image[:] = frame
+            return True, image
+        return True, frame
+
+    def release(self) -> None:
+        if self.cap is not None:
+            self.cap.release()
+
+
+def open_capture(
+    settings: Optional[CameraSettings] = None,
+    check: bool = True
+) -> Union[cv2.VideoCapture, FileCapture]:
+    if not settings:
+        return cv2.VideoCapture(0, CameraSettings().api)
+    if is_file_input(settings.input):
+        return FileCapture(
+            str(settings.input), settings.fps, settings.realtime)
+    cap = cv2.VideoCapture(settings.input, settings.api)
+    set_camera_parameters(cap, settings)
+    if check:
+        check_camera(cap, settings)
+    return cap
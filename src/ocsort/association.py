@@ -218,11 +218,49 @@ def linear_assignment(cost_matrix):
     try:
         import lap
         _, x, y = lap.lapjv(cost_matrix, extend_cost=True)
-        return np.array([[y[i], i] for i in x if i >= 0])
+        assigned = x[x >= 0]
+        return np.stack((y[assigned], assigned), axis=1)
     except ImportError:
         from scipy.optimize import linear_sum_assignment
         x, y = linear_sum_assignment(cost_matrix)
-        return np.array(list(zip(x, y)))
+        return np.stack((x, y), axis=1)
+
+
+def split_matches(matched_indices, iou_matrix, iou_threshold):
+    """
+    Splits assigned pairs into matches and the unmatched detections and
+    trackers with boolean masks. Unmatched indices keep the order of the
+    original loops, never assigned ones first followed by the ones of pairs
+    rejected for their low IoU.
+    """
+    rejected = iou_matrix[matched_indices[:, 0],
+                          matched_indices[:, 1]] < iou_threshold
+    detection_assigned = np.zeros(iou_matrix.shape[0], dtype=bool)
+    detection_assigned[matched_indices[:, 0]] = True
+    tracker_assigned = np.zeros(iou_matrix.shape[1], dtype=bool)
+    tracker_assigned[matched_indices[:, 1]] = True
+    unmatched_detections = np.concatenate((
+        np.flatnonzero(~detection_assigned), matched_indices[rejected, 0]))
+    unmatched_trackers = np.concatenate((
+        np.flatnonzero(~tracker_assigned), matched_indices[rejected, 1]))
+    return matched_indices[~rejected], unmatched_detections, unmatched_trackers
+
+
+def velocity_direction_cost(detections, velocities, previous_obs, vdc_weight):
+    """
+    Cost of the velocity direction consistency (detections x trackers),
+    broadcast instead of repeating rows and columns.
+    """
+    Y, X = speed_direction_batch(detections, previous_obs)
+    diff_angle_cos = velocities[:, 1:2] * X + velocities[:, 0:1] * Y
+    np.clip(diff_angle_cos, -1, 1, out=diff_angle_cos)
+    diff_angle = np.arccos(diff_angle_cos)
+    diff_angle = (np.pi / 2.0 - np.abs(diff_angle)) / np.pi
+
+    # trackers without previous observation have no direction
+    valid_mask = previous_obs[:, 4:5] >= 0
+    angle_diff_cost = (valid_mask * diff_angle) * vdc_weight
+    return angle_diff_cost.T * detections[:, -1:]
 
 
 def associate_detections_to_trackers(detections, trackers, iou_threshold=0.3):
@@ -242,58 +280,19 @@ def associate_detections_to_trackers(detections, trackers, iou_threshold=0.3):
         else:
             matched_indices = linear_assignment(-iou_matrix)
     else:
-        matched_indices = np.empty(shape=(0, 2))
-
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if (d not in matched_indices[:, 0]):
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if (t not in matched_indices[:, 1]):
-            unmatched_trackers.append(t)
-
-    # filter out matched with low IOU
-    matches = []
-    for m in matched_indices:
-        if (iou_matrix[m[0], m[1]] < iou_threshold):
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1, 2))
-    if (len(matches) == 0):
-        matches = np.empty((0, 2), dtype=int)
-    else:
-        matches = np.concatenate(matches, axis=0)
+        matched_indices = np.empty(shape=(0, 2), dtype=int)
 
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+    return split_matches(matched_indices, iou_matrix, iou_threshold)
 
 
 def associate(detections, trackers, iou_threshold, velocities, previous_obs, vdc_weight):
     if (len(trackers) == 0):
         return np.empty((0, 2), dtype=int), np.arange(len(detections)), np.empty((0, 5), dtype=int)
 
-    Y, X = speed_direction_batch(detections, previous_obs)
-    inertia_Y, inertia_X = velocities[:, 0], velocities[:, 1]
-    inertia_Y = np.repeat(inertia_Y[:, np.newaxis], Y.shape[1], axis=1)
-    inertia_X = np.repeat(inertia_X[:, np.newaxis], X.shape[1], axis=1)
-    diff_angle_cos = inertia_X * X + inertia_Y * Y
-    diff_angle_cos = np.clip(diff_angle_cos, a_min=-1, a_max=1)
-    diff_angle = np.arccos(diff_angle_cos)
-    diff_angle = (np.pi / 2.0 - np.abs(diff_angle)) / np.pi
-
-    valid_mask = np.ones(previous_obs.shape[0])
-    valid_mask[np.where(previous_obs[:, 4] < 0)] = 0
-
+    angle_diff_cost = velocity_direction_cost(
+        detections, velocities, previous_obs, vdc_weight)
     iou_matrix = iou_batch(detections, trackers)
-    scores = np.repeat(
-        detections[:, -1][:, np.newaxis], trackers.shape[0], axis=1)
     # iou_matrix = iou_matrix * scores # a trick sometiems works, we don't encourage this
-    valid_mask = np.repeat(valid_mask[:, np.newaxis], X.shape[1], axis=1)
-
-    angle_diff_cost = (valid_mask * diff_angle) * vdc_weight
-    angle_diff_cost = angle_diff_cost.T
-    angle_diff_cost = angle_diff_cost * scores
 
     if min(iou_matrix.shape) > 0:
         a = (iou_matrix > iou_threshold).astype(np.int32)
@@ -302,31 +301,9 @@ def associate(detections, trackers, iou_threshold, velocities, previous_obs, vdc
         else:
             matched_indices = linear_assignment(-(iou_matrix+angle_diff_cost))
     else:
-        matched_indices = np.empty(shape=(0, 2))
-
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if (d not in matched_indices[:, 0]):
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if (t not in matched_indices[:, 1]):
-            unmatched_trackers.append(t)
-
-    # filter out matched with low IOU
-    matches = []
-    for m in matched_indices:
-        if (iou_matrix[m[0], m[1]] < iou_threshold):
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1, 2))
-    if (len(matches) == 0):
-        matches = np.empty((0, 2), dtype=int)
-    else:
-        matches = np.concatenate(matches, axis=0)
+        matched_indices = np.empty(shape=(0, 2), dtype=int)
 
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+    return split_matches(matched_indices, iou_matrix, iou_threshold)
 
 
 def associate_kitti(detections, trackers, det_cates, iou_threshold,
@@ -337,24 +314,8 @@ def associate_kitti(detections, trackers, det_cates, iou_threshold,
     """
         Cost from the velocity direction consistency
     """
-    Y, X = speed_direction_batch(detections, previous_obs)
-    inertia_Y, inertia_X = velocities[:, 0], velocities[:, 1]
-    inertia_Y = np.repeat(inertia_Y[:, np.newaxis], Y.shape[1], axis=1)
-    inertia_X = np.repeat(inertia_X[:, np.newaxis], X.shape[1], axis=1)
-    diff_angle_cos = inertia_X * X + inertia_Y * Y
-    diff_angle_cos = np.clip(diff_angle_cos, a_min=-1, a_max=1)
-    diff_angle = np.arccos(diff_angle_cos)
-    diff_angle = (np.pi / 2.0 - np.abs(diff_angle)) / np.pi
-
-    valid_mask = np.ones(previous_obs.shape[0])
-    valid_mask[np.where(previous_obs[:, 4] < 0)] = 0
-    valid_mask = np.repeat(valid_mask[:, np.newaxis], X.shape[1], axis=1)
-
-    scores = np.repeat(
-        detections[:, -1][:, np.newaxis], trackers.shape[0], axis=1)
-    angle_diff_cost = (valid_mask * diff_angle) * vdc_weight
-    angle_diff_cost = angle_diff_cost.T
-    angle_diff_cost = angle_diff_cost * scores
+    angle_diff_cost = velocity_direction_cost(
+        detections, velocities, previous_obs, vdc_weight)
 
     """
         Cost from IoU
@@ -364,13 +325,8 @@ def associate_kitti(detections, trackers, det_cates, iou_threshold,
     """
         With multiple categories, generate the cost for catgory mismatch
     """
-    num_dets = detections.shape[0]
-    num_trk = trackers.shape[0]
-    cate_matrix = np.zeros((num_dets, num_trk))
-    for i in range(num_dets):
-        for j in range(num_trk):
-            if det_cates[i] != trackers[j, 4]:
-                cate_matrix[i][j] = -1e6
+    cate_matrix = np.where(
+        det_cates[:, np.newaxis] != trackers[np.newaxis, :, 4], -1e6, 0.0)
 
     cost_matrix = - iou_matrix - angle_diff_cost - cate_matrix
 
@@ -381,28 +337,6 @@ def associate_kitti(detections, trackers, det_cates, iou_threshold,
         else:
             matched_indices = linear_assignment(cost_matrix)
     else:
-        matched_indices = np.empty(shape=(0, 2))
-
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if (d not in matched_indices[:, 0]):
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if (t not in matched_indices[:, 1]):
-            unmatched_trackers.append(t)
-
-    # filter out matched with low IOU
-    matches = []
-    for m in matched_indices:
-        if (iou_matrix[m[0], m[1]] < iou_threshold):
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1, 2))
-    if (len(matches) == 0):
-        matches = np.empty((0, 2), dtype=int)
-    else:
-        matches = np.concatenate(matches, axis=0)
+        matched_indices = np.empty(shape=(0, 2), dtype=int)
 
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+    return split_matches(matched_indices, iou_matrix, iou_threshold)
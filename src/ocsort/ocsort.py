@@ -36,6 +36,41 @@ from __future__ import print_function
 import numpy as np
 
 from ocsort import association
+from tracking.kalman import BoxKalmanFilter
+
+
+class ObservationRing(object):
+    """
+    The last observations of a track together with the age they were made at.
+    Lookups only go back a few frames, so older observations are overwritten.
+    """
+
+    def __init__(self, size):
+        self.ages = [-1] * size
+        self.boxes = [None] * size
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, len(self.boxes))
+
+    def __contains__(self, age):
+        return age >= 0 and age in self.ages
+
+    def __getitem__(self, age):
+        return self.boxes[self.ages.index(age)]
+
+    def append(self, age, bbox):
+        index = self.count % len(self.boxes)
+        self.ages[index] = age
+        self.boxes[index] = bbox
+        self.count += 1
+
+    def last(self, n=1):
+        """
+        Returns the n-th last observation.
+        """
+        assert 0 < n <= len(self)
+        return self.boxes[(self.count - n) % len(self.boxes)]
 
 
 def k_previous_obs(observations, cur_age, k):
@@ -45,8 +80,7 @@ def k_previous_obs(observations, cur_age, k):
         dt = k - i
         if cur_age - dt in observations:
             return observations[cur_age-dt]
-    max_age = max(observations.keys())
-    return observations[max_age]
+    return observations.last()
 
 
 def convert_bbox_to_z(bbox):
@@ -91,30 +125,30 @@ class KalmanBoxTracker(object):
     """
     count = 0
 
-    def __init__(self, bbox, delta_t=3, orig=False):
+    def __init__(self, bbox, delta_t=3, orig=False, max_observations=None):
         """
         Initialises a tracker using initial bounding box.
 
         """
         # define constant velocity model
         if not orig:
-            from ocsort.kalmanfilter import KalmanFilterNew
-            self.kf = KalmanFilterNew(dim_x=7, dim_z=4)
+            # closed-form filter of this box model (see tracking.kalman)
+            self.kf = BoxKalmanFilter(convert_bbox_to_z(bbox))
         else:
             from filterpy.kalman import KalmanFilter
             self.kf = KalmanFilter(dim_x=7, dim_z=4)
-        self.kf.F = np.array([[1, 0, 0, 0, 1, 0, 0], [0, 1, 0, 0, 0, 1, 0], [0, 0, 1, 0, 0, 0, 1], [
-            0, 0, 0, 1, 0, 0, 0],  [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1]])
-        self.kf.H = np.array([[1, 0, 0, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0, 0],
-                              [0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 1, 0, 0, 0]])
-
-        self.kf.R[2:, 2:] *= 10.
-        self.kf.P[4:, 4:] *= 1000.  # give high uncertainty to the unobservable initial velocities
-        self.kf.P *= 10.
-        self.kf.Q[-1, -1] *= 0.01
-        self.kf.Q[4:, 4:] *= 0.01
-
-        self.kf.x[:4] = convert_bbox_to_z(bbox)
+            self.kf.F = np.array([[1, 0, 0, 0, 1, 0, 0], [0, 1, 0, 0, 0, 1, 0], [0, 0, 1, 0, 0, 0, 1], [
+                0, 0, 0, 1, 0, 0, 0],  [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1]])
+            self.kf.H = np.array([[1, 0, 0, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0, 0],
+                                  [0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 1, 0, 0, 0]])
+
+            self.kf.R[2:, 2:] *= 10.
+            self.kf.P[4:, 4:] *= 1000.  # give high uncertainty to the unobservable initial velocities
+            self.kf.P *= 10.
+            self.kf.Q[-1, -1] *= 0.01
+            self.kf.Q[4:, 4:] *= 0.01
+
+            self.kf.x[:4] = convert_bbox_to_z(bbox)
         self.time_since_update = 0
         self.id = KalmanBoxTracker.count
         KalmanBoxTracker.count += 1
@@ -128,8 +162,8 @@ class KalmanBoxTracker(object):
         fast and unified way, which you would see below k_observations = np.array([k_previous_obs(...]]), let's bear it for now.
         """
         self.last_observation = np.array([-1, -1, -1, -1, -1])  # placeholder
-        self.observations = dict()
-        self.history_observations = []
+        # observations looked up delta_t frames back, more for head padding
+        self.observations = ObservationRing(max(delta_t, max_observations or 0, 1))
         self.velocity = None
         self.delta_t = delta_t
 
@@ -152,13 +186,8 @@ class KalmanBoxTracker(object):
                 """
                 self.velocity = speed_direction(previous_box, bbox)
 
-            """
-              Insert new observations. This is a ugly way to maintain both self.observations
-              and self.history_observations. Bear it for the moment.
-            """
             self.last_observation = bbox
-            self.observations[self.age] = bbox
-            self.history_observations.append(bbox)
+            self.observations.append(self.age, bbox)
 
             self.time_since_update = 0
             self.history = []
@@ -172,16 +201,24 @@ class KalmanBoxTracker(object):
         """
         Advances the state vector and returns the predicted bounding box estimate.
         """
+        box = self.extrapolate()
+        if (self.time_since_update > 0):
+            self.hit_streak = 0
+        self.time_since_update += 1
+        self.history.append(box)
+        return self.history[-1]
+
+    def extrapolate(self):
+        """
+        Advances the state vector by a frame that is not counted as missed,
+        e.g. a frame without detection, and returns the predicted bounding box.
+        """
         if ((self.kf.x[6]+self.kf.x[2]) <= 0):
             self.kf.x[6] *= 0.0
 
         self.kf.predict()
         self.age += 1
-        if (self.time_since_update > 0):
-            self.hit_streak = 0
-        self.time_since_update += 1
-        self.history.append(convert_x_to_bbox(self.kf.x))
-        return self.history[-1]
+        return convert_x_to_bbox(self.kf.x)
 
     def get_state(self):
         """
@@ -221,6 +258,53 @@ class OCSort(object):
         self.use_byte = use_byte
         KalmanBoxTracker.count = 0
 
+    def predict(self):
+        """
+        Advances all tracks by a frame without detection, e.g. a frame skipped
+        by the detector. The Kalman filters treat it like a missed detection,
+        but tracks matched on the previous frame are not counted as missed
+        and keep their hit streak, lost tracks age as in update.
+        Returns the predicted boxes of the tracks update would return, where
+        the last column is the object ID.
+        """
+        to_del = []
+        ret = []
+        for t, trk in enumerate(self.trackers):
+            if trk.time_since_update > 0:
+                pos = trk.predict()[0]
+            else:
+                pos = trk.extrapolate()[0]
+            # the filter steps over the frame like over a missed detection,
+            # the re-update interpolates across it once observed again
+            trk.update(None)
+            if np.any(np.isnan(pos)) or trk.time_since_update > self.max_age:
+                to_del.append(t)
+            elif (trk.time_since_update < 1) and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
+                ret.append(np.concatenate((pos, [trk.id+1])).reshape(1, -1))
+        for t in reversed(to_del):
+            self.trackers.pop(t)
+        if (len(ret) > 0):
+            return np.concatenate(ret)
+        return np.empty((0, 5))
+
+    def track_arrays(self):
+        """
+        Returns velocities, last observations and the observations delta_t
+        frames back of all trackers, filled into preallocated arrays.
+        """
+        velocities = np.zeros((len(self.trackers), 2))
+        last_boxes = np.empty((len(self.trackers), 5))
+        k_observations = np.empty((len(self.trackers), 5))
+        if len(self.trackers) == 0:
+            return velocities, last_boxes, k_observations
+        last_boxes[:] = [trk.last_observation for trk in self.trackers]
+        k_observations[:] = [k_previous_obs(trk.observations, trk.age, self.delta_t)
+                             for trk in self.trackers]
+        moving = [t for t, trk in enumerate(self.trackers) if trk.velocity is not None]
+        if moving:
+            velocities[moving] = [self.trackers[t].velocity for t in moving]
+        return velocities, last_boxes, k_observations
+
     def update(self, output_results, img_info, img_size):
         """
         Params:
@@ -267,11 +351,7 @@ class OCSort(object):
         for t in reversed(to_del):
             self.trackers.pop(t)
 
-        velocities = np.array(
-            [trk.velocity if trk.velocity is not None else np.array((0, 0)) for trk in self.trackers])
-        last_boxes = np.array([trk.last_observation for trk in self.trackers])
-        k_observations = np.array(
-            [k_previous_obs(trk.observations, trk.age, self.delta_t) for trk in self.trackers])
+        velocities, last_boxes, k_observations = self.track_arrays()
 
         """
             First round of association
@@ -339,7 +419,9 @@ class OCSort(object):
 
         # create and initialise new trackers for unmatched detections
         for i in unmatched_dets:
-            trk = KalmanBoxTracker(dets[i, :], delta_t=self.delta_t)
+            trk = KalmanBoxTracker(
+                dets[i, :], delta_t=self.delta_t,
+                max_observations=self.min_hits)
             self.trackers.append(trk)
         i = len(self.trackers)
         for trk in reversed(self.trackers):
@@ -386,11 +468,7 @@ class OCSort(object):
         for t in reversed(to_del):
             self.trackers.pop(t)
 
-        velocities = np.array([trk.velocity if trk.velocity is not None else np.array(
-            (0, 0)) for trk in self.trackers])
-        last_boxes = np.array([trk.last_observation for trk in self.trackers])
-        k_observations = np.array([k_previous_obs(
-            trk.observations, trk.age, self.delta_t) for trk in self.trackers])
+        velocities, last_boxes, k_observations = self.track_arrays()
 
         matched, unmatched_dets, unmatched_trks = association.associate_kitti(
             dets, trks, cates, self.iou_threshold, velocities, k_observations, self.inertia)
@@ -443,7 +521,7 @@ class OCSort(object):
                     unmatched_trks, np.array(to_remove_trk_indices))
 
         for i in unmatched_dets:
-            trk = KalmanBoxTracker(dets[i, :])
+            trk = KalmanBoxTracker(dets[i, :], max_observations=self.min_hits)
             trk.cate = cates[i]
             self.trackers.append(trk)
         i = len(self.trackers)
@@ -461,8 +539,7 @@ class OCSort(object):
                 if trk.hit_streak == self.min_hits:
                     # Head Padding (HP): recover the lost steps during initializing the track
                     for prev_i in range(self.min_hits - 1):
-                        prev_observation = trk.history_observations[-(
-                            prev_i+2)]
+                        prev_observation = trk.observations.last(prev_i+2)
                         ret.append((np.concatenate((prev_observation[:4], [trk.id+1], [trk.cate],
                                                     [-(prev_i+1)]))).reshape(1, -1))
             i -= 1
@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-import queue
 import time
 from multiprocessing import Queue
-from typing import Dict, Generator, List, Optional, Type, TypeVar
+from typing import Callable, Dict, Generator, List, Optional, Type, TypeVar
 
 MISSING_DATA_MESSAGE = 'Missing data in pipeline package!'
 
@@ -19,10 +18,11 @@ T = TypeVar('T')
 class DataCollection:
     def __init__(
         self,
-        data: Dict[type, BaseData] = {},
+        data: Optional[Dict[type, BaseData]] = None,
         timestamp: Optional[float] = None
     ) -> None:
-        self.data = data
+        # a shared default dict would mix up data of different frames
+        self.data = data if data is not None else {}
         if timestamp:
             self.timestamp = timestamp
         else:
@@ -56,24 +56,31 @@ class ExceptionCloseData(CloseData):
 def pipeline_data_generator(
     input_queue: Queue[DataCollection],
     output_queue: Queue[DataCollection],
-    expected_data: List[Type]
+    expected_data: List[Type],
+    release: Optional[Callable[[DataCollection], None]] = None
 ) -> Generator[DataCollection, None, None]:
     closing = False
+    data: Optional[DataCollection] = None
     try:
         while not closing:
-            try:
-                data = input_queue.get(timeout=0.01)
-                if data.is_closed():
-                    closing = True
-                    output_queue.put(data)
-                    break
-
-                assert all(data.has(ed)
-                           for ed in expected_data), MISSING_DATA_MESSAGE
-                yield data
-            except queue.Empty:
-                pass
+            # blocks until data arrives, CloseData signals the shutdown
+            data = input_queue.get()
+            if data.is_closed():
+                closing = True
+                output_queue.put(data)
+                break
+
+            assert all(data.has(ed)
+                       for ed in expected_data), MISSING_DATA_MESSAGE
+            yield data
+            # the stage forwarded or discarded the data
+            data = None
     except KeyboardInterrupt:
         pass
     except Exception as e:
         output_queue.put(DataCollection().add(ExceptionCloseData(e)))
+    finally:
+        # data is not forwarded if the check or the stage failed (the
+        # generator is closed when the exception leaves the stage loop)
+        if data is not None and not data.is_closed() and release:
+            release(data)
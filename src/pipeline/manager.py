@@ -4,12 +4,19 @@ from multiprocessing.sharedctypes import Synchronized
 from typing import Generator, List, Optional
 
 from frame.camera import CameraSettings
-from frame.producer import VideoCaptureProducer
+from frame.producer import VideoCaptureProducer, release_frame
 from frame.shared import FramePool
 from pipeline.data import DataCollection
+from pipeline.reorder import ReorderBuffer
 from pose.producer import PoseProducer
+from segmentation.cache import EmbeddingCacheSettings
+from segmentation.crop import CropSettings
+from segmentation.onnx_sam import OnnxSamSettings
 from segmentation.producer import SegmentProducer
+from tracking.detector import DetectorSettings
 from tracking.producer import TrackProducer
+from tracking.schedule import DetectionSettings
+from util.session import SessionSettings
 
 
 class FrameProcessingPipeline:
@@ -20,12 +27,27 @@ class FrameProcessingPipeline:
         fast: bool = True,
         camera_settings: Optional[CameraSettings] = None,
         frame_pool: Optional[FramePool] = None,
-        specific_bodypart: Optional[Synchronized] = None
+        specific_bodypart: Optional[Synchronized] = None,
+        lossless: bool = False,
+        queue_size: int = 4,
+        reorder_latency: Optional[float] = 0.05,
+        track_session: Optional[SessionSettings] = None,
+        track_detection: Optional[DetectionSettings] = None,
+        track_detector: Optional[DetectorSettings] = None,
+        segment_cache: Optional[EmbeddingCacheSettings] = None,
+        segment_onnx: Optional[OnnxSamSettings] = None,
+        segment_crop: Optional[CropSettings] = None
     ) -> None:
-        self.frame_queue: Queue[DataCollection] = Queue()
-        self.tracking_queue: Queue[DataCollection] = Queue()
-        self.pose_queue: Queue[DataCollection] = Queue()  # optional
-        self.segment_queue: Queue[DataCollection] = Queue()
+        # lossless mode: bounded queues apply backpressure instead of
+        # stages discarding frames
+        maxsize = queue_size if lossless else 0
+        self.lossless = lossless
+        self.reorder = ReorderBuffer(
+            None if lossless else reorder_latency, frame_pool)
+        self.frame_queue: Queue[DataCollection] = Queue(maxsize)
+        self.tracking_queue: Queue[DataCollection] = Queue(maxsize)
+        self.pose_queue: Queue[DataCollection] = Queue(maxsize)  # optional
+        self.segment_queue: Queue[DataCollection] = Queue(maxsize)
         self.segments: List[SegmentProducer] = [
             SegmentProducer(
                 self.pose_queue,  # tracking queue
@@ -33,16 +55,23 @@ class FrameProcessingPipeline:
                 down_scale,
                 fast,
                 frame_pool,
-                specific_bodypart
+                specific_bodypart,
+                lossless,
+                segment_cache,
+                segment_onnx,
+                segment_crop
             )
             for _ in range(segment_processes)
         ]
         self.pose: PoseProducer = PoseProducer(
-            self.tracking_queue, self.pose_queue, frame_pool=frame_pool)  # optional
+            self.tracking_queue, self.pose_queue, frame_pool=frame_pool,
+            lossless=lossless)  # optional
         self.tracker: TrackProducer = TrackProducer(
-            self.frame_queue, self.tracking_queue, down_scale, frame_pool)
+            self.frame_queue, self.tracking_queue, down_scale, frame_pool,
+            lossless, track_session, track_detection, track_detector)
         self.cap = VideoCaptureProducer(
-            self.frame_queue, camera_settings, frame_pool)
+            self.frame_queue, camera_settings, frame_pool, lossless)
+        self.frame_pool = frame_pool
 
     def start(self) -> None:
         self.cap.start()
@@ -52,11 +81,18 @@ class FrameProcessingPipeline:
             segment.start()
 
     def get_frames(self) -> Generator[DataCollection, None, None]:
+        if len(self.segments) == 1:
+            # a single worker keeps the order
+            while True:
+                yield self.segment_queue.get()
         while True:
             try:
-                yield self.segment_queue.get(timeout=0.01)
+                # only wake up without data to give up late frames
+                self.reorder.push(self.segment_queue.get(
+                    timeout=self.reorder.timeout()))
             except queue.Empty:
-                pass  # print("Consumer:Timeout reading from the track Queue")
+                pass
+            yield from self.reorder.pop()
 
     def stop(self) -> None:
         self.cap.stop()
@@ -64,3 +100,16 @@ class FrameProcessingPipeline:
         self.pose.stop()  # optional
         for segment in self.segments:
             segment.stop()
+        self.release_queued_frames()
+
+    def release_queued_frames(self) -> None:
+        for data_queue in [self.frame_queue, self.tracking_queue,
+                           self.pose_queue, self.segment_queue]:
+            while True:
+                try:
+                    release_frame(data_queue.get(timeout=0.1), self.frame_pool)
+                except queue.Empty:
+                    break
+        for _, data in self.reorder.pending.values():
+            release_frame(data, self.frame_pool)
+        self.reorder.pending.clear()
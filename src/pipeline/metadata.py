@@ -0,0 +1,209 @@
+from multiprocessing.managers import SharedMemoryManager
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+TARGET_SIZE = 9  # box, tracking id and padded box
+LANDMARK_COUNT = 19
+RAW_LANDMARK_COUNT = 33
+LANDMARK_SIZE = 4  # x, y, z and visibility
+
+# stores attached in the current process, looked up by name when unpickling
+_stores: Dict[str, Any] = {}
+
+
+def get_store(name: str) -> Any:
+    assert name in _stores, f'Metadata store {name} is not attached!'
+    return _stores[name]
+
+
+class MetadataStore:
+    """
+    Fixed-layout metadata records in shared memory, one per frame slot.
+
+    Pipeline data of a pooled frame writes targets and landmarks into the
+    record of its frame slot when it is pickled and only sends the store
+    name and slot through the queue. The record lives as long as the frame
+    slot is referenced, so it needs no lifetime management of its own.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        memory_manager: SharedMemoryManager,
+        max_targets: int = 16
+    ) -> None:
+        self.maxsize = maxsize
+        self.max_targets = max_targets
+        self.shared_memory = memory_manager.SharedMemory(
+            int(sum(np.prod(shape) for shape in self._shapes()))
+            * np.dtype(np.float64).itemsize)
+        self.name = self.shared_memory.name
+        self._create_views()
+        _stores[self.name] = self
+
+    def _shapes(self) -> List[Tuple[int, ...]]:
+        return [
+            (self.maxsize,),  # target count
+            (self.maxsize, self.max_targets, TARGET_SIZE),
+            (self.maxsize,),  # landmark count
+            (self.maxsize, self.max_targets),  # landmark flags
+            (self.maxsize, self.max_targets, LANDMARK_COUNT, LANDMARK_SIZE),
+            (self.maxsize, self.max_targets,
+             RAW_LANDMARK_COUNT, LANDMARK_SIZE),
+        ]
+
+    def _create_views(self) -> None:
+        views = []
+        offset = 0
+        for shape in self._shapes():
+            count = int(np.prod(shape))
+            views.append(np.frombuffer(
+                self.shared_memory.buf,
+                dtype=np.float64,
+                count=count,
+                offset=offset
+            ).reshape(shape))
+            offset += count * np.dtype(np.float64).itemsize
+        self.target_counts, self.targets, self.landmark_counts, \
+            self.landmark_flags, self.landmarks, self.raw_landmarks = views
+
+    def __getstate__(self) -> Dict:
+        d = dict(self.__dict__)
+        for view in ['target_counts', 'targets', 'landmark_counts',
+                     'landmark_flags', 'landmarks', 'raw_landmarks']:
+            del d[view]
+        return d
+
+    def __setstate__(self, d: Dict) -> None:
+        self.__dict__.update(d)
+        self._create_views()
+        _stores[self.name] = self
+
+    def fits(self, count: int) -> bool:
+        return count <= self.max_targets
+
+    def write_targets(self, slot: int, targets: List[np.ndarray]) -> None:
+        self.target_counts[slot] = len(targets)
+        for id, target in enumerate(targets):
+            self.targets[slot, id] = target
+
+    def read_targets(self, slot: int) -> List[np.ndarray]:
+        count = int(self.target_counts[slot])
+        return list(self.targets[slot, :count].copy())
+
+    def write_landmarks(
+        self,
+        slot: int,
+        landmarks: List[np.ndarray],
+        raw_landmarks: List[Optional[np.ndarray]]
+    ) -> None:
+        self.landmark_counts[slot] = len(landmarks)
+        for id, (landmark, raw_landmark) in enumerate(
+                zip(landmarks, raw_landmarks)):
+            self.landmark_flags[slot, id] = landmark.size > 0
+            if landmark.size > 0:
+                self.landmarks[slot, id] = landmark
+            if raw_landmark is not None:
+                self.raw_landmarks[slot, id] = raw_landmark
+
+    def read_landmarks(
+        self,
+        slot: int
+    ) -> Tuple[List[np.ndarray], List[Optional[np.ndarray]]]:
+        count = int(self.landmark_counts[slot])
+        landmarks: List[np.ndarray] = []
+        raw_landmarks: List[Optional[np.ndarray]] = []
+        for id in range(count):
+            if self.landmark_flags[slot, id]:
+                landmarks.append(self.landmarks[slot, id].copy())
+                raw_landmarks.append(self.raw_landmarks[slot, id].copy())
+            else:
+                landmarks.append(np.array([]))
+                raw_landmarks.append(None)
+        return landmarks, raw_landmarks
+
+    def close(self) -> None:
+        del self.target_counts
+        del self.targets
+        del self.landmark_counts
+        del self.landmark_flags
+        del self.landmarks
+        del self.raw_landmarks
+        _stores.pop(self.name, None)
+        self.shared_memory.close()
+
+
+class MaskStore:
+    """
+    Bit-packed segmentation masks in shared memory, one area per frame slot.
+
+    The area of a slot holds up to capacity times the frame area in mask
+    pixels, masks that do not fit are pickled as before.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        shape: Tuple[int, int],
+        memory_manager: SharedMemoryManager,
+        capacity: float = 2.0
+    ) -> None:
+        self.maxsize = maxsize
+        self.slot_bytes = int(capacity * shape[0] * shape[1]) // 8
+        self.shared_memory = memory_manager.SharedMemory(
+            maxsize * self.slot_bytes)
+        self.name = self.shared_memory.name
+        self._create_views()
+        _stores[self.name] = self
+
+    def _create_views(self) -> None:
+        self.buffer = np.frombuffer(
+            self.shared_memory.buf,
+            dtype=np.uint8,
+            count=self.maxsize * self.slot_bytes
+        ).reshape((self.maxsize, self.slot_bytes))
+
+    def __getstate__(self) -> Dict:
+        d = dict(self.__dict__)
+        del d['buffer']
+        return d
+
+    def __setstate__(self, d: Dict) -> None:
+        self.__dict__.update(d)
+        self._create_views()
+        _stores[self.name] = self
+
+    def write(
+        self,
+        slot: int,
+        masks: List[List[np.ndarray]]
+    ) -> Optional[List[List[Tuple[int, Tuple[int, ...]]]]]:
+        offset = 0
+        layout = []
+        for person_masks in masks:
+            entries = []
+            for mask in person_masks:
+                packed = np.packbits(mask, axis=None)
+                if offset + packed.size > self.slot_bytes:
+                    return None
+                self.buffer[slot, offset:offset + packed.size] = packed
+                entries.append((offset, mask.shape))
+                offset += packed.size
+            layout.append(entries)
+        return layout
+
+    def read(
+        self,
+        slot: int,
+        offset: int,
+        shape: Tuple[int, ...]
+    ) -> np.ndarray:
+        count = int(np.prod(shape))
+        packed = self.buffer[slot, offset:offset + (count + 7) // 8]
+        return np.unpackbits(packed, count=count).reshape(shape).astype(bool)
+
+    def close(self) -> None:
+        del self.buffer
+        _stores.pop(self.name, None)
+        self.shared_memory.close()
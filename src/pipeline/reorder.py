@@ -0,0 +1,82 @@
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from frame.producer import FrameData, release_frame
+from frame.shared import FramePool
+from pipeline.data import DataCollection
+
+
+class ReorderBuffer:
+    """
+    Restores the order of frames delivered by parallel workers.
+
+    Frames are held back until all frames with a smaller sequence number
+    arrived or were reported as discarded by a stage. A missing frame is
+    given up once the oldest held back frame waited longer than the latency
+    window, frames arriving after that are dropped. Without a latency window
+    it waits for every frame.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[float] = 0.05,
+        frame_pool: Optional[FramePool] = None
+    ) -> None:
+        self.latency = latency
+        self.frame_pool = frame_pool
+        self.pending: Dict[int, Tuple[float, DataCollection]] = {}
+        self.discarded: Set[int] = set()
+        self.next_sequence: Optional[int] = None
+        self.closing: Optional[DataCollection] = None
+        self.skipped_frames = 0
+        self.late_frames = 0
+
+    def push(self, data: DataCollection) -> None:
+        if data.is_closed():
+            self.closing = data
+            return
+        sequence = data.get(FrameData).sequence
+        self.discarded.update(data.get(FrameData).skipped)
+        if self.next_sequence is not None and sequence < self.next_sequence:
+            self.late_frames += 1
+            release_frame(data, self.frame_pool)
+            return
+        self.pending[sequence] = (time.perf_counter(), data)
+
+    def pop(self) -> List[DataCollection]:
+        ready: List[DataCollection] = []
+        while self.pending:
+            if self.next_sequence is None:
+                # first frame defines where the sequence starts
+                self.next_sequence = min(self.pending)
+            if self.next_sequence in self.pending:
+                ready.append(self.pending.pop(self.next_sequence)[1])
+                self.next_sequence += 1
+            elif self.next_sequence in self.discarded:
+                self.next_sequence += 1
+            elif self.closing or self._waited_too_long():
+                oldest = min(self.pending)
+                self.skipped_frames += oldest - self.next_sequence
+                self.next_sequence = oldest
+            else:
+                break
+        if self.next_sequence is not None:
+            self.discarded = {
+                sequence for sequence in self.discarded
+                if sequence >= self.next_sequence}
+        if self.closing:
+            ready.append(self.closing)
+            self.closing = None
+        return ready
+
+    def timeout(self) -> Optional[float]:
+        if self.latency is None or not self.pending:
+            return None
+        oldest_arrival = min(arrival for arrival, _ in self.pending.values())
+        return max(0.0, oldest_arrival + self.latency - time.perf_counter())
+
+    def _waited_too_long(self) -> bool:
+        if self.latency is None:
+            return False
+        oldest_arrival = min(arrival for arrival, _ in self.pending.values())
+        return time.perf_counter() - oldest_arrival >= self.latency
@@ -1,15 +1,50 @@
 import time
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 import numpy as np
 
 from frame.shared import FramePool
 from pipeline.data import DataCollection
+from segmentation.producer import SegmentationData
+
+
+def array_bytes(value: Any) -> int:
+    """
+    Bytes of the numpy arrays within lists, tuples and dicts.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(array_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(array_bytes(item) for item in value.values())
+    return 0
+
+
+def queue_bytes(frame_data: DataCollection) -> int:
+    """
+    Array bytes of the pickled state of the data, which dominate the size
+    sent through the queue. The data received by the director is in shared
+    memory already, so getting the state does not copy it again.
+    """
+    return sum(
+        array_bytes(data.__getstate__() if hasattr(data, '__getstate__')
+                    else vars(data))
+        for data in frame_data.data.values())
 
 
 class TrackFrameStats:
-    def __init__(self, frame_pool: Optional[FramePool] = None) -> None:
+    def __init__(
+        self,
+        frame_pool: Optional[FramePool] = None,
+        ipc_interval: int = 10
+    ) -> None:
         self.frame_pool = frame_pool
+        self.ipc_interval = ipc_interval
+        # bytes sent through the queue and through shared memory
+        self.ipc_bytes = np.array(
+            [[-1, -1] for _ in range(100)], dtype=int)
+        self.ipc_pointer = 0
         self.delay = np.array([-1.0 for _ in range(100)], dtype=float)
         self.processing_frames = np.array(
             [-1 for _ in range(100)], dtype=int)
@@ -24,12 +59,28 @@ class TrackFrameStats:
             self.processing_frames[self.pointer] = \
                 self.frame_pool.free_frames.qsize()
         self.pointer = (self.pointer + 1) % self.delay.shape[0]
+        if self.count % self.ipc_interval == 0:
+            self.add_ipc_bytes(frame_data)
         self.count += 1
 
+    def add_ipc_bytes(self, frame_data: DataCollection) -> None:
+        shared_bytes = 0
+        if frame_data.has(SegmentationData):
+            shared_bytes = frame_data.get(SegmentationData).get_shared_bytes()
+        self.ipc_bytes[self.ipc_pointer] = [
+            queue_bytes(frame_data), shared_bytes]
+        self.ipc_pointer = (self.ipc_pointer + 1) % self.ipc_bytes.shape[0]
+
+    def get_avg_ipc_bytes(self) -> Tuple[float, float]:
+        valid = self.ipc_bytes[self.ipc_bytes[:, 0] > -1]
+        if valid.shape[0] == 0:
+            return 0.0, 0.0
+        return tuple(np.average(valid, axis=0))  # type: ignore
+
     def get_avg_delay(self) -> float:
         return np.average(self.delay[self.delay > -1.0])
 
     def get_processing_frames(self) -> int:
         assert self.frame_pool is not None
-        return 30 - np.average(
+        return self.frame_pool.maxsize - np.average(
             self.processing_frames[self.processing_frames > -1])
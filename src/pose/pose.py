@@ -2,6 +2,7 @@ from typing import Any, List, Optional, Tuple
 
 import mediapipe as mp
 import numpy as np
+from mediapipe.framework.formats import landmark_pb2
 
 
 class PoseRenderer:
@@ -30,6 +31,21 @@ class PoseRenderer:
         return image
 
 
+def landmarks_to_array(pose_landmarks: Any) -> np.ndarray:
+    return np.array([
+        (landmark.x, landmark.y, landmark.z, landmark.visibility)
+        for landmark in pose_landmarks.landmark
+    ], dtype=float)
+
+
+def array_to_landmarks(array: np.ndarray) -> Any:
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(
+            x=x, y=y, z=z, visibility=visibility)
+        for x, y, z, visibility in array
+    ])
+
+
 BODY_POINTS = [
     # LEFT_ARM_POINTS
     [
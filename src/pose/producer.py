@@ -2,18 +2,22 @@ from __future__ import annotations
 
 import queue
 import time
+from functools import partial
 from multiprocessing import Process, Queue
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
-from frame.producer import FrameData
+from frame.producer import (FrameData, discarded_sequences, get_slot,
+                            release_frame)
 from frame.shared import FramePool
 from ocsort.timer import Timer
 from pipeline.data import (BaseData, CloseData, DataCollection,
                            pipeline_data_generator)
-from pose.pose import BODY_POINTS, Pose
+from pipeline.metadata import MetadataStore, get_store
+from pose.pose import (BODY_POINTS, Pose, array_to_landmarks,
+                       landmarks_to_array)
 from segmentation.base import BodyPartSegmentation
 from tracking.producer import TrackingData
 
@@ -23,10 +27,59 @@ class PoseData(BaseData):
         self,
         landmarks: List[np.ndarray],
         raw_landmarks: List[Any],
+        frame_pool: Optional[FramePool] = None,
+        slot: Optional[int] = None
     ) -> None:
         super().__init__()
         self.landmarks = landmarks
-        self.raw_landmarks = raw_landmarks
+        self._raw_landmarks: Optional[List[Any]] = raw_landmarks
+        self._raw_arrays: Optional[List[Optional[np.ndarray]]] = None
+        self.store: Optional[MetadataStore] = None
+        if frame_pool and slot is not None:
+            self.store = frame_pool.metadata
+        self.slot = slot
+        self.in_store = False
+
+    @property
+    def raw_landmarks(self) -> List[Any]:
+        # mediapipe landmarks are only rebuilt by consumers using them
+        if self._raw_landmarks is None:
+            assert self._raw_arrays is not None
+            self._raw_landmarks = [
+                array_to_landmarks(array) if array is not None else None
+                for array in self._raw_arrays
+            ]
+        return self._raw_landmarks
+
+    def __getstate__(self) -> Dict:
+        d = dict(self.__dict__)
+        if self.store is None or not self.store.fits(len(self.landmarks)):
+            d['store'] = None
+            d['_raw_landmarks'] = self.raw_landmarks
+            d['_raw_arrays'] = None
+            return d
+        # only the frame slot is sent, landmarks go through shared memory
+        if not self.in_store:
+            assert self._raw_landmarks is not None
+            raw_arrays = [
+                landmarks_to_array(raw) if raw is not None else None
+                for raw in self._raw_landmarks
+            ]
+            self.store.write_landmarks(self.slot, self.landmarks, raw_arrays)
+            self.in_store = True
+        for key in ['landmarks', '_raw_landmarks', '_raw_arrays']:
+            del d[key]
+        d['store'] = self.store.name
+        return d
+
+    def __setstate__(self, d: Dict) -> None:
+        if d['store'] is not None:
+            d['store'] = get_store(d['store'])
+            d['landmarks'], d['_raw_arrays'] = \
+                d['store'].read_landmarks(d['slot'])
+            d['_raw_landmarks'] = None
+            d['in_store'] = True
+        self.__dict__.update(d)
 
     def get_landmarks_xy(
         self,
@@ -55,7 +108,8 @@ def produce_pose(
     input_queue: Queue[DataCollection],
     output_queue: Queue[DataCollection],
     model_complexity: int = 1,
-    frame_pool: Optional[FramePool] = None
+    frame_pool: Optional[FramePool] = None,
+    lossless: bool = False
 ) -> None:
     reduce_frame_discard_timer = 0.0
     timer = Timer()
@@ -64,7 +118,8 @@ def produce_pose(
     for data in pipeline_data_generator(
         input_queue,
         output_queue,
-        [TrackingData]
+        [TrackingData],
+        partial(release_frame, frame_pool=frame_pool)
     ):
         timer.tic()
         image = data.get(FrameData).get_frame(frame_pool)
@@ -87,20 +142,21 @@ def produce_pose(
             all_landmarks.append(landmarks)
             all_raw_landmarks.append(raw_landmarks)
 
-        if not output_queue.empty():
+        frame_data = data.get(FrameData)
+        frame_data.sequence = frame
+        if not lossless and not output_queue.empty():
             try:
-                discarded_frame = output_queue.get_nowait()
-                if frame_pool and discarded_frame.has(FrameData):
-                    frame_pool.free_frame(
-                        discarded_frame.get(FrameData).frame)
+                discarded = output_queue.get_nowait()
+                frame_data.skipped = discarded_sequences(discarded)
+                release_frame(discarded, frame_pool)
                 reduce_frame_discard_timer += 0.015
             except queue.Empty:
                 reduce_frame_discard_timer -= 0.001
                 if reduce_frame_discard_timer < 0:
                     reduce_frame_discard_timer = 0
 
-        output_queue.put(
-            data.add(PoseData(all_landmarks, all_raw_landmarks)))
+        output_queue.put(data.add(PoseData(
+            all_landmarks, all_raw_landmarks, frame_pool, get_slot(data))))
         timer.toc()
         frame += 1
         if frame == 100:
@@ -119,25 +175,31 @@ class PoseProducer:
         input_queue: Queue[DataCollection],
         output_queue: Queue[DataCollection],
         model_complexity: int = 1,
-        frame_pool: Optional[FramePool] = None
+        frame_pool: Optional[FramePool] = None,
+        lossless: bool = False
     ) -> None:
         self.process: Optional[Process] = None
         self.input_queue = input_queue
         self.output_queue = output_queue
         self.model_complexity = model_complexity
         self.frame_pool = frame_pool
+        self.lossless = lossless
 
     def start(self) -> None:
         self.process = Process(target=produce_pose, args=(
             self.input_queue,
             self.output_queue,
             self.model_complexity,
-            self.frame_pool
+            self.frame_pool,
+            self.lossless
         ))
         self.process.start()
 
     def stop(self) -> None:
-        self.input_queue.put(DataCollection().add(CloseData()))
+        try:
+            self.input_queue.put_nowait(DataCollection().add(CloseData()))
+        except queue.Full:
+            pass  # bounded queue is full, process gets killed anyway
         if self.process:
             time.sleep(1)
             self.process.kill()
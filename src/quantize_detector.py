@@ -0,0 +1,52 @@
+import argparse
+from dataclasses import replace
+from typing import Dict
+
+from tracking.detector import (DETECTORS, DetectorSettings, create_detector,
+                               model_path)
+from tracking.quantize import (CALIBRATION_METHODS, quantize_detector,
+                               read_frames)
+
+
+def parse_args() -> Dict:
+    parser = argparse.ArgumentParser(
+        'Quantize a person detector to INT8, calibrated on recorded frames.')
+    parser.add_argument('input', type=str,
+                        help='Video file or image directory recorded at the venue.')
+    parser.add_argument('--model', type=str, default='yolox-tiny',
+                        choices=list(DETECTORS), help='Detector model.')
+    parser.add_argument('--input-size', type=int, default=None,
+                        help='Input size for models with dynamic input shape.')
+    parser.add_argument('--model-dir', type=str, default='models',
+                        help='Directory of the models, the quantized model is saved there.')
+    parser.add_argument('--frames', type=int, default=100,
+                        help='Number of frames used for calibration.')
+    parser.add_argument('--step', type=int, default=10,
+                        help='Use every n-th frame of the input.')
+    parser.add_argument('--method', type=str, default='minmax',
+                        choices=list(CALIBRATION_METHODS),
+                        help='Calibration method of the activation ranges.')
+    parser.add_argument('--per-channel', default=False, action='store_true',
+                        help='Quantize weights per channel.')
+
+    return vars(parser.parse_args())
+
+
+def main(args: Dict) -> None:
+    settings = DetectorSettings(
+        args['model'], args['input_size'], model_dir=args['model_dir'])
+    model = DETECTORS[settings.model]
+    input_shape = create_detector(settings).input_shape
+    output_path = model_path(model, replace(settings, quantized=True))
+    count = quantize_detector(
+        model_path(model, settings),
+        output_path,
+        read_frames(args['input'], args['frames'], args['step']),
+        input_shape,
+        args['method'],
+        args['per_channel'])
+    print(f'Calibrated on {count} frames, saved {output_path}')
+
+
+if __name__ == '__main__':
+    main(parse_args())
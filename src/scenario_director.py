@@ -11,7 +11,7 @@ import numpy as np
 from background import Background
 from frame.camera import (CameraSettings, add_camera_parameters,
                           parse_camera_settings)
-from frame.producer import FrameData
+from frame.producer import FrameData, release_frame
 from frame.shared import FramePool, create_frame_pool
 from input import Interaction
 from ocsort.timer import Timer
@@ -21,12 +21,25 @@ from pipeline.stats import TrackFrameStats
 from pose.pose import PoseRenderer
 from pose.producer import PoseData
 from segmentation.base import BodyPartSegmentation
+from segmentation.cache import (EmbeddingCacheSettings,
+                                add_embedding_cache_parameters,
+                                parse_embedding_cache_settings)
+from segmentation.crop import (CropSettings, add_crop_parameters,
+                               parse_crop_settings)
+from segmentation.onnx_sam import (OnnxSamSettings, add_onnx_sam_parameters,
+                                   parse_onnx_sam_settings)
 from segmentation.producer import SegmentationData
 from settings import GameSettings
+from tracking.detector import (DetectorSettings, add_detector_parameters,
+                               parse_detector_settings)
 from tracking.producer import TrackingData
+from tracking.schedule import (DetectionSettings, add_detection_parameters,
+                               parse_detection_settings)
 from util.image import create_black_image
 from util.mask import (add_masks, apply_mask, apply_mask_grayscale, dilate,
                        scale_mask)
+from util.session import (SessionSettings, add_session_parameters,
+                          parse_session_settings)
 from util.visualize import show_box
 
 
@@ -41,9 +54,19 @@ def parse_args() -> Dict:
                         default=1.0, help='Downscale rate')
     parser.add_argument('--segment-processes', type=int, default=2,
                         help='Number of processes for segmentation.')
+    parser.add_argument('--lossless', dest='lossless', default=False,
+                        action='store_true', help='Process every frame in order without dropping any (e.g. for recorded input).')
+    parser.add_argument('--reorder-latency', type=float, default=0.05,
+                        help='Seconds to wait for a late frame from the segmentation processes.')
     parser.add_argument('--save', dest='save', default=False,
                         action='store_true', help='Save images for every processed frame, with original image.')  # noqa: E501
     parser = add_camera_parameters(parser)
+    parser = add_session_parameters(parser, 'track')
+    parser = add_detection_parameters(parser)
+    parser = add_detector_parameters(parser)
+    parser = add_embedding_cache_parameters(parser)
+    parser = add_onnx_sam_parameters(parser)
+    parser = add_crop_parameters(parser)
 
     return vars(parser.parse_args())
 
@@ -62,7 +85,15 @@ class Director:
             down_scale: Optional[float] = None,
             camera_settings: Optional[CameraSettings] = None,
             frame_pool: Optional[FramePool] = None,
-            fullscreen: bool = False
+            fullscreen: bool = False,
+            lossless: bool = False,
+            reorder_latency: Optional[float] = 0.05,
+            track_session: Optional[SessionSettings] = None,
+            track_detection: Optional[DetectionSettings] = None,
+            track_detector: Optional[DetectorSettings] = None,
+            segment_cache: Optional[EmbeddingCacheSettings] = None,
+            segment_onnx: Optional[OnnxSamSettings] = None,
+            segment_crop: Optional[CropSettings] = None
     ) -> None:
         self.bodypart_segmentation: Synchronized[int] = Value(
             'i', BodyPartSegmentation.ALL.value)  # type: ignore
@@ -76,7 +107,15 @@ class Director:
             fast,
             camera_settings,
             frame_pool,
-            self.bodypart_segmentation
+            self.bodypart_segmentation,
+            lossless,
+            reorder_latency=reorder_latency,
+            track_session=track_session,
+            track_detection=track_detection,
+            track_detector=track_detector,
+            segment_cache=segment_cache,
+            segment_onnx=segment_onnx,
+            segment_crop=segment_crop
         )
         self.frame_pool = frame_pool
         self.pose_renderer = PoseRenderer()
@@ -281,8 +320,7 @@ class Director:
 
             cv2.imshow('application', processed_image)
 
-            if self.frame_pool:
-                self.frame_pool.free_frame(data.get(FrameData).frame)
+            release_frame(data, self.frame_pool)
 
             frame_count += 1
             key = chr(cv2.waitKey(1) & 255)
@@ -303,14 +341,23 @@ class Director:
             if frame_count % 50 == 0 and frame_count > 50:
                 print('Overall-FPS: ', 1. / overall_timer.average_time)
                 print('Processing delay: ', self.stats.get_avg_delay())
+                print('IPC bytes per frame (queue, shared memory): ',
+                      *self.stats.get_avg_ipc_bytes())
                 if self.frame_pool:
                     print('Avg frame processing: ',
                           self.stats.get_processing_frames())
             overall_timer.tic()
 
+        print('Processed frames:', frame_count, 'Throughput-FPS:',
+              frame_count / (time.time() - start_time))
+
     def stop(self) -> None:
         self.processor.stop()
         cv2.destroyAllWindows()
+        if self.frame_pool:
+            leaks = self.frame_pool.leak_report()
+            if leaks:
+                print('Leaked frames (index, references, age):', leaks)
 
 
 def main(args: Dict) -> None:
@@ -318,16 +365,28 @@ def main(args: Dict) -> None:
     settings.print()
     settings.save_imgs = args.get('save', False)
     camera_settings = parse_camera_settings(args)
-    frame_pool = create_frame_pool(30, camera_settings)
+    if args.get('lossless', False):
+        camera_settings.realtime = False
+    down_scale = args.get('down_scale', 1.0)
+    frame_pool = create_frame_pool(
+        30, camera_settings, scales=[1.0 / down_scale])
 
     director = Director(
         settings,
         args.get('segment_processes', 2),
         not args.get('slow', False),
-        args.get('down_scale', False),
+        down_scale,
         camera_settings,
         frame_pool,
-        args.get('fullscreen', False)
+        args.get('fullscreen', False),
+        args.get('lossless', False),
+        args.get('reorder_latency', 0.05),
+        parse_session_settings(args, 'track'),
+        parse_detection_settings(args),
+        parse_detector_settings(args),
+        parse_embedding_cache_settings(args),
+        parse_onnx_sam_settings(args),
+        parse_crop_settings(args)
     )
 
     try:
@@ -1,8 +1,10 @@
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, List, Optional, Tuple
 
 import numpy as np
 
+from segmentation.cache import EmbeddingCache, EmbeddingCacheSettings
+
 
 class BodyPartSegmentation(Enum):
     ALL = 0
@@ -12,22 +14,122 @@ class BodyPartSegmentation(Enum):
     ONLY_FACE = 4
 
 
+def pad_point_prompts(
+    count: int,
+    points: Optional[List[Optional[np.ndarray]]] = None,
+    point_modes: Optional[List[Optional[np.ndarray]]] = None
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Stacks the point prompts of count boxes into coordinates (count, n, 2)
+    and labels (count, n). Boxes with fewer points are padded with label -1,
+    which SAM embeds as not a point. Returns None if no box has points.
+    """
+    prompts = []
+    for id in range(count):
+        box_points = points[id] if points is not None else None
+        if box_points is None or not box_points.any():
+            prompts.append((np.zeros((0, 2)), np.zeros(0)))
+            continue
+        box_modes = point_modes[id] if point_modes is not None else None
+        if box_modes is None:
+            box_modes = np.ones(box_points.shape[0])
+        prompts.append((box_points, box_modes))
+    point_count = max(len(labels) for _, labels in prompts)
+    if point_count == 0:
+        return None, None
+    coords = np.zeros((count, point_count, 2))
+    point_labels = np.full((count, point_count), -1.0)
+    for id, (box_points, labels) in enumerate(prompts):
+        coords[id, :len(labels)] = box_points
+        point_labels[id, :len(labels)] = labels
+    return coords, point_labels
+
+
+def predict_masks_batch(
+    predictor: Any,
+    boxes: np.ndarray,
+    points: Optional[List[Optional[np.ndarray]]] = None,
+    point_modes: Optional[List[Optional[np.ndarray]]] = None,
+    batch_size: int = 4
+) -> np.ndarray:
+    """
+    Masks (n, 1, height, width) of n boxes (n, 4) decoded in batches by the
+    SamPredictor of segment_anything or MobileSAM, the image must be set.
+    """
+    # only the PyTorch backends need torch
+    import torch
+
+    masks = np.zeros((len(boxes), 1, *predictor.original_size), dtype=bool)
+    for start in range(0, len(boxes), batch_size):
+        end = start + batch_size
+        point_coords, point_labels = pad_point_prompts(
+            len(boxes[start:end]),
+            points[start:end] if points is not None else None,
+            point_modes[start:end] if point_modes is not None else None)
+        coords_torch = None
+        labels_torch = None
+        if point_coords is not None:
+            point_coords = predictor.transform.apply_coords(
+                point_coords, predictor.original_size)
+            coords_torch = torch.as_tensor(
+                point_coords, dtype=torch.float, device=predictor.device)
+            labels_torch = torch.as_tensor(
+                point_labels, dtype=torch.int, device=predictor.device)
+        box_torch = torch.as_tensor(
+            predictor.transform.apply_boxes(
+                boxes[start:end], predictor.original_size),
+            dtype=torch.float, device=predictor.device)
+        # prompts of the chunk go through the decoder as a single batch
+        chunk_masks, _, _ = predictor.predict_torch(
+            coords_torch,
+            labels_torch,
+            box_torch,
+            multimask_output=False,
+        )
+        masks[start:end] = chunk_masks.cpu().numpy()
+    return masks
+
+
 class Predictor:
     def set_image(self, image: np.ndarray) -> None:
         pass
 
 
 class Segmentation:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cache_settings: Optional[EmbeddingCacheSettings] = None
+    ) -> None:
         self.predictor: Any = None
-        self.image_embedding: Any = None
+        self.image_set = False
+        self._image_embedding: Any = None
+        self.cache = EmbeddingCache(cache_settings)
+        # boxes decoded together, the decoder repeats the image embedding
+        # for every box so large batches only add memory traffic
+        self.batch_size = 4
 
     def get_image_embedding(self) -> Any:
+        """
+        Copies the embedding of the current image from the model device.
+        """
         return None
 
+    @property
+    def image_embedding(self) -> Any:
+        """
+        Embedding of the current image, only copied on first access since
+        decoding masks does not need it.
+        """
+        if self._image_embedding is None and self.image_set:
+            self._image_embedding = self.get_image_embedding()
+        return self._image_embedding
+
     def set_image(self, image: np.ndarray) -> None:
+        if self.cache.reuse(image):
+            return  # scene barely changed since the last encoded frame
         self.predictor.set_image(image)
-        self.image_embedding = self.get_image_embedding()
+        self.image_set = True
+        self._image_embedding = None
 
     def prepare_prompts(self, image: np.ndarray) -> None:
         pass
@@ -39,3 +141,21 @@ class Segmentation:
         point_modes: Optional[np.ndarray] = None
     ) -> np.ndarray:
         return np.array([])
+
+    def bbox_masks_batch(
+        self,
+        boxes: np.ndarray,
+        points: Optional[List[Optional[np.ndarray]]] = None,
+        point_modes: Optional[List[Optional[np.ndarray]]] = None
+    ) -> np.ndarray:
+        """
+        Masks (n, 1, height, width) of n boxes (n, 4) with optional point
+        prompts per box, decoded together where the backend supports it.
+        """
+        return np.array([
+            self.bbox_masks(
+                box,
+                points[id] if points is not None else None,
+                point_modes[id] if point_modes is not None else None)[0:1]
+            for id, box in enumerate(boxes)
+        ])
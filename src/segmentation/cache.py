@@ -0,0 +1,100 @@
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from util.image import gray_thumbnail, region_change
+
+
+@dataclass
+class EmbeddingCacheSettings:
+    # largest mean gray value change (0-255) of an image region up to which
+    # the last image embedding is reused, None encodes every frame
+    threshold: Optional[float] = None
+    max_age: int = 15  # frames an embedding is reused at most
+    size: int = 64  # width of the thumbnail the change is measured on
+    grid: int = 4  # regions per row and column
+
+
+def add_embedding_cache_parameters(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument('--segment-cache', type=float, default=None,
+                        help='Reuse the image embedding while no image region changed by more than this mean gray value.')
+    parser.add_argument('--segment-cache-age', type=int, default=15,
+                        help='Frames an image embedding is reused at most.')
+    return parser
+
+
+def parse_embedding_cache_settings(
+    args: Dict[str, Any]
+) -> EmbeddingCacheSettings:
+    return EmbeddingCacheSettings(
+        args.get('segment_cache', None),
+        args.get('segment_cache_age', 15))
+
+
+class EmbeddingCache:
+    """
+    Decides whether the image embedding of the last encoded frame can be
+    reused for a new frame.
+
+    Frames are compared to the last encoded frame on small grayscale
+    thumbnails, so slow changes add up until the image is encoded again.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[EmbeddingCacheSettings] = None
+    ) -> None:
+        if settings is None:
+            settings = EmbeddingCacheSettings()
+        self.settings = settings
+        self.reference: Optional[np.ndarray] = None
+        self.image_shape: Optional[tuple] = None
+        self.age = 0
+        self.hits = 0
+        self.encoder_calls = 0
+        self.start_time = time.perf_counter()
+
+    def reuse(self, image: np.ndarray) -> bool:
+        """
+        Returns if the last embedding can be used for the image, otherwise
+        the image is expected to be encoded and becomes the reference.
+        """
+        if self.settings.threshold is None:
+            self.encoder_calls += 1
+            return False
+        thumbnail = gray_thumbnail(image, self.settings.size)
+        if self.reference is not None \
+                and self.image_shape == image.shape \
+                and self.age < self.settings.max_age \
+                and region_change(thumbnail, self.reference,
+                                  self.settings.grid) \
+                <= self.settings.threshold:
+            self.age += 1
+            self.hits += 1
+            return True
+        self.reference = thumbnail
+        self.image_shape = image.shape
+        self.age = 0
+        self.encoder_calls += 1
+        return False
+
+    def invalidate(self) -> None:
+        """
+        The next image is encoded, e.g. after it was cropped differently.
+        """
+        self.reference = None
+
+    def hit_rate(self) -> float:
+        frames = self.hits + self.encoder_calls
+        return self.hits / frames if frames else 0.0
+
+    def encoder_calls_per_second(self) -> float:
+        return self.encoder_calls / (time.perf_counter() - self.start_time)
+
+    def clear_counters(self) -> None:
+        self.hits = 0
+        self.encoder_calls = 0
+        self.start_time = time.perf_counter()
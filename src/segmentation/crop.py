@@ -0,0 +1,106 @@
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+Region = Tuple[int, int, int, int]  # x1, y1, x2, y2
+
+
+@dataclass
+class CropSettings:
+    enabled: bool = False
+    # added to every side of the union of the boxes, relative to its size
+    margin: float = 0.1
+    min_size: int = 256  # smallest side of the region in pixels
+    # the region is fitted again once a region fitted to the boxes has less
+    # than this fraction of its area
+    min_coverage: float = 0.5
+
+
+def add_crop_parameters(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument('--segment-crop', default=False, action='store_true',
+                        help='Only encode the region of the full resolution frame around the tracked people.')
+    parser.add_argument('--segment-crop-margin', type=float, default=0.1,
+                        help='Margin added to every side of the union of the tracked boxes, relative to its size.')
+    return parser
+
+
+def parse_crop_settings(args: Dict[str, Any]) -> CropSettings:
+    return CropSettings(
+        args.get('segment_crop', False),
+        args.get('segment_crop_margin', 0.1))
+
+
+def box_union(boxes: np.ndarray) -> np.ndarray:
+    return np.array([*boxes[:, :2].min(0), *boxes[:, 2:4].max(0)])
+
+
+def contains(region: Region, box: np.ndarray) -> bool:
+    return bool(region[0] <= box[0] and region[1] <= box[1]
+                and box[2] <= region[2] and box[3] <= region[3])
+
+
+def region_area(region: Region) -> int:
+    return (region[2] - region[0]) * (region[3] - region[1])
+
+
+def fit_region(
+    box: np.ndarray,
+    image_shape: Tuple[int, ...],
+    margin: float = 0.1,
+    min_size: int = 256
+) -> Region:
+    """
+    Region around the box with a margin, widened towards a square within
+    the image since SAM encodes a square input either way.
+    """
+    height, width = image_shape[:2]
+    size = box[2:4] - box[:2]
+    size = np.ceil(np.maximum(size * (1 + 2 * margin), min_size))
+    # the shorter side costs nothing up to the longer one
+    size = np.minimum(np.full(2, size.max()), [width, height])
+    center = (box[:2] + box[2:4]) / 2
+    start = np.clip(np.round(center - size / 2), 0, [width, height] - size)
+    x1, y1 = start.astype(int)
+    x2, y2 = (start + size).astype(int)
+    return int(x1), int(y1), int(x2), int(y2)
+
+
+class SegmentationCrop:
+    """
+    Region of the frame encoded for the segmentation, fitted around the
+    padded boxes of all tracked people.
+
+    The region is kept while it contains all boxes and is not much larger
+    than a region fitted to them, so the embedding of a static scene stays
+    reusable.
+    """
+
+    def __init__(self, settings: Optional[CropSettings] = None) -> None:
+        if settings is None:
+            settings = CropSettings()
+        self.settings = settings
+        self.region: Optional[Region] = None
+
+    def update(
+        self,
+        boxes: np.ndarray,
+        image_shape: Tuple[int, ...]
+    ) -> Tuple[Optional[Region], bool]:
+        """
+        Returns the region for the boxes (n, 4), None without boxes, and
+        whether it changed since the last frame.
+        """
+        previous = self.region
+        if len(boxes) == 0:
+            self.region = None
+            return None, previous is not None
+        union = box_union(boxes)
+        fitted = fit_region(union, image_shape, self.settings.margin,
+                            self.settings.min_size)
+        if self.region is None or not contains(self.region, union) \
+                or region_area(fitted) < \
+                self.settings.min_coverage * region_area(self.region):
+            self.region = fitted
+        return self.region, self.region != previous
@@ -0,0 +1,123 @@
+import os
+import tempfile
+from typing import Tuple
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from onnxruntime.quantization.shape_inference import quant_pre_process
+from segment_anything.utils.onnx import SamOnnxModel
+from torch.nn import functional as F
+
+
+class SingleMaskOnnxModel(SamOnnxModel):
+    """
+    Decoder returning the single mask output for every prompt, as predicted
+    with multimask_output=False, instead of choosing a mask by its score.
+    """
+
+    def select_masks(
+        self,
+        masks: torch.Tensor,
+        iou_preds: torch.Tensor,
+        num_points: int
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        return masks[:, :1], iou_preds[:, :1]
+
+    def mask_postprocessing(
+        self,
+        masks: torch.Tensor,
+        orig_im_size: torch.Tensor
+    ) -> torch.Tensor:
+        # int() of the size would be traced as constant, slicing with the
+        # tensors keeps the padding crop dependent on the image size
+        masks = F.interpolate(
+            masks,
+            size=(self.img_size, self.img_size),
+            mode='bilinear',
+            align_corners=False)
+        prepadded_size = self.resize_longest_image_size(
+            orig_im_size, self.img_size)
+        masks = masks[..., :prepadded_size[0], :prepadded_size[1]]
+        orig_im_size = orig_im_size.to(torch.int64)
+        return F.interpolate(
+            masks,
+            size=(orig_im_size[0], orig_im_size[1]),
+            mode='bilinear',
+            align_corners=False)
+
+
+def export_encoder(
+    model: torch.nn.Module,
+    output_path: str,
+    opset: int = 17
+) -> None:
+    """
+    Exports the image encoder of a SAM model, the input is the normalized
+    and padded image (1, 3, size, size).
+    """
+    size = model.image_encoder.img_size
+    with torch.no_grad():
+        torch.onnx.export(
+            model.image_encoder,
+            torch.zeros(1, 3, size, size),
+            output_path,
+            input_names=['image'],
+            output_names=['image_embeddings'],
+            opset_version=opset,
+            do_constant_folding=True)
+
+
+def export_decoder(
+    model: torch.nn.Module,
+    output_path: str,
+    opset: int = 17
+) -> None:
+    """
+    Exports prompt encoder, mask decoder and mask upscaling of a SAM model,
+    prompts of several boxes are decoded as batch.
+    """
+    embed_dim = model.prompt_encoder.embed_dim
+    embed_size = model.prompt_encoder.image_embedding_size
+    mask_size = [4 * size for size in embed_size]
+    inputs = {
+        'image_embeddings': torch.randn(1, embed_dim, *embed_size),
+        'point_coords': torch.randint(0, 1024, (2, 5, 2), dtype=torch.float),
+        'point_labels': torch.randint(0, 4, (2, 5), dtype=torch.float),
+        'mask_input': torch.randn(2, 1, *mask_size),
+        'has_mask_input': torch.tensor([1], dtype=torch.float),
+        'orig_im_size': torch.tensor([1080, 1920], dtype=torch.float),
+    }
+    torch.onnx.export(
+        SingleMaskOnnxModel(model, return_single_mask=True),
+        tuple(inputs.values()),
+        output_path,
+        input_names=list(inputs),
+        output_names=['masks', 'iou_predictions', 'low_res_masks'],
+        dynamic_axes={
+            'point_coords': {0: 'boxes', 1: 'points'},
+            'point_labels': {0: 'boxes', 1: 'points'},
+            'mask_input': {0: 'boxes'},
+            'masks': {0: 'boxes', 2: 'height', 3: 'width'},
+            'iou_predictions': {0: 'boxes'},
+            'low_res_masks': {0: 'boxes'},
+        },
+        opset_version=opset,
+        do_constant_folding=True)
+
+
+def quantize_encoder(model_path: str, output_path: str) -> None:
+    """
+    Quantizes the weights of the matrix multiplications of an exported
+    image encoder to INT8, activations are quantized at runtime.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        prepared_path = os.path.join(directory, 'prepared.onnx')
+        # the input shape is fixed, symbolic shape inference fails on the
+        # windowed attention of the SAM encoders
+        quant_pre_process(
+            model_path, prepared_path, skip_symbolic_shape=True)
+        quantize_dynamic(
+            prepared_path,
+            output_path,
+            op_types_to_quantize=['MatMul'],
+            weight_type=QuantType.QInt8)
@@ -1,16 +1,20 @@
 
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 import numpy as np
 import torch
 from mobile_sam import SamPredictor, sam_model_registry
 
-from segmentation.base import Segmentation
+from segmentation.base import Segmentation, predict_masks_batch
+from segmentation.cache import EmbeddingCacheSettings
 
 
 class MobileSam(Segmentation):
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(
+        self,
+        cache_settings: Optional[EmbeddingCacheSettings] = None
+    ) -> None:
+        super().__init__(cache_settings)
         checkpoint = './models/mobile_sam.pt'
         model_type = 'vit_t'
         device = 'cuda' if torch.cuda.is_available() else 'cpu'
@@ -21,10 +25,6 @@ class MobileSam(Segmentation):
     def get_image_embedding(self) -> Any:
         return self.predictor.get_image_embedding().cpu().numpy()
 
-    def set_image(self, image: np.ndarray) -> None:
-        self.predictor.set_image(image)
-        self.image_embedding = self.get_image_embedding()
-
     def bbox_masks(
         self,
         bb: np.ndarray,
@@ -48,3 +48,12 @@ class MobileSam(Segmentation):
         )
         masks = masks > self.predictor.model.mask_threshold
         return masks
+
+    def bbox_masks_batch(
+        self,
+        boxes: np.ndarray,
+        points: Optional[List[Optional[np.ndarray]]] = None,
+        point_modes: Optional[List[Optional[np.ndarray]]] = None
+    ) -> np.ndarray:
+        return predict_masks_batch(
+            self.predictor, boxes, points, point_modes, self.batch_size)
@@ -0,0 +1,182 @@
+import os
+from argparse import ArgumentParser
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import onnxruntime
+
+from segmentation.base import Predictor, Segmentation, pad_point_prompts
+from segmentation.cache import EmbeddingCacheSettings
+from util.session import (OnnxSession, SessionSettings, add_session_parameters,
+                          create_session_options, parse_session_settings)
+
+# models exported by src/export_segmentation.py
+ONNX_MODELS = ['mobile_sam', 'sam']
+
+# normalization of the SAM image encoders
+PIXEL_MEAN = np.array([123.675, 116.28, 103.53], dtype=np.float32)
+PIXEL_STD = np.array([58.395, 57.12, 57.375], dtype=np.float32)
+
+
+@dataclass
+class OnnxSamSettings:
+    model: str = 'mobile_sam'
+    quantized: bool = False  # INT8 image encoder
+    model_dir: str = 'models'
+    # the optimized model cache and io binding only apply to the encoder
+    session: SessionSettings = field(default_factory=SessionSettings)
+
+
+def encoder_path(settings: OnnxSamSettings) -> str:
+    suffix = '_int8' if settings.quantized else ''
+    return os.path.join(
+        settings.model_dir, f'{settings.model}_encoder{suffix}.onnx')
+
+
+def decoder_path(settings: OnnxSamSettings) -> str:
+    return os.path.join(settings.model_dir, f'{settings.model}_decoder.onnx')
+
+
+def add_onnx_sam_parameters(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument('--segment-onnx', type=str, default=None,
+                        choices=ONNX_MODELS,
+                        help='Segment with the exported ONNX models of this SAM variant on the CPU.')
+    parser.add_argument('--segment-int8', default=False, action='store_true',
+                        help='Use the INT8 quantized image encoder of the ONNX models.')
+    return add_session_parameters(parser, 'segment')
+
+
+def parse_onnx_sam_settings(
+    args: Dict[str, Any]
+) -> Optional[OnnxSamSettings]:
+    model = args.get('segment_onnx', None)
+    if model is None:
+        return None
+    return OnnxSamSettings(
+        model,
+        args.get('segment_int8', False),
+        session=parse_session_settings(args, 'segment'))
+
+
+class OnnxSamPredictor(Predictor):
+    """
+    Encodes images with an exported SAM image encoder. Like SamPredictor the
+    image is resized to the longest side of the encoder input, normalized
+    and padded at the bottom and right.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        settings: Optional[SessionSettings] = None
+    ) -> None:
+        self.session = OnnxSession(model_path, settings)
+        self.image_size: int = self.session.session.get_inputs()[0].shape[-1]
+        self.input = np.zeros(
+            (1, 3, self.image_size, self.image_size), dtype=np.float32)
+        self.features: Optional[np.ndarray] = None
+        self.original_size: Tuple[int, int] = (0, 0)
+        self.input_size: Tuple[int, int] = (0, 0)
+
+    def set_image(self, image: np.ndarray) -> None:
+        height, width = image.shape[:2]
+        scale = self.image_size / max(height, width)
+        input_height = int(height * scale + 0.5)
+        input_width = int(width * scale + 0.5)
+        resized = cv2.resize(
+            image,
+            (input_width, input_height),
+            interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+        if self.input_size != (input_height, input_width):
+            self.input.fill(0)  # padding
+        self.input[0, :, :input_height, :input_width] = \
+            ((resized - PIXEL_MEAN) / PIXEL_STD).transpose(2, 0, 1)
+        self.features = self.session.run(self.input)
+        self.original_size = (height, width)
+        self.input_size = (input_height, input_width)
+
+    def transform_coords(self, coords: np.ndarray) -> np.ndarray:
+        """
+        Scales coordinates (..., 2) of the original image to the encoder
+        input.
+        """
+        scale = np.array([self.input_size[1] / self.original_size[1],
+                          self.input_size[0] / self.original_size[0]])
+        return (coords * scale).astype(np.float32)
+
+
+class OnnxSam(Segmentation):
+    """
+    SAM with exported image encoder and prompt encoder plus mask decoder
+    running on ONNX Runtime, e.g. for machines without GPU.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[OnnxSamSettings] = None,
+        cache_settings: Optional[EmbeddingCacheSettings] = None
+    ) -> None:
+        super().__init__(cache_settings)
+        if settings is None:
+            settings = OnnxSamSettings()
+        # the planned memory of the ViT-B encoder exceeds 6 GB
+        self.predictor: OnnxSamPredictor = OnnxSamPredictor(
+            encoder_path(settings),
+            replace(settings.session, memory_pattern=False))
+        self.decoder = onnxruntime.InferenceSession(
+            decoder_path(settings),
+            create_session_options(replace(
+                settings.session, optimized_model=None)),
+            providers=['CPUExecutionProvider'])
+        self.has_mask_input = np.zeros(1, dtype=np.float32)
+
+    def get_image_embedding(self) -> Any:
+        # features are overwritten by the next image with io binding
+        assert self.predictor.features is not None
+        return self.predictor.features.copy()
+
+    def bbox_masks(
+        self,
+        bb: np.ndarray,
+        points: Optional[np.ndarray] = None,
+        point_modes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        return self.bbox_masks_batch(bb[None, :4], [points], [point_modes])[0]
+
+    def bbox_masks_batch(
+        self,
+        boxes: np.ndarray,
+        points: Optional[List[Optional[np.ndarray]]] = None,
+        point_modes: Optional[List[Optional[np.ndarray]]] = None
+    ) -> np.ndarray:
+        predictor = self.predictor
+        assert predictor.features is not None
+        masks = np.zeros((len(boxes), 1, *predictor.original_size), dtype=bool)
+        original_size = np.array(predictor.original_size, dtype=np.float32)
+        mask_size = 4 * predictor.features.shape[-1]
+        for start in range(0, len(boxes), self.batch_size):
+            end = start + self.batch_size
+            # boxes are prompted as top left and bottom right corner points
+            # with labels 2 and 3 after the points of the box
+            coords = boxes[start:end].reshape(-1, 2, 2)
+            labels = np.tile([2.0, 3.0], (len(coords), 1))
+            point_coords, point_labels = pad_point_prompts(
+                len(coords),
+                points[start:end] if points is not None else None,
+                point_modes[start:end] if point_modes is not None else None)
+            if point_coords is not None:
+                coords = np.concatenate([point_coords, coords], 1)
+                labels = np.concatenate([point_labels, labels], 1)
+            chunk_masks, = self.decoder.run(['masks'], {
+                'image_embeddings': predictor.features,
+                'point_coords': predictor.transform_coords(coords),
+                'point_labels': labels.astype(np.float32),
+                'mask_input': np.zeros(
+                    (len(coords), 1, mask_size, mask_size), dtype=np.float32),
+                'has_mask_input': self.has_mask_input,
+                'orig_im_size': original_size,
+            })
+            masks[start:end] = chunk_masks > 0.0  # mask threshold of SAM
+        return masks
@@ -2,23 +2,29 @@ from __future__ import annotations
 
 import queue
 import time
+from functools import partial
 from multiprocessing import Process, Queue
 from multiprocessing.sharedctypes import Synchronized
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
-from frame.producer import FrameData
+from frame.producer import (FrameData, discarded_sequences, get_slot,
+                            release_frame)
 from frame.shared import FramePool
 from ocsort.timer import Timer
 from pipeline.data import (BaseData, CloseData, DataCollection,
                            pipeline_data_generator)
+from pipeline.metadata import MaskStore, get_store
 from pose.producer import PoseData
-from segmentation.base import BodyPartSegmentation
+from segmentation.base import BodyPartSegmentation, Segmentation
+from segmentation.cache import EmbeddingCacheSettings
+from segmentation.crop import CropSettings, SegmentationCrop
 from segmentation.mobile_sam import MobileSam
+from segmentation.onnx_sam import OnnxSam, OnnxSamSettings
 from segmentation.sam import Sam
 from tracking.producer import TrackingData
-from util.image import clip_section_xyxy, scale_image
+from util.image import clip_section_xyxy
 
 
 class SegmentationData(BaseData):
@@ -26,10 +32,57 @@ class SegmentationData(BaseData):
         self,
         masks: List[List[np.ndarray]],
         mask_scale: Optional[float] = None,
+        frame_pool: Optional[FramePool] = None,
+        slot: Optional[int] = None
     ) -> None:
         super().__init__()
-        self.masks = masks
+        self._masks: Optional[List[List[np.ndarray]]] = masks
         self.mask_scale = mask_scale
+        self.mask_layout: Optional[
+            List[List[Tuple[int, Tuple[int, ...]]]]] = None
+        self.store: Optional[MaskStore] = None
+        if frame_pool and slot is not None:
+            self.store = frame_pool.mask_store
+        self.slot = slot
+
+    @property
+    def masks(self) -> List[List[np.ndarray]]:
+        # masks in shared memory are unpacked on first access
+        if self._masks is None:
+            assert self.store is not None and self.mask_layout is not None
+            self._masks = [
+                [self.store.read(self.slot, offset, shape)
+                 for offset, shape in entries]
+                for entries in self.mask_layout
+            ]
+        return self._masks
+
+    def get_shared_bytes(self) -> int:
+        if self.mask_layout is None:
+            return 0
+        return sum((int(np.prod(shape)) + 7) // 8
+                   for entries in self.mask_layout for _, shape in entries)
+
+    def __getstate__(self) -> Dict:
+        d = dict(self.__dict__)
+        if self.store is not None and self.mask_layout is None:
+            assert self._masks is not None
+            self.mask_layout = self.store.write(self.slot, self._masks)
+        if self.store is None or self.mask_layout is None:
+            # masks do not fit into the frame slot area
+            d['store'] = None
+            d['mask_layout'] = None
+            d['_masks'] = self.masks
+            return d
+        d['mask_layout'] = self.mask_layout
+        d['_masks'] = None
+        d['store'] = self.store.name
+        return d
+
+    def __setstate__(self, d: Dict) -> None:
+        if d['store'] is not None:
+            d['store'] = get_store(d['store'])
+        self.__dict__.update(d)
 
     def get_box(self, id: int) -> np.ndarray:
         return self.targets[id][:4]
@@ -44,33 +97,71 @@ def produce_segmentation(
     down_scale: Optional[float] = None,
     fast: bool = True,
     frame_pool: Optional[FramePool] = None,
-    specific_bodypart: Optional[Synchronized] = None
+    specific_bodypart: Optional[Synchronized] = None,
+    lossless: bool = False,
+    cache_settings: Optional[EmbeddingCacheSettings] = None,
+    onnx_settings: Optional[OnnxSamSettings] = None,
+    crop_settings: Optional[CropSettings] = None
 ) -> None:
     reduce_frame_discard_timer = 0.0
     timer = Timer()
-    segment = MobileSam() if fast else Sam()
+    segment: Segmentation
+    if onnx_settings is not None:
+        segment = OnnxSam(onnx_settings, cache_settings)
+    elif fast:
+        segment = MobileSam(cache_settings)
+    else:
+        segment = Sam(cache_settings)
+    crop = None
+    if crop_settings is not None and crop_settings.enabled:
+        crop = SegmentationCrop(crop_settings)
     frame = 0
     for data in pipeline_data_generator(
         input_queue,
         output_queue,
-        [TrackingData]
+        [TrackingData],
+        partial(release_frame, frame_pool=frame_pool)
     ):
         timer.tic()
-        scaled_image = data.get(FrameData).get_frame(frame_pool)
-        if down_scale is not None:
-            scaled_image = scale_image(scaled_image, 1.0 / down_scale)
-        segment.set_image(scaled_image)
-        segment.prepare_prompts(scaled_image)
-        all_masks = []
         tracking_data = data.get(TrackingData)
+        offset = np.zeros(4)
+        if crop is None:
+            scaled_image = data.get(FrameData).get_frame(
+                frame_pool, 1.0 / down_scale if down_scale else None)
+        else:
+            # region of the full resolution frame around the people, the
+            # masks are cut out at full resolution
+            image = data.get(FrameData).get_frame(frame_pool)
+            region, changed = crop.update(np.array([
+                tracking_data.get_padded_box(id)
+                for id in range(len(tracking_data.targets))
+            ]).reshape(-1, 4), image.shape)
+            if changed:
+                segment.cache.invalidate()
+            x1, y1, x2, y2 = region or (0, 0, image.shape[1], image.shape[0])
+            scaled_image = image[y1:y2, x1:x2]
+            offset = np.array([x1, y1, x1, y1])
+        if len(tracking_data.targets) > 0:
+            # frames without people skip the encoder
+            segment.set_image(scaled_image)
+            segment.prepare_prompts(scaled_image)
+        all_masks = []
+        input_boxes = []
+        pad_boxes = []
+        all_landmarks: List[Optional[np.ndarray]] = []
+        point_modes: List[Optional[np.ndarray]] = []
         for id in range(len(tracking_data.targets)):
             input_box = tracking_data.get_box(id)
             pad_box = tracking_data.get_padded_box(id)
-            if down_scale:
+            if crop is not None:
+                input_box -= offset
+                pad_box -= offset
+            elif down_scale:
                 input_box /= down_scale
                 pad_box /= down_scale
 
             landmarks = None
+            point_mode = None
 
             if data.has(PoseData):
                 bodypart = None
@@ -79,7 +170,9 @@ def produce_segmentation(
                 landmarks, point_mode = data.get(
                     PoseData).get_landmarks_xy(id, bodypart)
                 if landmarks is not None:
-                    if down_scale:
+                    if crop is not None:
+                        landmarks = landmarks.reshape(-1, 2) - offset[:2]
+                    elif down_scale:
                         landmarks /= down_scale
 
                 if landmarks is not None and specific_bodypart is not None \
@@ -114,11 +207,19 @@ def produce_segmentation(
                             scaled_image
                         )]
 
-            new_mask = segment.bbox_masks(input_box, landmarks, point_mode)
+            input_boxes.append(input_box[:4])
+            pad_boxes.append(pad_box)
+            all_landmarks.append(landmarks)
+            point_modes.append(point_mode)
 
+        if input_boxes:
+            masks = segment.bbox_masks_batch(
+                np.array(input_boxes), all_landmarks, point_modes)
+        for id, pad_box in enumerate(pad_boxes):
             # mask potentially overlap the bounding box, therefore use
             # padded bounding box for cutting out the mask
-            new_mask = new_mask[
+            new_mask = masks[
+                id,
                 0,
                 int(pad_box[1]):int(pad_box[3]),
                 int(pad_box[0]):int(pad_box[2])
@@ -127,26 +228,29 @@ def produce_segmentation(
                 print('New mask is empty', tracking_data.get_box(
                     id), tracking_data.get_padded_box(id))
             all_masks.append([new_mask])
-        if not output_queue.empty():
+        if not lossless and not output_queue.empty():
             try:
-                discarded_frame = output_queue.get_nowait()
-                if frame_pool and discarded_frame.has(FrameData):
-                    frame_pool.free_frame(
-                        discarded_frame.get(FrameData).frame)
+                discarded = output_queue.get_nowait()
+                data.get(FrameData).skipped += discarded_sequences(discarded)
+                release_frame(discarded, frame_pool)
                 reduce_frame_discard_timer += 0.015
             except queue.Empty:
                 reduce_frame_discard_timer -= 0.001
                 if reduce_frame_discard_timer < 0:
                     reduce_frame_discard_timer = 0
         output_queue.put(data.add(SegmentationData(
-            all_masks, down_scale)))
+            all_masks, None if crop else down_scale, frame_pool,
+            get_slot(data))))
         timer.toc()
         frame += 1
         if frame == 100:
             timer.clear()
+            segment.cache.clear_counters()
         if frame % 100 == 0 and frame > 100:
             print('Segmentation-FPS:', 1. / timer.average_time, 1. /
-                  (timer.average_time + reduce_frame_discard_timer))
+                  (timer.average_time + reduce_frame_discard_timer),
+                  'Embedding-Hit-Rate:', segment.cache.hit_rate(),
+                  'Encoder-Calls/s:', segment.cache.encoder_calls_per_second())
         if reduce_frame_discard_timer > 0.015:
             time.sleep(reduce_frame_discard_timer)
 
@@ -159,7 +263,11 @@ class SegmentProducer:
         down_scale: Optional[float] = None,
         fast: bool = True,
         frame_pool: Optional[FramePool] = None,
-        specific_bodypart: Optional[Synchronized[int]] = None
+        specific_bodypart: Optional[Synchronized[int]] = None,
+        lossless: bool = False,
+        cache_settings: Optional[EmbeddingCacheSettings] = None,
+        onnx_settings: Optional[OnnxSamSettings] = None,
+        crop_settings: Optional[CropSettings] = None
     ) -> None:
         self.process: Optional[Process] = None
         self.input_queue = input_queue
@@ -168,6 +276,10 @@ class SegmentProducer:
         self.fast = fast
         self.frame_pool = frame_pool
         self.specific_bodypart = specific_bodypart
+        self.lossless = lossless
+        self.cache_settings = cache_settings
+        self.onnx_settings = onnx_settings
+        self.crop_settings = crop_settings
 
     def start(self) -> None:
         self.process = Process(target=produce_segmentation, args=(
@@ -176,12 +288,19 @@ class SegmentProducer:
             self.down_scale,
             self.fast,
             self.frame_pool,
-            self.specific_bodypart
+            self.specific_bodypart,
+            self.lossless,
+            self.cache_settings,
+            self.onnx_settings,
+            self.crop_settings
         ))
         self.process.start()
 
     def stop(self) -> None:
-        self.input_queue.put(DataCollection().add(CloseData()))
+        try:
+            self.input_queue.put_nowait(DataCollection().add(CloseData()))
+        except queue.Full:
+            pass  # bounded queue is full, process gets killed anyway
         if self.process:
             time.sleep(1)
             self.process.kill()
@@ -1,17 +1,22 @@
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 import numpy as np
+import torch
 from segment_anything import SamPredictor, sam_model_registry
 
-from segmentation.base import Segmentation
+from segmentation.base import Segmentation, predict_masks_batch
+from segmentation.cache import EmbeddingCacheSettings
 
 
 class Sam(Segmentation):
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(
+        self,
+        cache_settings: Optional[EmbeddingCacheSettings] = None
+    ) -> None:
+        super().__init__(cache_settings)
         checkpoint = 'models/sam_vit_b_01ec64.pth'
         model_type = 'vit_b'
-        device = 'cuda'
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
         sam = sam_model_registry[model_type](checkpoint=checkpoint)
         sam.to(device=device)  # type: ignore
         self.predictor: SamPredictor = SamPredictor(sam)
@@ -19,10 +24,6 @@ class Sam(Segmentation):
     def get_image_embedding(self) -> Any:
         return self.predictor.get_image_embedding().cpu().numpy()
 
-    def set_image(self, image: np.ndarray) -> None:
-        self.predictor.set_image(image)
-        self.image_embedding = self.get_image_embedding()
-
     def bbox_masks(
         self,
         bb: np.ndarray,
@@ -46,3 +47,12 @@ class Sam(Segmentation):
         )
         masks = masks > self.predictor.model.mask_threshold
         return masks
+
+    def bbox_masks_batch(
+        self,
+        boxes: np.ndarray,
+        points: Optional[List[Optional[np.ndarray]]] = None,
+        point_modes: Optional[List[Optional[np.ndarray]]] = None
+    ) -> np.ndarray:
+        return predict_masks_batch(
+            self.predictor, boxes, points, point_modes, self.batch_size)
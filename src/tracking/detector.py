@@ -0,0 +1,141 @@
+import os
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from tracking.postprocess import YoloxPostprocessor
+from tracking.preprocess import LetterboxPreprocessor
+from util.session import OnnxSession, SessionSettings
+
+
+@dataclass
+class DetectorSettings:
+    model: str = 'yolox-tiny'
+    # square input size, only for models exported with a dynamic input shape
+    input_size: Optional[int] = None
+    quantized: bool = False
+    score_thr: float = 0.1
+    nms_thr: float = 0.7
+    model_dir: str = 'models'
+
+
+class Detector:
+    """
+    Person detector returning detections [x1, y1, x2, y2, score] in image
+    coordinates.
+    """
+
+    input_shape: Tuple[int, int]
+
+    def detect(self, image: np.ndarray, image_scale: float = 1.0) -> np.ndarray:
+        """
+        Detects persons in the image, which is scaled by image_scale compared
+        to the frame the detections are returned for.
+        """
+        return np.empty((0, 5))
+
+
+@dataclass
+class DetectorModel:
+    create: Callable[[str, 'DetectorModel', DetectorSettings,
+                      Optional[SessionSettings]], Detector]
+    file_name: str  # without extension, quantized models end with _int8
+    input_size: int
+
+
+def model_path(model: DetectorModel, settings: DetectorSettings) -> str:
+    file_name = model.file_name + ('_int8' if settings.quantized else '')
+    return os.path.join(settings.model_dir, file_name + '.onnx')
+
+
+def model_input_shape(
+    session: OnnxSession,
+    model: DetectorModel,
+    settings: DetectorSettings
+) -> Tuple[int, int]:
+    shape: Any = session.session.get_inputs()[0].shape[2:]
+    if all(isinstance(size, int) for size in shape):
+        assert settings.input_size is None \
+            or (settings.input_size, settings.input_size) == tuple(shape), \
+            f'Model input shape is fixed to {shape}'
+        return shape[0], shape[1]
+    size = settings.input_size or model.input_size
+    return size, size
+
+
+class YoloxDetector(Detector):
+    def __init__(
+        self,
+        path: str,
+        model: DetectorModel,
+        settings: DetectorSettings,
+        session_settings: Optional[SessionSettings] = None
+    ) -> None:
+        self.session = OnnxSession(path, session_settings)
+        self.input_shape = model_input_shape(self.session, model, settings)
+        self.score_thr = settings.score_thr
+        self.nms_thr = settings.nms_thr
+        self.preprocess = LetterboxPreprocessor(self.input_shape)
+        # persons are class 0 of the COCO classes
+        self.postprocess = YoloxPostprocessor(class_id=0)
+
+    def detect(self, image: np.ndarray, image_scale: float = 1.0) -> np.ndarray:
+        img, ratio = self.preprocess(image)
+        output = self.session.run(img)
+        return self.postprocess(
+            output[0],
+            self.input_shape,
+            ratio * image_scale,
+            score_thr=self.score_thr,
+            nms_thr=self.nms_thr
+        )
+
+
+DETECTORS: Dict[str, DetectorModel] = {
+    'yolox-nano': DetectorModel(YoloxDetector, 'yolox_nano', 416),
+    'yolox-tiny': DetectorModel(YoloxDetector, 'yolox_tiny', 416),
+    'yolox-s': DetectorModel(YoloxDetector, 'yolox_s', 640),
+}
+
+
+def register_detector(name: str, model: DetectorModel) -> None:
+    DETECTORS[name] = model
+
+
+def create_detector(
+    settings: Optional[DetectorSettings] = None,
+    session_settings: Optional[SessionSettings] = None
+) -> Detector:
+    if settings is None:
+        settings = DetectorSettings()
+    assert settings.model in DETECTORS, \
+        f'Unknown detector {settings.model}, use one of {list(DETECTORS)}'
+    model = DETECTORS[settings.model]
+    return model.create(
+        model_path(model, settings), model, settings, session_settings)
+
+
+def add_detector_parameters(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument('--track-model', type=str, default='yolox-tiny',
+                        choices=list(DETECTORS),
+                        help='Person detector model.')
+    parser.add_argument('--track-input-size', type=int, default=None,
+                        help='Detector input size for models with dynamic input shape.')
+    parser.add_argument('--track-int8', default=False, action='store_true',
+                        help='Use the INT8 quantized model (see quantize_detector.py).')
+    parser.add_argument('--track-score', type=float, default=0.1,
+                        help='Minimum score of person detections.')
+    parser.add_argument('--track-nms', type=float, default=0.7,
+                        help='IoU threshold of the non-maximum suppression.')
+    return parser
+
+
+def parse_detector_settings(args: Dict[str, Any]) -> DetectorSettings:
+    return DetectorSettings(
+        args.get('track_model', 'yolox-tiny'),
+        args.get('track_input_size', None),
+        args.get('track_int8', False),
+        args.get('track_score', 0.1),
+        args.get('track_nms', 0.7))
@@ -0,0 +1,158 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# constant velocity model of a box [x, y, s, r, vx, vy, vs]
+BOX_F = np.array([
+    [1, 0, 0, 0, 1, 0, 0],
+    [0, 1, 0, 0, 0, 1, 0],
+    [0, 0, 1, 0, 0, 0, 1],
+    [0, 0, 0, 1, 0, 0, 0],
+    [0, 0, 0, 0, 1, 0, 0],
+    [0, 0, 0, 0, 0, 1, 0],
+    [0, 0, 0, 0, 0, 0, 1]
+], dtype=float)
+BOX_H = np.eye(4, 7)
+
+
+def box_noise() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Initial covariance, process and measurement noise of a box track, as
+    set up by `KalmanBoxTracker`.
+    """
+    P = np.eye(7)
+    P[4:, 4:] *= 1000.
+    P *= 10.
+    Q = np.eye(7)
+    Q[-1, -1] *= 0.01
+    Q[4:, 4:] *= 0.01
+    R = np.eye(4)
+    R[2:, 2:] *= 10.
+    return P, Q, R
+
+
+def interpolate_boxes(
+    box1: np.ndarray,
+    box2: np.ndarray,
+    time_gap: int
+) -> List[np.ndarray]:
+    """
+    Virtual observations between two observed boxes assuming constant
+    speed, as used by the observation-centric re-update of OCSort.
+    """
+    x1, y1, s1, r1 = box1
+    w1 = np.sqrt(s1 * r1)
+    h1 = np.sqrt(s1 / r1)
+    x2, y2, s2, r2 = box2
+    w2 = np.sqrt(s2 * r2)
+    h2 = np.sqrt(s2 / r2)
+    dx = (x2 - x1) / time_gap
+    dy = (y2 - y1) / time_gap
+    dw = (w2 - w1) / time_gap
+    dh = (h2 - h1) / time_gap
+    boxes = []
+    for i in range(time_gap):
+        x = x1 + (i + 1) * dx
+        y = y1 + (i + 1) * dy
+        w = w1 + (i + 1) * dw
+        h = h1 + (i + 1) * dh
+        boxes.append(np.array([x, y, w * h, w / h]).reshape((4, 1)))
+    return boxes
+
+
+class BoxKalmanFilter:
+    """
+    Kalman filter of a single box track specialized to the constant
+    velocity model of `KalmanBoxTracker`.
+
+    F, H, Q, R and the initial covariance only couple a box coordinate with
+    its own velocity, so the covariance splits into independent blocks of
+    (x, vx), (y, vy), (s, vs) and r. Predict runs for all blocks at once on
+    preallocated buffers, update is written out per block without any
+    matrix inverse. Like `KalmanFilterNew` it freezes without observations
+    and re-updates with interpolated boxes once the track is observed again.
+    """
+
+    # predicted blocks [var, cov, vel var] are BLOCK_F @ blocks + noise
+    BLOCK_F = np.array([[1., 2., 1.], [0., 1., 1.], [0., 0., 1.]])
+
+    def __init__(self, z: np.ndarray) -> None:
+        P, Q, R = box_noise()
+        # box followed by its velocities, r has no velocity
+        self.state = np.zeros(8)
+        self.state[:4] = z[:, 0]
+        self.x = self.state[:7].reshape((7, 1))
+        self.blocks = np.zeros((3, 4))
+        self.blocks[0] = np.diag(P)[:4]
+        self.blocks[2, :3] = np.diag(P)[4:]
+        self.noise = np.zeros((3, 4))
+        self.noise[0] = np.diag(Q)[:4]
+        self.noise[2, :3] = np.diag(Q)[4:]
+        self.r = np.diag(R).tolist()
+        self.observed = False
+        self.steps = 0
+        self.last_step = 0
+        self.last_z = np.zeros((4, 1))
+        self.frozen: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._create_buffers()
+
+    def _create_buffers(self) -> None:
+        self._box, self._vel = self.state.reshape((2, 4))
+        self._predicted = np.zeros((3, 4))
+
+    @property
+    def P(self) -> np.ndarray:
+        P = np.diag(np.concatenate([self.blocks[0], self.blocks[2, :3]]))
+        P[[0, 1, 2], [4, 5, 6]] = self.blocks[1, :3]
+        P[[4, 5, 6], [0, 1, 2]] = self.blocks[1, :3]
+        return P
+
+    def predict(self) -> None:
+        self._box += self._vel
+        np.dot(self.BLOCK_F, self.blocks, out=self._predicted)
+        np.add(self._predicted, self.noise, out=self.blocks)
+
+    def _update(self, z: np.ndarray) -> None:
+        # four scalar updates are faster on floats than as array operations
+        state = self.state.tolist()
+        var, cov, vel_var = self.blocks.tolist()
+        for i, (value, r) in enumerate(zip(z.ravel().tolist(), self.r)):
+            s = var[i] + r
+            gain = var[i] / s
+            vel_gain = cov[i] / s
+            y = value - state[i]
+            state[i] += gain * y
+            state[i + 4] += vel_gain * y
+            vel_var[i] -= vel_gain * cov[i]
+            cov[i] -= gain * cov[i]
+            var[i] -= gain * var[i]
+        self.state[:] = state
+        self.blocks[:] = (var, cov, vel_var)
+
+    def _unfreeze(self, z: np.ndarray) -> None:
+        assert self.frozen is not None
+        self.state[:], self.blocks[:] = self.frozen
+        self.frozen = None
+        time_gap = self.steps - self.last_step
+        boxes = interpolate_boxes(self.last_z, z, time_gap)
+        for i, box in enumerate(boxes):
+            self._update(box)
+            if i != time_gap - 1:
+                self.predict()
+        self.last_z = boxes[-1]
+
+    def update(self, z: Optional[np.ndarray]) -> None:
+        self.steps += 1
+        if z is None:
+            if self.observed:
+                # keep the state for the re-update once observed again
+                self.frozen = (self.state.copy(), self.blocks.copy())
+            self.observed = False
+            return
+        if not self.observed and self.frozen is not None:
+            self._unfreeze(z)
+        else:
+            self.last_z = z
+        self.observed = True
+        self.last_step = self.steps
+        self._update(z)
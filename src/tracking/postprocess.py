@@ -0,0 +1,121 @@
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+
+def nms_boxes(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    nms_thr: float,
+    top_k: int = 0
+) -> np.ndarray:
+    """
+    Greedy non-maximum suppression of corner boxes, the same as
+    `ocsort.utils.nms` but run by OpenCV. Only the top_k best scored boxes
+    are considered if given. Returns the indices of the kept boxes.
+    """
+    # widths and heights count both corner pixels like ocsort.utils.nms
+    rects = np.empty_like(boxes)
+    rects[:, :2] = boxes[:, :2]
+    np.subtract(boxes[:, 2:], boxes[:, :2], out=rects[:, 2:])
+    rects[:, 2:] += 1
+    keep = cv2.dnn.NMSBoxes(rects, scores, 0.0, nms_thr, top_k=top_k)
+    return np.asarray(keep, dtype=int).reshape(-1)
+
+
+class YoloxPostprocessor:
+    """
+    Decodes the raw YOLOX output of a single class into boxes.
+
+    Grid offsets and strides of every anchor only depend on the input shape,
+    they are built once and kept for later frames. Scores are computed for
+    the requested class only and anchors below the score threshold are
+    dropped before their boxes are decoded into reused buffers. At most
+    top_k boxes go into the non-maximum suppression.
+    """
+
+    def __init__(
+        self,
+        class_id: int = 0,
+        p6: bool = False,
+        top_k: int = 1000
+    ) -> None:
+        self.class_id = class_id
+        self.top_k = top_k
+        self.strides = [8, 16, 32, 64] if p6 else [8, 16, 32]
+        self.grids: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        self.scores = np.zeros(0, dtype=np.float32)
+        self.mask = np.zeros(0, dtype=bool)
+        self.boxes = np.zeros((0, 4))
+
+    def grid(
+        self,
+        input_shape: Tuple[int, int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if input_shape not in self.grids:
+            grids = []
+            strides = []
+            for stride in self.strides:
+                hsize = input_shape[0] // stride
+                wsize = input_shape[1] // stride
+                xv, yv = np.meshgrid(np.arange(wsize), np.arange(hsize))
+                grids.append(np.stack((xv, yv), 2).reshape(-1, 2))
+                strides.append(np.full((hsize * wsize, 1), stride))
+            self.grids[input_shape] = (
+                np.concatenate(grids).astype(float),
+                np.concatenate(strides).astype(float))
+            anchor_count = len(self.grids[input_shape][0])
+            if len(self.scores) < anchor_count:
+                self.scores = np.zeros(anchor_count, dtype=np.float32)
+                self.mask = np.zeros(anchor_count, dtype=bool)
+                self.boxes = np.zeros((anchor_count, 4))
+        return self.grids[input_shape]
+
+    def decode(
+        self,
+        output: np.ndarray,
+        input_shape: Tuple[int, int],
+        ratio: float,
+        score_thr: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the corner boxes in image coordinates and the scores of all
+        anchors above the score threshold. Boxes are a view of a buffer that
+        is overwritten by the next call.
+        """
+        grid, stride = self.grid(input_shape)
+        anchor_count = len(grid)
+        scores = self.scores[:anchor_count]
+        mask = self.mask[:anchor_count]
+        np.multiply(output[:, 4], output[:, 5 + self.class_id], out=scores)
+        np.greater(scores, score_thr, out=mask)
+        indices = np.flatnonzero(mask)
+
+        candidates = output[indices]
+        candidate_stride = stride[indices]
+        centers = (candidates[:, :2] + grid[indices]) * candidate_stride
+        half_sizes = np.exp(candidates[:, 2:4]) * candidate_stride / 2.
+        boxes = self.boxes[:len(indices)]
+        np.subtract(centers, half_sizes, out=boxes[:, :2])
+        np.add(centers, half_sizes, out=boxes[:, 2:])
+        boxes /= ratio
+        return boxes, scores[indices].astype(float)
+
+    def __call__(
+        self,
+        output: np.ndarray,
+        input_shape: Tuple[int, int],
+        ratio: float,
+        score_thr: float,
+        nms_thr: float
+    ) -> np.ndarray:
+        """
+        Returns detections [x1, y1, x2, y2, score] of the class after
+        non-maximum suppression.
+        """
+        boxes, scores = self.decode(output, input_shape, ratio, score_thr)
+        if len(scores) == 0:
+            return np.empty((0, 5))
+        keep = nms_boxes(boxes, scores, nms_thr, self.top_k)
+        return np.concatenate([boxes[keep], scores[keep, None]], 1)
@@ -2,26 +2,61 @@ from __future__ import annotations
 
 import queue
 import time
+from functools import partial
 from multiprocessing import Process, Queue
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import numpy as np
 
-from frame.producer import FrameData
+from frame.producer import FrameData, get_slot, release_frame
 from frame.shared import FramePool
 from ocsort.timer import Timer
 from pipeline.data import (BaseData, CloseData, DataCollection,
                            pipeline_data_generator)
+from pipeline.metadata import MetadataStore, get_store
+from tracking.detector import DetectorSettings
+from tracking.schedule import DetectionSettings
 from tracking.tracking import Tracker
+from util.session import SessionSettings
 
 
 class TrackingData(BaseData):
     def __init__(
         self,
         targets: List[np.ndarray],
+        frame_pool: Optional[FramePool] = None,
+        slot: Optional[int] = None,
+        predicted: bool = False
     ) -> None:
         super().__init__()
         self.targets = targets
+        # boxes are predicted by the tracks, the detector skipped the frame
+        self.predicted = predicted
+        self.store: Optional[MetadataStore] = None
+        if frame_pool and slot is not None:
+            self.store = frame_pool.metadata
+        self.slot = slot
+        self.in_store = False
+
+    def __getstate__(self) -> Dict:
+        d = dict(self.__dict__)
+        if self.store is None or not self.store.fits(len(self.targets)):
+            d['store'] = None
+            return d
+        # only the frame slot is sent, targets go through shared memory
+        if not self.in_store:
+            self.store.write_targets(self.slot, self.targets)
+            self.in_store = True
+        del d['targets']
+        d['store'] = self.store.name
+        return d
+
+    def __setstate__(self, d: Dict) -> None:
+        if d['store'] is not None:
+            d['store'] = get_store(d['store'])
+            d['targets'] = d['store'].read_targets(d['slot'])
+            d['in_store'] = True
+        self.__dict__.update(d)
 
     def get_box(self, id: int) -> np.ndarray:
         return self.targets[id][:4].copy()
@@ -37,38 +72,51 @@ def produce_tracking(
     input_queue: Queue[DataCollection],
     output_queue: Queue[DataCollection],
     down_scale: float = 1.0,
-    frame_pool: Optional[FramePool] = None
+    frame_pool: Optional[FramePool] = None,
+    lossless: bool = False,
+    session_settings: Optional[SessionSettings] = None,
+    detection_settings: Optional[DetectionSettings] = None,
+    detector_settings: Optional[DetectorSettings] = None
 ) -> None:
     reduce_frame_discard_timer = 0.0
     timer = Timer()
-    tracker = Tracker(down_scale)
+    tracker = Tracker(down_scale, session_settings, detection_settings,
+                      detector_settings)
+    detection_scale = 1.0 / down_scale if down_scale else 1.0
     for data in pipeline_data_generator(
         input_queue,
         output_queue,
-        [FrameData]
+        [FrameData],
+        partial(release_frame, frame_pool=frame_pool)
     ):
         timer.tic()
         frame = data.get(FrameData).get_frame(frame_pool)
-        tracker.update(frame)
-        if not output_queue.empty():
+        detection_frame = None
+        if detection_scale != 1.0 and frame_pool \
+                and frame_pool.has_scale(detection_scale):
+            # pre-scaled frame avoids resizing the full frame for detection
+            detection_frame = data.get(FrameData).get_frame(
+                frame_pool, detection_scale)
+        tracker.update(frame, detection_frame)
+        if not lossless and not output_queue.empty():
             try:
                 # discard previous (unprocessed) frame
-                discarded_frame = output_queue.get_nowait()
-                if frame_pool and discarded_frame.has(FrameData):
-                    frame_pool.free_frame(
-                        discarded_frame.get(FrameData).frame)
+                release_frame(output_queue.get_nowait(), frame_pool)
                 reduce_frame_discard_timer += 0.015
             except queue.Empty:
                 reduce_frame_discard_timer -= 0.001
                 if reduce_frame_discard_timer < 0:
                     reduce_frame_discard_timer = 0
-        output_queue.put(data.add(TrackingData(tracker.get_all_targets())))
+        output_queue.put(data.add(TrackingData(
+            tracker.get_all_targets(), frame_pool, get_slot(data),
+            tracker.predicted)))
         timer.toc()
         if tracker.current_frame == 100:
             timer.clear()
         if tracker.current_frame % 100 == 0 and tracker.current_frame > 100:
             print('Tracking-FPS:', 1. / timer.average_time, 1. /
-                  (timer.average_time + reduce_frame_discard_timer))
+                  (timer.average_time + reduce_frame_discard_timer),
+                  'Detection-Rate:', tracker.schedule.detection_rate())
         if reduce_frame_discard_timer > 0.015:
             time.sleep(reduce_frame_discard_timer)
 
@@ -79,25 +127,40 @@ class TrackProducer:
             input_queue: Queue[DataCollection],
             output_queue: Queue[DataCollection],
             down_scale: float = 1.0,
-            frame_pool: Optional[FramePool] = None
+            frame_pool: Optional[FramePool] = None,
+            lossless: bool = False,
+            session_settings: Optional[SessionSettings] = None,
+            detection_settings: Optional[DetectionSettings] = None,
+            detector_settings: Optional[DetectorSettings] = None
     ) -> None:
         self.process: Optional[Process] = None
         self.input_queue = input_queue
         self.output_queue = output_queue
         self.down_scale = down_scale
         self.frame_pool = frame_pool
+        self.lossless = lossless
+        self.session_settings = session_settings
+        self.detection_settings = detection_settings
+        self.detector_settings = detector_settings
 
     def start(self) -> None:
         self.process = Process(target=produce_tracking, args=(
             self.input_queue,
             self.output_queue,
             self.down_scale,
-            self.frame_pool
+            self.frame_pool,
+            self.lossless,
+            self.session_settings,
+            self.detection_settings,
+            self.detector_settings
         ))
         self.process.start()
 
     def stop(self) -> None:
-        self.input_queue.put(DataCollection().add(CloseData()))
+        try:
+            self.input_queue.put_nowait(DataCollection().add(CloseData()))
+        except queue.Full:
+            pass  # bounded queue is full, process gets killed anyway
         if self.process:
             time.sleep(1)
             self.process.kill()
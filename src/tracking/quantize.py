@@ -0,0 +1,102 @@
+import os
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import onnx
+from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod,
+                                      QuantFormat, QuantType, quantize_static)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from frame.camera import CameraSettings
+from frame.source import open_capture
+from tracking.preprocess import LetterboxPreprocessor
+
+CALIBRATION_METHODS = {
+    'minmax': CalibrationMethod.MinMax,
+    'entropy': CalibrationMethod.Entropy,
+    'percentile': CalibrationMethod.Percentile,
+}
+
+
+def read_frames(
+    input: str,
+    max_frames: int = 100,
+    step: int = 1
+) -> Iterator[np.ndarray]:
+    """
+    Yields every step-th frame of a recorded video file or image directory.
+    """
+    cap = open_capture(CameraSettings(input, realtime=False))
+    index = 0
+    count = 0
+    try:
+        while count < max_frames:
+            success, frame = cap.read()
+            if not success:
+                break
+            if index % step == 0:
+                count += 1
+                yield frame
+            index += 1
+    finally:
+        cap.release()
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    """
+    Feeds letterboxed frames to the calibration of the static quantization.
+    """
+
+    def __init__(
+        self,
+        input_name: str,
+        frames: Iterator[np.ndarray],
+        input_shape: Tuple[int, int]
+    ) -> None:
+        self.input_name = input_name
+        self.frames = frames
+        self.preprocess = LetterboxPreprocessor(input_shape)
+        self.count = 0
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        frame = next(self.frames, None)
+        if frame is None:
+            return None
+        self.count += 1
+        tensor, _ = self.preprocess(frame)
+        # tensor buffer is reused, calibration may keep the input
+        return {self.input_name: tensor.copy()}
+
+
+def quantize_detector(
+    model_path: str,
+    output_path: str,
+    frames: Iterator[np.ndarray],
+    input_shape: Tuple[int, int],
+    method: str = 'minmax',
+    per_channel: bool = False,
+    exclude_nodes: Optional[List[str]] = None
+) -> int:
+    """
+    Quantizes weights and activations of a detector model to INT8 with
+    the activation ranges calibrated on the frames. Returns the number of
+    frames used for calibration.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        # shape inference and graph optimization before quantization
+        prepared_path = os.path.join(directory, 'prepared.onnx')
+        quant_pre_process(model_path, prepared_path)
+        input_name = onnx.load(prepared_path).graph.input[0].name
+        reader = FrameCalibrationReader(input_name, frames, input_shape)
+        quantize_static(
+            prepared_path,
+            output_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=CALIBRATION_METHODS[method],
+            nodes_to_exclude=exclude_nodes or [])
+    return reader.count
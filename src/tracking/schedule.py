@@ -0,0 +1,81 @@
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from util.image import gray_thumbnail
+
+
+@dataclass
+class DetectionSettings:
+    # detector runs at least every interval frames
+    interval: int = 1
+    # mean absolute gray value change (0-255) since the last detection which
+    # runs the detector before the interval is over, None disables it
+    motion_threshold: Optional[float] = None
+    motion_size: int = 64  # width of the thumbnail the motion is measured on
+
+
+def add_detection_parameters(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument('--track-interval', type=int, default=1,
+                        help='Run the person detector every n-th frame, tracks are predicted in between.')
+    parser.add_argument('--track-motion', type=float, default=None,
+                        help='Run the person detector earlier if the mean gray value change since the last detection exceeds this.')
+    return parser
+
+
+def parse_detection_settings(args: Dict[str, Any]) -> DetectionSettings:
+    return DetectionSettings(
+        args.get('track_interval', 1),
+        args.get('track_motion', None))
+
+
+class DetectionScheduler:
+    """
+    Decides for every frame whether the detector runs on it.
+
+    Motion is measured as the mean absolute difference of small grayscale
+    thumbnails between the frame and the last detected frame, so slow
+    movement adds up until it triggers a detection.
+    """
+
+    def __init__(self, settings: Optional[DetectionSettings] = None) -> None:
+        if settings is None:
+            settings = DetectionSettings()
+        assert settings.interval >= 1, 'Detection interval must be positive'
+        self.settings = settings
+        self.frames_since_detection = settings.interval
+        self.reference: Optional[np.ndarray] = None
+        self.detections = 0
+        self.frames = 0
+
+    def motion(self, thumbnail: np.ndarray) -> float:
+        if self.reference is None \
+                or self.reference.shape != thumbnail.shape:
+            return float('inf')
+        return cv2.mean(cv2.absdiff(thumbnail, self.reference))[0]
+
+    def __call__(self, image: np.ndarray) -> bool:
+        """
+        Returns if the detector should run on the image, counted as detected
+        if it does.
+        """
+        self.frames += 1
+        detect = self.frames_since_detection >= self.settings.interval
+        thumbnail = None
+        if self.settings.motion_threshold is not None:
+            thumbnail = gray_thumbnail(image, self.settings.motion_size)
+            detect = detect or \
+                self.motion(thumbnail) > self.settings.motion_threshold
+        if not detect:
+            self.frames_since_detection += 1
+            return False
+        self.frames_since_detection = 1
+        self.reference = thumbnail
+        self.detections += 1
+        return True
+
+    def detection_rate(self) -> float:
+        return self.detections / self.frames if self.frames else 0.0
@@ -2,11 +2,12 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
-import onnxruntime
 
 from ocsort.ocsort import OCSort
-from ocsort.onnx_inference import demo_postprocess, multiclass_nms, preprocess
+from tracking.detector import DetectorSettings, create_detector
+from tracking.schedule import DetectionScheduler, DetectionSettings
 from util.image import clip_section
+from util.session import SessionSettings
 
 
 @dataclass
@@ -18,22 +19,29 @@ class TrackObject:
 
 
 class Tracker:
-    def __init__(self, down_scale: float = 1.0) -> None:
-        self.session = onnxruntime.InferenceSession(
-            'models/yolox_tiny.onnx', providers=['CPUExecutionProvider'])
-        self.input_shape = (416, 416)
-        self.nms_thr = 0.7
-        self.score_thr = 0.1
+    def __init__(
+        self,
+        down_scale: float = 1.0,
+        session_settings: Optional[SessionSettings] = None,
+        detection_settings: Optional[DetectionSettings] = None,
+        detector_settings: Optional[DetectorSettings] = None
+    ) -> None:
+        self.detector = create_detector(detector_settings, session_settings)
+        self.input_shape = self.detector.input_shape
         self.min_box_area = 10
         self.ocsort = OCSort(det_thresh=0.6, iou_threshold=0.3)
         self.current_targets: List[List[int]] = []
         self.track_objects: Dict[int, TrackObject] = {}
         self.current_frame = 0
         self.down_scale = down_scale
+        self.schedule = DetectionScheduler(detection_settings)
+        # targets of the current frame are Kalman predictions only
+        self.predicted = False
 
     def inference(
         self,
-        image: np.ndarray
+        image: np.ndarray,
+        detection_image: Optional[np.ndarray] = None
     ) -> Tuple[Optional[np.ndarray], Dict[str, Union[int, np.ndarray]]]:
         img_info: Dict[str, Union[int, np.ndarray]] = {'id': 0}
         height, width = image.shape[:2]
@@ -41,43 +49,32 @@ class Tracker:
         img_info['width'] = width
         img_info['raw_img'] = image
 
-        img, ratio = preprocess(image, self.input_shape, mean=None, std=None)
-        img_info['ratio'] = ratio
-        ort_inputs = {self.session.get_inputs()[0].name: img[None, :, :, :]}
-
-        output = self.session.run(None, ort_inputs)
-        predictions = demo_postprocess(
-            output[0], self.input_shape, p6=False)[0]
-
-        boxes = predictions[:, :4]
-        scores = predictions[:, 4:5] * predictions[:, 5:]
-
-        boxes_xyxy = np.ones_like(boxes)
-        boxes_xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2.
-        boxes_xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2.
-        boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2.
-        boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2.
-        boxes_xyxy /= ratio
-        detections = multiclass_nms(
-            boxes_xyxy,
-            scores,
-            nms_thr=self.nms_thr,
-            score_thr=self.score_thr
-        )
-
-        if detections is not None:
-            filtered_dets = detections[detections[:, 5] == 0]
-            return filtered_dets[:, :-1], img_info
+        image_scale = 1.0
+        if detection_image is not None and min(
+                self.input_shape[0] / detection_image.shape[0],
+                self.input_shape[1] / detection_image.shape[1]) <= 1.0:
+            # smaller variant still covers the detector input size
+            image_scale = detection_image.shape[1] / width
+            image = detection_image
+        detections = self.detector.detect(image, image_scale)
+        return detections, img_info
+
+    def update(
+        self,
+        image: np.ndarray,
+        detection_image: Optional[np.ndarray] = None
+    ) -> None:
+        self.predicted = not self.schedule(
+            image if detection_image is None else detection_image)
+        if self.predicted:
+            online_targets = self.ocsort.predict()
         else:
-            return None, img_info
-
-    def update(self, image: np.ndarray) -> None:
-        outputs, img_info = self.inference(image)
-        online_targets = self.ocsort.update(
-            outputs,
-            [img_info['height'],
-             img_info['width']], [
-                img_info['height'], img_info['width']])
+            outputs, img_info = self.inference(image, detection_image)
+            online_targets = self.ocsort.update(
+                outputs,
+                [img_info['height'],
+                 img_info['width']], [
+                    img_info['height'], img_info['width']])
         current_ids = []
         for target in online_targets:
             padding = max(target[3] * 0.1, target[2] * 0.1)
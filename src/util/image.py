@@ -51,3 +51,27 @@ def clip_section_xyxy(
     if y2 > image.shape[0]:
         y2 = image.shape[0]
     return x, y, x2, y2
+
+
+def gray_thumbnail(image: np.ndarray, width: int = 64) -> np.ndarray:
+    height = max(1, round(width * image.shape[0] / image.shape[1]))
+    # strided view keeps the area interpolation cheap on large frames
+    step = max(1, image.shape[1] // (width * 4))
+    small = cv2.resize(image[::step, ::step], (width, height),
+                       interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def region_change(
+    thumbnail: np.ndarray,
+    reference: np.ndarray,
+    grid: int = 4
+) -> float:
+    """
+    Largest mean absolute gray value difference of grid x grid regions,
+    so a change in a small part of the image is not averaged away.
+    """
+    difference = cv2.absdiff(thumbnail, reference)
+    regions = cv2.resize(difference, (grid, grid),
+                         interpolation=cv2.INTER_AREA)
+    return float(regions.max())
@@ -0,0 +1,151 @@
+import os
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+import onnxruntime
+
+OPTIMIZATION_LEVELS = {
+    'disable': onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+@dataclass
+class SessionSettings:
+    intra_op_threads: int = 0  # 0 lets onnxruntime decide
+    inter_op_threads: int = 0
+    parallel: bool = False
+    optimization: str = 'all'
+    # optimized model is saved here and loaded instead on later launches,
+    # it is optimized again when the source model or the level changed
+    optimized_model: Optional[str] = None
+    io_binding: bool = False
+    # preallocating the peak memory of all intermediate tensors speeds up
+    # small models, large attention maps may not fit into memory together
+    memory_pattern: bool = True
+
+
+def add_session_parameters(
+    parser: ArgumentParser,
+    prefix: str
+) -> ArgumentParser:
+    parser.add_argument(f'--{prefix}-threads', type=int, default=0,
+                        help='Threads used within an operator (0: all cores).')
+    parser.add_argument(f'--{prefix}-inter-threads', type=int, default=0,
+                        help='Threads used across operators in parallel mode (0: all cores).')
+    parser.add_argument(f'--{prefix}-parallel', default=False,
+                        action='store_true',
+                        help='Run independent operators in parallel.')
+    parser.add_argument(f'--{prefix}-optimization', type=str, default='all',
+                        choices=list(OPTIMIZATION_LEVELS),
+                        help='Graph optimization level.')
+    parser.add_argument(f'--{prefix}-model-cache', type=str, default=None,
+                        help='Path to save the optimized model to and to load it from later.')
+    parser.add_argument(f'--{prefix}-io-binding', default=False,
+                        action='store_true',
+                        help='Write outputs into preallocated buffers.')
+    return parser
+
+
+def parse_session_settings(
+    args: Dict[str, Any],
+    prefix: str
+) -> SessionSettings:
+    return SessionSettings(
+        args.get(f'{prefix}_threads', 0),
+        args.get(f'{prefix}_inter_threads', 0),
+        args.get(f'{prefix}_parallel', False),
+        args.get(f'{prefix}_optimization', 'all'),
+        args.get(f'{prefix}_model_cache', None),
+        args.get(f'{prefix}_io_binding', False))
+
+
+def create_session_options(
+    settings: SessionSettings,
+    cached: bool = False
+) -> onnxruntime.SessionOptions:
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = settings.intra_op_threads
+    options.inter_op_num_threads = settings.inter_op_threads
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL \
+        if settings.parallel else onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    options.enable_mem_pattern = settings.memory_pattern
+    if cached:
+        # cached model is optimized already
+        options.graph_optimization_level = \
+            onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+    else:
+        options.graph_optimization_level = \
+            OPTIMIZATION_LEVELS[settings.optimization]
+        if settings.optimized_model:
+            options.optimized_model_filepath = settings.optimized_model
+    return options
+
+
+def model_cache_key(model_path: str, optimization: str) -> str:
+    """
+    Identifies the source model and optimization level of an optimized
+    model, stored next to it in a .source file.
+    """
+    stat = os.stat(model_path)
+    return f'{os.path.abspath(model_path)}:{stat.st_size}:' \
+        f'{stat.st_mtime_ns}:{optimization}'
+
+
+def is_cache_valid(optimized_model: str, key: str) -> bool:
+    if not os.path.exists(optimized_model) \
+            or not os.path.exists(f'{optimized_model}.source'):
+        return False
+    with open(f'{optimized_model}.source') as source:
+        return source.read() == key
+
+
+class OnnxSession:
+    """
+    Inference session of a model with a single input and output.
+
+    With io binding the output is written into a buffer allocated once,
+    which is overwritten by the next run.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        settings: Optional[SessionSettings] = None
+    ) -> None:
+        if settings is None:
+            settings = SessionSettings()
+        key = model_cache_key(model_path, settings.optimization)
+        cached = settings.optimized_model is not None \
+            and is_cache_valid(settings.optimized_model, key)
+        self.session = onnxruntime.InferenceSession(
+            settings.optimized_model if cached else model_path,
+            create_session_options(settings, cached),
+            providers=['CPUExecutionProvider'])
+        if settings.optimized_model and not cached:
+            # written once the session saved the optimized model
+            with open(f'{settings.optimized_model}.source', 'w') as source:
+                source.write(key)
+        self.input_name = self.session.get_inputs()[0].name
+        self.binding: Optional[onnxruntime.IOBinding] = None
+        if settings.io_binding:
+            output = self.session.get_outputs()[0]
+            assert output.type == 'tensor(float)' and all(
+                isinstance(size, int) for size in output.shape), \
+                'IO binding needs a float output of fixed shape'
+            self.output = np.empty(output.shape, dtype=np.float32)
+            self.binding = self.session.io_binding()
+            self.binding.bind_output(
+                output.name, 'cpu', 0, np.float32, self.output.shape,
+                self.output.ctypes.data)
+
+    def run(self, input: np.ndarray) -> np.ndarray:
+        if self.binding is None:
+            return self.session.run(None, {self.input_name: input})[0]
+        self.binding.bind_cpu_input(self.input_name, input)
+        self.session.run_with_iobinding(self.binding)
+        return self.output
@@ -0,0 +1,80 @@
+from typing import Generator
+
+import cv2
+import numpy as np
+import pytest
+
+from frame.producer import CaptureStats, read_frame, read_frame_into_pool
+from frame.shared import FramePool
+
+FRAME_SHAPE = (48, 64, 3)
+
+
+@pytest.fixture
+def video_path() -> str:
+    path = 'tests/tmp/capture.avi'
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter.fourcc(*'MJPG'), 30,
+        (FRAME_SHAPE[1], FRAME_SHAPE[0]))
+    for value in range(0, 250, 50):
+        writer.write(np.full(FRAME_SHAPE, value, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def frame_pool() -> Generator[FramePool, None, None]:
+    pool = FramePool(np.zeros(FRAME_SHAPE, dtype=np.uint8), 2)
+    yield pool
+    pool.close()
+
+
+def test_read_frame(video_path: str, frame_pool: FramePool) -> None:
+    cap = cv2.VideoCapture(video_path)
+    stats = CaptureStats()
+    ret, index = read_frame(cap, stats, frame_pool)
+    assert ret
+    assert isinstance(index, int)
+    assert stats.get_per_frame() == (1.0, 1.0)
+    ret, frame = read_frame(cap, stats)
+    assert ret
+    assert isinstance(frame, np.ndarray)
+
+
+def test_read_frame_into_pool(
+    video_path: str,
+    frame_pool: FramePool
+) -> None:
+    cap = cv2.VideoCapture(video_path)
+    reference = cv2.VideoCapture(video_path)
+    stats = CaptureStats()
+    for _ in range(5):
+        ret, index = read_frame_into_pool(cap, stats, frame_pool)
+        assert ret
+        assert isinstance(index, int)
+        _, expected = reference.read()
+        assert np.array_equal(frame_pool.get(index), expected)
+        frame_pool.free_frame(index)
+    assert stats.frames == 5
+    assert stats.get_per_frame() == (0.0, 0.0)
+
+    ret, _ = read_frame_into_pool(cap, stats, frame_pool)
+    assert not ret
+    assert frame_pool.free_frames.qsize() == 2
+
+
+def test_read_frame_without_free_slot(
+    video_path: str,
+    frame_pool: FramePool
+) -> None:
+    cap = cv2.VideoCapture(video_path)
+    stats = CaptureStats()
+    held = [frame_pool.reserve() for _ in range(2)]
+    # live capture drops the frames instead of waiting for a slot
+    assert read_frame(cap, stats, frame_pool, False) == (True, None)
+    assert read_frame_into_pool(cap, stats, frame_pool, False) == (True, None)
+    assert stats.without_slot == 2
+    assert stats.frames == 0
+    frame_pool.free_frame(held[0])
+    ret, index = read_frame_into_pool(cap, stats, frame_pool, False)
+    assert ret and index == held[0]
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import queue
+from multiprocessing import Process
+from multiprocessing.managers import SharedMemoryManager
+from typing import Generator
+
+import numpy as np
+import pytest
+
+from frame.producer import FrameData, release_frame
+from frame.shared import FramePool, SharedFreeList
+from pipeline.data import DataCollection
+from util.image import scale_image
+
+
+@pytest.fixture
+def memory_manager() -> Generator[SharedMemoryManager, None, None]:
+    manager = SharedMemoryManager()
+    manager.start()
+    yield manager
+    manager.shutdown()
+
+
+def release_indices(free_list: SharedFreeList, count: int) -> None:
+    for index in range(count):
+        free_list.put(index)
+
+
+def test_free_list_order(memory_manager: SharedMemoryManager) -> None:
+    free_list = SharedFreeList(4, memory_manager)
+    assert free_list.empty()
+    for _ in range(3):
+        for index in [3, 1, 2]:
+            free_list.put(index)
+        assert free_list.qsize() == 3
+        assert [free_list.get() for _ in range(3)] == [3, 1, 2]
+    assert free_list.empty()
+    free_list.close()
+
+
+def test_free_list_limits(memory_manager: SharedMemoryManager) -> None:
+    free_list = SharedFreeList(2, memory_manager)
+    with pytest.raises(queue.Empty):
+        free_list.get(timeout=0.01)
+    free_list.put(0)
+    free_list.put(1)
+    with pytest.raises(queue.Full):
+        free_list.put(0)
+    free_list.close()
+
+
+def test_free_list_across_processes(
+    memory_manager: SharedMemoryManager
+) -> None:
+    free_list = SharedFreeList(8, memory_manager)
+    process = Process(target=release_indices, args=(free_list, 8))
+    process.start()
+    process.join()
+    assert sorted(free_list.get(timeout=1.0) for _ in range(8)) \
+        == list(range(8))
+    free_list.close()
+
+
+@pytest.mark.parametrize('shared_free_list', [True, False])
+def test_frame_pool(shared_free_list: bool) -> None:
+    template = np.zeros((4, 6, 3), dtype=np.uint8)
+    frame_pool = FramePool(template, 2, shared_free_list)
+    try:
+        index = frame_pool.put(np.full(template.shape, 7, dtype=np.uint8))
+        assert frame_pool.free_frames.qsize() == 1
+        assert np.all(frame_pool.get(index) == 7)
+        frame_pool.free_frame(index)
+        assert frame_pool.free_frames.qsize() == 2
+    finally:
+        frame_pool.close()
+
+
+def test_frame_pool_reference_counts() -> None:
+    template = np.zeros((4, 6, 3), dtype=np.uint8)
+    frame_pool = FramePool(template, 2)
+    try:
+        index = frame_pool.reserve()
+        generation = frame_pool.generation(index)
+        assert frame_pool.acquire(index, generation)
+        assert frame_pool.release(index, generation)
+        assert frame_pool.free_frames.qsize() == 1
+        assert frame_pool.leak_report() == [
+            (index, 1, pytest.approx(0.0, abs=1.0))]
+        assert frame_pool.release(index, generation)
+        assert frame_pool.free_frames.qsize() == 2
+        # released slots can neither be acquired nor released again
+        assert not frame_pool.acquire(index, generation)
+        assert not frame_pool.release(index, generation)
+        assert frame_pool.free_frames.qsize() == 2
+        assert frame_pool.leak_report() == []
+    finally:
+        frame_pool.close()
+
+
+def test_frame_pool_never_frees_held_frames() -> None:
+    template = np.zeros((4, 6, 3), dtype=np.uint8)
+    frame_pool = FramePool(template, 2, max_frame_age=0.05)
+    try:
+        held = [frame_pool.reserve() for _ in range(2)]
+        generations = [frame_pool.generation(index) for index in held]
+        with pytest.raises(queue.Empty):
+            frame_pool.reserve(False)
+        with pytest.raises(queue.Empty):
+            frame_pool.reserve(timeout=0.1)
+        assert [index for index, _, _ in frame_pool.leak_report(0.05)] \
+            == held
+        # slow stages still hold the frames and release them later
+        for index, generation in zip(held, generations):
+            assert frame_pool.release(index, generation)
+        assert frame_pool.free_frames.qsize() == 2
+    finally:
+        frame_pool.close()
+
+
+def test_frame_pool_sustains_many_frames() -> None:
+    template = np.zeros((4, 6, 3), dtype=np.uint8)
+    frame_pool = FramePool(template, 4)
+    try:
+        rng = np.random.default_rng(0)
+        stage: queue.Queue[DataCollection] = queue.Queue()
+        for frame in range(2000):
+            # live capture never waits for a slot
+            index = frame_pool.reserve(False)
+            data = DataCollection().add(FrameData(index, frame_pool))
+            if not stage.empty():
+                # discard branch of a stage
+                release_frame(stage.get_nowait(), frame_pool)
+            if rng.random() < 0.2:
+                # a second consumer holds and releases the frame as well
+                assert data.get(FrameData).acquire(frame_pool)
+                release_frame(data, frame_pool)
+            stage.put(data)
+            if frame % 3 == 0:
+                # the director displays and releases the frame
+                release_frame(stage.get_nowait(), frame_pool)
+        while not stage.empty():
+            release_frame(stage.get_nowait(), frame_pool)
+        assert frame_pool.free_frames.qsize() == frame_pool.maxsize
+        assert frame_pool.leak_report() == []
+    finally:
+        frame_pool.close()
+
+
+def test_frame_pool_scales() -> None:
+    template = np.zeros((40, 60, 3), dtype=np.uint8)
+    frame_pool = FramePool(template, 2, scales=[0.5, 1.0, 0.25])
+    try:
+        assert frame_pool.scales == (0.5, 0.25)
+        assert frame_pool.has_scale(None)
+        assert frame_pool.has_scale(0.5)
+        assert not frame_pool.has_scale(0.3)
+        frame = np.zeros(template.shape, dtype=np.uint8)
+        frame[:20] = 200
+        index = frame_pool.put(frame)
+        assert frame_pool.get(index, 1.0) is frame_pool.get(index)
+        for scale in [0.5, 0.25]:
+            expected = scale_image(frame, scale)
+            assert np.array_equal(frame_pool.get(index, scale), expected)
+    finally:
+        frame_pool.close()
+
+
+def test_frame_data_scaled_frame() -> None:
+    template = np.zeros((40, 60, 3), dtype=np.uint8)
+    frame_pool = FramePool(template, 2, scales=[0.5])
+    try:
+        frame = np.full(template.shape, 100, dtype=np.uint8)
+        frame_data = FrameData(frame, frame_pool)
+        cached = frame_data.get_frame(frame_pool, 0.5)
+        assert cached.shape == (20, 30, 3)
+        assert np.shares_memory(
+            cached, frame_pool.get(frame_data.frame, 0.5))
+        resized = frame_data.get_frame(frame_pool, 0.25)
+        assert resized.shape == (10, 15, 3)
+        assert np.array_equal(FrameData(frame).get_frame(scale=0.5), cached)
+    finally:
+        frame_pool.close()
@@ -0,0 +1,105 @@
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from frame.camera import CameraSettings, parse_input
+from frame.source import FileCapture, list_image_files, open_capture
+
+FRAME_SHAPE = (48, 64, 3)
+FRAME_VALUES = list(range(0, 250, 25))
+
+
+@pytest.fixture
+def video_path() -> str:
+    path = 'tests/tmp/source.avi'
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter.fourcc(*'MJPG'), 20,
+        (FRAME_SHAPE[1], FRAME_SHAPE[0]))
+    for value in FRAME_VALUES:
+        writer.write(np.full(FRAME_SHAPE, value, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def image_directory() -> str:
+    path = 'tests/tmp/source_images'
+    os.makedirs(path, exist_ok=True)
+    for index, value in enumerate(FRAME_VALUES):
+        cv2.imwrite(os.path.join(path, f'{index:04d}.png'),
+                    np.full(FRAME_SHAPE, value, dtype=np.uint8))
+    with open(os.path.join(path, 'notes.txt'), 'w') as f:
+        f.write('not an image')
+    return path
+
+
+def read_all(cap: FileCapture) -> int:
+    count = 0
+    while True:
+        ret, _ = cap.read()
+        if not ret:
+            return count
+        count += 1
+
+
+def test_parse_input() -> None:
+    assert parse_input('1') == 1
+    assert parse_input('video.mp4') == 'video.mp4'
+
+
+def test_list_image_files(image_directory: str) -> None:
+    files = list_image_files(image_directory)
+    assert len(files) == len(FRAME_VALUES)
+    assert files == sorted(files)
+
+
+def test_image_sequence(image_directory: str) -> None:
+    cap = open_capture(CameraSettings(image_directory, realtime=False))
+    assert isinstance(cap, FileCapture)
+    assert cap.isOpened()
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == len(FRAME_VALUES)
+    for value in FRAME_VALUES:
+        ret, frame = cap.read()
+        assert ret
+        assert np.all(frame == value)
+    ret, _ = cap.read()
+    assert not ret
+
+
+def test_image_sequence_into_buffer(image_directory: str) -> None:
+    cap = FileCapture(image_directory, realtime=False)
+    image = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    ret, frame = cap.read(image)
+    assert ret
+    assert frame is image
+
+
+def test_video_fast(video_path: str) -> None:
+    cap = FileCapture(video_path, realtime=False)
+    assert cap.get(cv2.CAP_PROP_FPS) == 20
+    assert read_all(cap) == len(FRAME_VALUES)
+    assert cap.dropped_frames == 0
+    cap.release()
+
+
+@pytest.mark.parametrize('source', ['video_path', 'image_directory'])
+def test_realtime_drops_frames(
+    source: str,
+    request: pytest.FixtureRequest
+) -> None:
+    cap = FileCapture(request.getfixturevalue(source), 20, realtime=True)
+    count = 0
+    start_time = time.perf_counter()
+    while True:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        count += 1
+        # consumer only manages every second frame
+        time.sleep(0.1)
+    assert count + cap.dropped_frames == len(FRAME_VALUES)
+    assert cap.dropped_frames > 0
+    assert time.perf_counter() - start_time >= 0.4
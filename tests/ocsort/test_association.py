@@ -0,0 +1,36 @@
+import numpy as np
+
+from ocsort.association import associate, split_matches
+
+
+def test_split_matches_keeps_loop_order() -> None:
+    iou_matrix = np.array([
+        [0.9, 0.0, 0.0],
+        [0.0, 0.1, 0.0],
+        [0.0, 0.0, 0.0],
+        [0.0, 0.0, 0.8],
+    ])
+    matched_indices = np.array([[0, 0], [1, 1], [3, 2]])
+    matches, unmatched_detections, unmatched_trackers = split_matches(
+        matched_indices, iou_matrix, 0.3)
+    assert matches.tolist() == [[0, 0], [3, 2]]
+    # never assigned first, then the rejected pair
+    assert unmatched_detections.tolist() == [2, 1]
+    assert unmatched_trackers.tolist() == [1]
+
+
+def test_associate_crowd() -> None:
+    rng = np.random.default_rng(0)
+    corners = np.stack(np.meshgrid(np.arange(10) * 100.,
+                                   np.arange(10) * 100.), -1).reshape(-1, 2)
+    trackers = np.concatenate(
+        [corners, corners + 50, np.zeros((100, 1))], 1)
+    order = rng.permutation(100)
+    detections = np.concatenate(
+        [trackers[order, :4] + 2, np.full((100, 1), 0.9)], 1)
+    velocities = np.zeros((100, 2))
+    previous_obs = np.concatenate([trackers[:, :4], np.ones((100, 1))], 1)
+    matches, unmatched_detections, unmatched_trackers = associate(
+        detections, trackers, 0.3, velocities, previous_obs, 0.2)
+    assert len(unmatched_detections) == 0 and len(unmatched_trackers) == 0
+    assert np.array_equal(order[matches[:, 0]], matches[:, 1])
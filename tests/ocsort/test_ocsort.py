@@ -0,0 +1,95 @@
+import numpy as np
+
+from ocsort.ocsort import ObservationRing, OCSort, k_previous_obs
+
+IMAGE_SIZE = [720, 1280]
+
+
+def test_observation_ring() -> None:
+    observations = ObservationRing(3)
+    assert len(observations) == 0
+    assert k_previous_obs(observations, 1, 3) == [-1, -1, -1, -1, -1]
+    for age in [1, 2, 4, 5]:
+        observations.append(age, np.full(5, age))
+    assert len(observations) == 3
+    assert 1 not in observations
+    assert 2 in observations
+    assert 3 not in observations
+    assert observations.last()[0] == 5
+    assert observations.last(3)[0] == 2
+    # oldest observation within the last k frames
+    assert k_previous_obs(observations, 6, 3)[0] == 4
+    # latest observation if none is within the last k frames
+    assert k_previous_obs(observations, 20, 3)[0] == 5
+
+
+def test_observations_stay_bounded() -> None:
+    ocsort = OCSort(det_thresh=0.6, iou_threshold=0.3)
+    for frame in range(500):
+        x = 100 + 20 * np.sin(frame / 20)
+        detections = np.array([[x, 100, x + 50, 200, 0.9]])
+        ocsort.update(detections, IMAGE_SIZE, IMAGE_SIZE)
+    assert len(ocsort.trackers) == 1
+    tracker = ocsort.trackers[0]
+    assert len(tracker.observations) == 3
+    assert tracker.observations.count == 499
+
+
+def test_predict_keeps_tracks_between_detections() -> None:
+    ocsort = OCSort(det_thresh=0.6, iou_threshold=0.3)
+    targets = np.empty((0, 5))
+    for frame in range(60):
+        x = 100 + 2 * frame
+        if frame % 3 == 0:
+            detections = np.array([[x, 100, x + 50, 200, 0.9]])
+            targets = ocsort.update(detections, IMAGE_SIZE, IMAGE_SIZE)
+        else:
+            targets = ocsort.predict()
+        if frame > 9:
+            assert len(targets) == 1
+            assert targets[0, 4] == 1
+            # predicted box follows the movement
+            assert abs(targets[0, 0] - x) < 2
+    assert ocsort.trackers[0].time_since_update == 0
+    assert ocsort.trackers[0].age == 59
+
+
+def test_predict_ages_lost_tracks() -> None:
+    ocsort = OCSort(det_thresh=0.6, iou_threshold=0.3, max_age=5)
+    for _ in range(5):
+        ocsort.update(np.array([[100, 100, 150, 200, 0.9]]),
+                      IMAGE_SIZE, IMAGE_SIZE)
+    ocsort.update(np.empty((0, 5)), IMAGE_SIZE, IMAGE_SIZE)
+    assert len(ocsort.predict()) == 0
+    for _ in range(5):
+        ocsort.predict()
+    assert len(ocsort.trackers) == 0
+
+
+def test_predicted_frames_filter_like_missed_frames() -> None:
+    skipped = OCSort(det_thresh=0.6, iou_threshold=0.3)
+    missed = OCSort(det_thresh=0.6, iou_threshold=0.3)
+    no_detections = np.empty((0, 5))
+    for frame in range(30):
+        x = 100 + 5 * frame
+        detections = np.array([[x, 100, x + 50, 200, 0.9]])
+        if 10 <= frame < 20:
+            # skipped by the detector or detected nothing
+            skipped.predict()
+            missed.update(no_detections, IMAGE_SIZE, IMAGE_SIZE)
+        elif 20 <= frame < 22:
+            # person lost
+            for ocsort in [skipped, missed]:
+                ocsort.update(no_detections, IMAGE_SIZE, IMAGE_SIZE)
+        else:
+            for ocsort in [skipped, missed]:
+                ocsort.update(detections.copy(), IMAGE_SIZE, IMAGE_SIZE)
+        if frame >= 22:
+            # the re-update interpolates over all frames since frame 9
+            assert len(skipped.trackers) == len(missed.trackers) == 1
+            assert np.allclose(skipped.trackers[0].kf.x,
+                               missed.trackers[0].kf.x)
+            assert np.allclose(skipped.trackers[0].get_state(),
+                               missed.trackers[0].get_state())
+    # constant speed is recovered after the re-update
+    assert np.isclose(skipped.trackers[0].kf.x[4, 0], 5.0, atol=0.05)
@@ -0,0 +1,120 @@
+# flake8: noqa
+
+import os.path
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from ocsort.association import (associate, iou_batch, linear_assignment,
+                                speed_direction_batch)
+from ocsort.ocsort import OCSort, k_previous_obs
+
+repeat_count = 50
+image_size = [1080, 1920]
+
+
+def legacy_associate(detections, trackers, iou_threshold, velocities, previous_obs, vdc_weight):
+    # association before the bookkeeping used boolean masks
+    Y, X = speed_direction_batch(detections, previous_obs)
+    inertia_Y, inertia_X = velocities[:, 0], velocities[:, 1]
+    inertia_Y = np.repeat(inertia_Y[:, np.newaxis], Y.shape[1], axis=1)
+    inertia_X = np.repeat(inertia_X[:, np.newaxis], X.shape[1], axis=1)
+    diff_angle_cos = inertia_X * X + inertia_Y * Y
+    diff_angle_cos = np.clip(diff_angle_cos, a_min=-1, a_max=1)
+    diff_angle = np.arccos(diff_angle_cos)
+    diff_angle = (np.pi / 2.0 - np.abs(diff_angle)) / np.pi
+    valid_mask = np.ones(previous_obs.shape[0])
+    valid_mask[np.where(previous_obs[:, 4] < 0)] = 0
+    iou_matrix = iou_batch(detections, trackers)
+    scores = np.repeat(
+        detections[:, -1][:, np.newaxis], trackers.shape[0], axis=1)
+    valid_mask = np.repeat(valid_mask[:, np.newaxis], X.shape[1], axis=1)
+    angle_diff_cost = (valid_mask * diff_angle) * vdc_weight
+    angle_diff_cost = angle_diff_cost.T
+    angle_diff_cost = angle_diff_cost * scores
+    a = (iou_matrix > iou_threshold).astype(np.int32)
+    if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+        matched_indices = np.stack(np.where(a), axis=1)
+    else:
+        matched_indices = linear_assignment(-(iou_matrix+angle_diff_cost))
+    unmatched_detections = []
+    for d, det in enumerate(detections):
+        if (d not in matched_indices[:, 0]):
+            unmatched_detections.append(d)
+    unmatched_trackers = []
+    for t, trk in enumerate(trackers):
+        if (t not in matched_indices[:, 1]):
+            unmatched_trackers.append(t)
+    matches = []
+    for m in matched_indices:
+        if (iou_matrix[m[0], m[1]] < iou_threshold):
+            unmatched_detections.append(m[0])
+            unmatched_trackers.append(m[1])
+        else:
+            matches.append(m.reshape(1, 2))
+    if (len(matches) == 0):
+        matches = np.empty((0, 2), dtype=int)
+    else:
+        matches = np.concatenate(matches, axis=0)
+    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+
+
+def legacy_track_arrays(ocsort: OCSort) -> tuple:
+    velocities = np.array(
+        [trk.velocity if trk.velocity is not None else np.array((0, 0)) for trk in ocsort.trackers])
+    last_boxes = np.array([trk.last_observation for trk in ocsort.trackers])
+    k_observations = np.array(
+        [k_previous_obs(trk.observations, trk.age, ocsort.delta_t) for trk in ocsort.trackers])
+    return velocities, last_boxes, k_observations
+
+
+def crowd(people: int, frame: int, rng: np.random.Generator) -> np.ndarray:
+    # people on a grid walking slowly, a few detections are missing
+    columns = int(np.ceil(np.sqrt(people)))
+    index = np.arange(people)
+    x = 20 + (index % columns) * 1880 / columns + 2 * frame
+    y = 20 + (index // columns) * 1040 / columns
+    boxes = np.stack([x, y, x + 60, y + 90], 1) + rng.normal(0, 1, (people, 4))
+    scores = rng.uniform(0.7, 1, (people, 1))
+    return np.concatenate([boxes, scores], 1)[rng.uniform(size=people) > 0.05]
+
+
+def measure(people: int) -> None:
+    rng = np.random.default_rng(people)
+    ocsort = OCSort(det_thresh=0.6, iou_threshold=0.3)
+    for frame in range(10):
+        ocsort.update(crowd(people, frame, rng), image_size, image_size)
+    detections = crowd(people, 10, rng)
+    trackers = np.array([np.append(trk.get_state()[0], 0)
+                        for trk in ocsort.trackers])
+
+    results = []
+    for track_arrays, association in [
+            (legacy_track_arrays, legacy_associate),
+            (OCSort.track_arrays, associate)]:
+        start_time = time.perf_counter()
+        for _ in range(repeat_count):
+            velocities, _, k_observations = track_arrays(ocsort)
+        arrays_ms = (time.perf_counter() - start_time) * 1e3 / repeat_count
+        start_time = time.perf_counter()
+        for _ in range(repeat_count):
+            matches = association(detections, trackers, 0.3,
+                                  velocities, k_observations, 0.2)
+        association_ms = (time.perf_counter() - start_time) * 1e3 \
+            / repeat_count
+        results.append((arrays_ms, association_ms, matches))
+    (legacy_arrays, legacy_ms, expected), (arrays, current_ms, matches) = \
+        results
+    assert all(np.array_equal(a, b) for a, b in zip(expected, matches))
+    print(f'{len(detections):4d} detections x {len(trackers):4d} tracks: '
+          f'track arrays {legacy_arrays:6.3f} -> {arrays:6.3f} ms, '
+          f'association {legacy_ms:7.3f} -> {current_ms:6.3f} ms')
+
+
+if __name__ == '__main__':
+    for people in [10, 25, 50, 100, 200]:
+        measure(people)
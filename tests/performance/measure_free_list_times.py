@@ -0,0 +1,66 @@
+# flake8: noqa
+
+import os.path
+import sys
+import time
+from multiprocessing import Process, Queue
+from typing import Any, List
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from frame.shared import FramePool
+
+pool_size = 30
+frame_count = 300
+
+
+def acquire_release(
+    free_frames: Any,
+    fps: int,
+    frame_count: int,
+    result_queue: Queue
+) -> None:
+    acquire_times: List[float] = []
+    release_times: List[float] = []
+    frame_time = 1.0 / fps
+    next_frame = time.perf_counter()
+    for _ in range(frame_count):
+        start_time = time.perf_counter()
+        index = free_frames.get()
+        acquired_time = time.perf_counter()
+        free_frames.put(index)
+        released_time = time.perf_counter()
+        acquire_times.append(acquired_time - start_time)
+        release_times.append(released_time - acquired_time)
+        next_frame += frame_time
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+    result_queue.put((acquire_times, release_times))
+
+
+def measure(shared_free_list: bool, fps: int) -> None:
+    template = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    frame_pool = FramePool(template, pool_size, shared_free_list)
+    result_queue: Queue = Queue()
+    process = Process(target=acquire_release, args=(
+        frame_pool.free_frames, fps, frame_count, result_queue))
+    process.start()
+    acquire_times, release_times = result_queue.get()
+    process.join()
+    frame_pool.close()
+
+    name = 'shared' if shared_free_list else 'manager'
+    for operation, times in [('acquire', acquire_times),
+                             ('release', release_times)]:
+        times_us = np.array(times) * 1e6
+        print(f'{name:8s} {fps} fps {operation}: '
+              f'mean {np.mean(times_us):8.1f} us, '
+              f'p99 {np.percentile(times_us, 99):8.1f} us')
+
+
+if __name__ == '__main__':
+    for fps in [30, 60]:
+        for shared_free_list in [False, True]:
+            measure(shared_free_list, fps)
@@ -0,0 +1,87 @@
+# flake8: noqa
+
+import os.path
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from ocsort.kalmanfilter import KalmanFilterNew
+from ocsort.ocsort import OCSort
+from tracking.kalman import BOX_F, BOX_H, BoxKalmanFilter, box_noise
+
+frame_count = 300
+step_count = 10000
+image_size = [1080, 1920]
+
+
+def create_frames(people: int) -> list:
+    rng = np.random.default_rng(0)
+    # people on a grid so that their boxes do not overlap
+    columns = int(np.ceil(np.sqrt(people)))
+    starts = np.array([[100 + 170 * (person % columns),
+                        100 + 170 * (person // columns)]
+                       for person in range(people)], dtype=float)
+    speeds = rng.uniform(-0.2, 0.2, (people, 2))
+    frames = []
+    for frame in range(frame_count):
+        detections = []
+        for person in range(people):
+            # every person is missed now and then
+            if (frame + 5 * person) % 30 > 27:
+                continue
+            x, y = starts[person] + frame * speeds[person]
+            detections.append([x, y, x + 80, y + 150, 0.9])
+        frames.append(np.array(detections).reshape(-1, 5))
+    return frames
+
+
+def measure(people: int) -> None:
+    frames = create_frames(people)
+    ocsort = OCSort(det_thresh=0.6, iou_threshold=0.3)
+    times = []
+    for detections in frames:
+        start_time = time.perf_counter()
+        ocsort.update(detections.copy(), image_size, image_size)
+        times.append(time.perf_counter() - start_time)
+
+    # first frame imports the filter implementation
+    times_ms = np.array(times[1:]) * 1e3
+    print(f'{people:3d} people: '
+          f'mean {np.mean(times_ms):7.3f} ms, '
+          f'p99 {np.percentile(times_ms, 99):7.3f} ms')
+
+
+def measure_filter(closed_form: bool) -> None:
+    z = np.array([[200.], [150.], [5000.], [0.5]])
+    if closed_form:
+        kf = BoxKalmanFilter(z)
+    else:
+        kf = KalmanFilterNew(dim_x=7, dim_z=4)
+        kf.F = BOX_F.copy()
+        kf.H = BOX_H.copy()
+        kf.P, kf.Q, kf.R = box_noise()
+        kf.x[:4] = z
+    times = []
+    for _ in range(5):
+        start_time = time.perf_counter()
+        for _ in range(step_count):
+            kf.predict()
+            kf.update(z)
+        times.append(time.perf_counter() - start_time)
+    step_us = min(times) * 1e6 / step_count
+
+    name = 'closed' if closed_form else 'generic'
+    print(f'{name:8s} filter predict and update: {step_us:6.1f} us')
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', DeprecationWarning)
+    for closed_form in [False, True]:
+        measure_filter(closed_form)
+    for people in [1, 10, 50]:
+        measure(people)
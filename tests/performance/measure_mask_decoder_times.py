@@ -0,0 +1,63 @@
+# flake8: noqa
+
+import os.path
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from segmentation.base import Segmentation
+
+repeat_count = 10
+image_shape = (540, 960, 3)
+
+
+def people(count: int, with_points: bool) -> tuple:
+    rng = np.random.default_rng(count)
+    x = rng.uniform(0, image_shape[1] - 120, count)
+    y = rng.uniform(0, image_shape[0] - 300, count)
+    boxes = np.stack([x, y, x + 120, y + 300], 1)
+    points = [None] * count
+    modes = [None] * count
+    if with_points:
+        # a varying number of visible landmarks per person
+        points = [box[:2] + rng.uniform(0, 1, (rng.integers(5, 20), 2))
+                  * [120, 300] for box in boxes]
+        modes = [np.ones(len(p)) for p in points]
+    return boxes, points, modes
+
+
+def measure(segment: Segmentation, count: int, with_points: bool) -> None:
+    boxes, points, modes = people(count, with_points)
+    start_time = time.perf_counter()
+    for _ in range(repeat_count):
+        single = [segment.bbox_masks(box, box_points, box_modes)
+                  for box, box_points, box_modes in zip(boxes, points, modes)]
+    single_ms = (time.perf_counter() - start_time) * 1e3 / repeat_count
+    start_time = time.perf_counter()
+    for _ in range(repeat_count):
+        batch = segment.bbox_masks_batch(boxes, points, modes)
+    batch_ms = (time.perf_counter() - start_time) * 1e3 / repeat_count
+    agreement = np.mean([np.mean(mask == batch[id])
+                         for id, mask in enumerate(single)])
+    print(f'{count:2d} people{" with points" if with_points else "            "}: '
+          f'per box {single_ms:7.1f} ms, batch {batch_ms:7.1f} ms, '
+          f'mask agreement {agreement:.4f}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'slow':
+        from segmentation.sam import Sam
+        segment: Segmentation = Sam()
+    else:
+        from segmentation.mobile_sam import MobileSam
+        segment = MobileSam()
+    image = np.random.default_rng(0).integers(
+        0, 256, image_shape, dtype=np.uint8)
+    segment.set_image(image)
+    for with_points in [False, True]:
+        for count in range(1, 11):
+            measure(segment, count, with_points)
@@ -0,0 +1,59 @@
+# flake8: noqa
+
+import os.path
+import pickle
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from frame.producer import FrameData
+from frame.shared import FramePool
+from pipeline.data import DataCollection
+from pipeline.metadata import LANDMARK_COUNT, RAW_LANDMARK_COUNT
+from pose.pose import array_to_landmarks
+from pose.producer import PoseData
+from tracking.producer import TrackingData
+
+repeat_count = 1000
+
+
+def create_data(
+    people: int,
+    frame_pool: FramePool,
+    shared: bool
+) -> DataCollection:
+    data = DataCollection().add(FrameData(
+        np.zeros(frame_pool.shape, dtype=np.uint8), frame_pool))
+    slot: Optional[int] = data.get(FrameData).frame if shared else None
+    targets = [np.random.rand(9) for _ in range(people)]
+    landmarks = [np.random.rand(LANDMARK_COUNT, 4) for _ in range(people)]
+    raw_landmarks = [array_to_landmarks(np.random.rand(RAW_LANDMARK_COUNT, 4))
+                     for _ in range(people)]
+    data.add(TrackingData(targets, frame_pool, slot))
+    data.add(PoseData(landmarks, raw_landmarks, frame_pool, slot))
+    return data
+
+
+def measure(people: int, shared: bool) -> None:
+    frame_pool = FramePool(np.zeros((1080, 1920, 3), dtype=np.uint8), 2)
+    data = create_data(people, frame_pool, shared)
+    start_time = time.perf_counter()
+    for _ in range(repeat_count):
+        pickled = pickle.dumps(data)
+        pickle.loads(pickled)
+    hop_us = (time.perf_counter() - start_time) / repeat_count * 1e6
+    name = 'shared' if shared else 'pickled'
+    print(f'{name:8s} {people:2d} people: {hop_us:8.1f} us per hop, '
+          f'{len(pickled):6d} bytes')
+    frame_pool.close()
+
+
+if __name__ == '__main__':
+    for people in [1, 5, 10]:
+        for shared in [False, True]:
+            measure(people, shared)
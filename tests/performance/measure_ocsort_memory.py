@@ -0,0 +1,48 @@
+# flake8: noqa
+
+import os.path
+import resource
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from ocsort.ocsort import OCSort
+
+# people standing in front of the camera for hours, at 30 fps 1M frames
+# are about 9 hours
+frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+report_interval = frame_count // 10
+people = 3
+image_size = [1080, 1920]
+
+
+def detections(frame: int) -> np.ndarray:
+    boxes = []
+    for person in range(people):
+        # people sway a little and are missed now and then
+        if (frame + 11 * person) % 100 > 96:
+            continue
+        x = 200 + 500 * person + 20 * np.sin(frame / 50 + person)
+        boxes.append([x, 300, x + 150, 700, 0.9])
+    return np.array(boxes).reshape(-1, 5)
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', DeprecationWarning)
+    ocsort = OCSort(det_thresh=0.6, iou_threshold=0.3)
+    start_time = time.perf_counter()
+    for frame in range(1, frame_count + 1):
+        ocsort.update(detections(frame), image_size, image_size)
+        if frame % report_interval == 0:
+            # maximum resident set size in KiB on linux
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            stored = sum(len(trk.observations) for trk in ocsort.trackers)
+            print(f'{frame:8d} frames: max rss {rss / 1024:7.1f} MiB, '
+                  f'{len(ocsort.trackers)} tracks, '
+                  f'{stored} stored observations, '
+                  f'{time.perf_counter() - start_time:6.1f} s')
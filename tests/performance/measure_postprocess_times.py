@@ -0,0 +1,83 @@
+# flake8: noqa
+
+import os.path
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from ocsort.utils import demo_postprocess, multiclass_nms
+from tracking.postprocess import YoloxPostprocessor
+
+input_shape = (416, 416)
+anchor_count = 52 * 52 + 26 * 26 + 13 * 13
+frame_count = 200
+ratio = 416 / 1920
+score_thr = 0.1
+nms_thr = 0.7
+
+
+def create_output(people: int) -> np.ndarray:
+    rng = np.random.default_rng(people)
+    output = np.zeros((1, anchor_count, 85), dtype=np.float32)
+    output[..., :2] = rng.uniform(0, 1, (anchor_count, 2))
+    output[..., 2:4] = rng.normal(2, 0.5, (anchor_count, 2))
+    # background below the score threshold, some objects of other classes
+    # and people seen by a few anchors each
+    output[..., 4] = rng.uniform(0, 0.3, anchor_count) ** 2
+    output[..., 5:] = rng.uniform(0, 1, (anchor_count, 80)) ** 4
+    object_anchors = rng.choice(anchor_count, (people + 20) * 8,
+                                replace=False)
+    other_anchors = object_anchors[people * 8:]
+    person_anchors = object_anchors[:people * 8]
+    output[0, object_anchors, 4] = rng.uniform(0.6, 1, len(object_anchors))
+    output[0, object_anchors, 5:] *= 0.1
+    output[0, person_anchors, 5] = rng.uniform(0.8, 1, len(person_anchors))
+    output[0, other_anchors, rng.integers(6, 85, len(other_anchors))] = \
+        rng.uniform(0.8, 1, len(other_anchors))
+    return output
+
+
+def previous_postprocess(output: np.ndarray) -> np.ndarray:
+    predictions = demo_postprocess(output, input_shape, p6=False)[0]
+    boxes = predictions[:, :4]
+    scores = predictions[:, 4:5] * predictions[:, 5:]
+    boxes_xyxy = np.ones_like(boxes)
+    boxes_xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2.
+    boxes_xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2.
+    boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2.
+    boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2.
+    boxes_xyxy /= ratio
+    detections = multiclass_nms(boxes_xyxy, scores, nms_thr, score_thr)
+    return detections[detections[:, 5] == 0][:, :-1]
+
+
+def measure(people: int, cached: bool) -> None:
+    output = create_output(people)
+    postprocess = YoloxPostprocessor()
+    times = []
+    for _ in range(frame_count):
+        # the session returns a new output every frame
+        frame_output = output.copy()
+        start_time = time.perf_counter()
+        if cached:
+            postprocess(frame_output[0], input_shape, ratio,
+                        score_thr, nms_thr)
+        else:
+            previous_postprocess(frame_output)
+        times.append(time.perf_counter() - start_time)
+
+    name = 'cached' if cached else 'previous'
+    times_ms = np.array(times) * 1e3
+    print(f'{name:8s} {people:2d} people: '
+          f'mean {np.mean(times_ms):7.3f} ms, '
+          f'p99 {np.percentile(times_ms, 99):7.3f} ms')
+
+
+if __name__ == '__main__':
+    for people in [1, 10]:
+        for cached in [False, True]:
+            measure(people, cached)
@@ -0,0 +1,94 @@
+# flake8: noqa
+
+import os.path
+import queue
+import sys
+import time
+from multiprocessing import Process, Queue
+from typing import Generator, List, Type
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from pipeline.data import (BaseData, CloseData, DataCollection,
+                           pipeline_data_generator)
+
+stage_count = 4
+message_count = 200
+idle_time = 2.0
+
+
+class SendData(BaseData):
+    def __init__(self, send_time: float) -> None:
+        super().__init__()
+        self.send_time = send_time
+
+
+def polling_data_generator(
+    input_queue: Queue,
+    output_queue: Queue,
+    expected_data: List[Type]
+) -> Generator[DataCollection, None, None]:
+    # consumption loop used before the pipeline stages blocked on get
+    while True:
+        try:
+            data = input_queue.get(timeout=0.01)
+            if data.is_closed():
+                output_queue.put(data)
+                break
+            yield data
+        except queue.Empty:
+            pass
+
+
+def stage(
+    input_queue: Queue,
+    output_queue: Queue,
+    polling: bool,
+    cpu_queue: Queue
+) -> None:
+    generator = polling_data_generator if polling \
+        else pipeline_data_generator
+    for data in generator(input_queue, output_queue, [SendData]):
+        output_queue.put(data)
+    cpu_queue.put(time.process_time())
+
+
+def measure(polling: bool) -> None:
+    queues: List[Queue] = [Queue() for _ in range(stage_count + 1)]
+    cpu_queue: Queue = Queue()
+    stages = [
+        Process(target=stage, args=(
+            queues[index], queues[index + 1], polling, cpu_queue))
+        for index in range(stage_count)
+    ]
+    for process in stages:
+        process.start()
+
+    latencies = []
+    for _ in range(message_count):
+        queues[0].put(DataCollection().add(SendData(time.perf_counter())))
+        data = queues[-1].get()
+        latencies.append(time.perf_counter() - data.get(SendData).send_time)
+        time.sleep(0.005)
+    # stages only wait for data now, their cpu time is the idle cost
+    time.sleep(idle_time)
+    queues[0].put(DataCollection().add(CloseData()))
+    queues[-1].get()
+    cpu_times = [cpu_queue.get() for _ in range(stage_count)]
+    for process in stages:
+        process.join()
+
+    name = 'polling' if polling else 'blocking'
+    hop_us = np.array(latencies) * 1e6 / stage_count
+    print(f'{name:8s} per hop: mean {np.mean(hop_us):8.1f} us, '
+          f'p99 {np.percentile(hop_us, 99):8.1f} us, '
+          f'cpu per stage {np.mean(cpu_times):.3f} s '
+          f'(incl. {idle_time:.1f} s idle)')
+
+
+if __name__ == '__main__':
+    for polling in [True, False]:
+        measure(polling)
@@ -0,0 +1,57 @@
+# flake8: noqa
+
+import os.path
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__), '..', '..', 'src')))  # type: ignore  # noqa
+
+from segmentation.base import Segmentation
+from segmentation.onnx_sam import OnnxSam, OnnxSamSettings
+
+repeat_count = 5
+image_shape = (540, 960, 3)
+
+
+def iou(a: np.ndarray, b: np.ndarray) -> float:
+    return np.sum(a & b) / max(np.sum(a | b), 1)
+
+
+def measure(name: str, segment: Segmentation, boxes: np.ndarray) -> np.ndarray:
+    image = np.random.default_rng(0).integers(
+        0, 256, image_shape, dtype=np.uint8)
+    segment.set_image(image)
+    start_time = time.perf_counter()
+    for _ in range(repeat_count):
+        segment.set_image(image)
+    encode_ms = (time.perf_counter() - start_time) * 1e3 / repeat_count
+    start_time = time.perf_counter()
+    for _ in range(repeat_count):
+        masks = segment.bbox_masks_batch(boxes)
+    decode_ms = (time.perf_counter() - start_time) * 1e3 / repeat_count
+    print(f'{name:12s}: encoder {encode_ms:7.1f} ms, '
+          f'{len(boxes)} masks {decode_ms:7.1f} ms')
+    return masks
+
+
+if __name__ == '__main__':
+    # models exported with src/export_segmentation.py
+    model = 'sam' if len(sys.argv) > 1 and sys.argv[1] == 'slow' else \
+        'mobile_sam'
+    boxes = np.array([[100, 50, 220, 350], [400, 100, 520, 400],
+                      [700, 150, 820, 450], [300, 200, 380, 380]], dtype=float)
+    if model == 'sam':
+        from segmentation.sam import Sam
+        reference = measure('pytorch', Sam(), boxes)
+    else:
+        from segmentation.mobile_sam import MobileSam
+        reference = measure('pytorch', MobileSam(), boxes)
+    for quantized in [False, True]:
+        name = 'onnx int8' if quantized else 'onnx'
+        masks = measure(name, OnnxSam(OnnxSamSettings(model, quantized)), boxes)
+        print(f'{"":12s}  mask IoU to pytorch ' + ', '.join(
+            f'{iou(mask[0], expected[0]):.3f}'
+            for mask, expected in zip(masks, reference)))
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from functools import partial
+from multiprocessing import Queue
+
+import numpy as np
+import pytest
+
+from frame.producer import FrameData, release_frame
+from frame.shared import FramePool
+from pipeline.data import CloseData, DataCollection, pipeline_data_generator
+
+
+def test_data_collections_are_independent() -> None:
+    first = DataCollection().add(CloseData())
+    assert not DataCollection().has(CloseData)
+    assert first.has(CloseData)
+
+
+def fail_stage(
+    input_queue: Queue[DataCollection],
+    output_queue: Queue[DataCollection],
+    frame_pool: FramePool
+) -> None:
+    for _ in pipeline_data_generator(
+        input_queue,
+        output_queue,
+        [FrameData],
+        partial(release_frame, frame_pool=frame_pool)
+    ):
+        raise RuntimeError('stage failed')
+
+
+def test_failed_stage_releases_frame() -> None:
+    frame_pool = FramePool(np.zeros((2, 2, 3), dtype=np.uint8), 2)
+    try:
+        input_queue: Queue[DataCollection] = Queue()
+        input_queue.put(DataCollection().add(
+            FrameData(np.zeros((2, 2, 3), dtype=np.uint8), frame_pool)))
+        assert frame_pool.free_frames.qsize() == 1
+        with pytest.raises(RuntimeError):
+            fail_stage(input_queue, Queue(), frame_pool)
+        assert frame_pool.free_frames.qsize() == 2
+    finally:
+        frame_pool.close()
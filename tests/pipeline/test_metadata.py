@@ -0,0 +1,86 @@
+import pickle
+from typing import Generator, List
+
+import numpy as np
+import pytest
+
+from frame.shared import FramePool
+from pipeline.data import DataCollection
+from pipeline.metadata import LANDMARK_COUNT, RAW_LANDMARK_COUNT
+from pipeline.stats import queue_bytes
+from segmentation.producer import SegmentationData
+from tracking.producer import TrackingData
+
+
+@pytest.fixture
+def frame_pool() -> Generator[FramePool, None, None]:
+    pool = FramePool(np.zeros((4, 6, 3), dtype=np.uint8), 2)
+    yield pool
+    pool.close()
+
+
+def create_targets(count: int) -> List[np.ndarray]:
+    return [np.arange(9, dtype=float) + id for id in range(count)]
+
+
+def test_tracking_data_transport(frame_pool: FramePool) -> None:
+    slot = frame_pool.reserve()
+    sizes = []
+    for count in [0, 1, 5, 16]:
+        targets = create_targets(count)
+        pickled = pickle.dumps(TrackingData(targets, frame_pool, slot))
+        sizes.append(len(pickled))
+        tracking_data = pickle.loads(pickled)
+        assert len(tracking_data.targets) == count
+        for target, expected in zip(tracking_data.targets, targets):
+            assert np.array_equal(target, expected)
+    assert len(set(sizes)) == 1
+
+
+def test_tracking_data_fallback(frame_pool: FramePool) -> None:
+    targets = create_targets(17)
+    for tracking_data in [TrackingData(targets),
+                          TrackingData(targets, frame_pool, 0)]:
+        unpickled = pickle.loads(pickle.dumps(tracking_data))
+        assert unpickled.store is None
+        assert np.array_equal(unpickled.targets, targets)
+
+
+def test_landmark_records(frame_pool: FramePool) -> None:
+    assert frame_pool.metadata is not None
+    landmarks = [np.ones((LANDMARK_COUNT, 4)), np.array([])]
+    raw_landmarks = [np.full((RAW_LANDMARK_COUNT, 4), 2.0), None]
+    frame_pool.metadata.write_landmarks(1, landmarks, raw_landmarks)
+    read_landmarks, read_raw = frame_pool.metadata.read_landmarks(1)
+    assert np.array_equal(read_landmarks[0], landmarks[0])
+    assert read_landmarks[1].size == 0
+    assert np.array_equal(read_raw[0], raw_landmarks[0])
+    assert read_raw[1] is None
+
+
+def test_mask_store(frame_pool: FramePool) -> None:
+    assert frame_pool.mask_store is not None
+    masks = [
+        [np.random.rand(3, 5) > 0.5],
+        [np.random.rand(4, 6)[1:, 2:] > 0.5, np.zeros((0, 2), dtype=bool)],
+    ]
+    layout = frame_pool.mask_store.write(1, masks)
+    assert layout is not None
+    for person_masks, entries in zip(masks, layout):
+        for mask, (offset, shape) in zip(person_masks, entries):
+            assert np.array_equal(
+                frame_pool.mask_store.read(1, offset, shape), mask)
+    # 2 * 4 * 6 pixels fit into a slot
+    assert frame_pool.mask_store.write(0, [[np.ones((7, 7), dtype=bool)]]) \
+        is None
+
+
+def test_queue_bytes(frame_pool: FramePool) -> None:
+    masks = [[np.ones((3, 5), dtype=bool)]]
+    targets = create_targets(2)
+    shared = DataCollection().add(TrackingData(targets, frame_pool, 1)).add(
+        SegmentationData(masks, frame_pool=frame_pool, slot=1))
+    assert queue_bytes(pickle.loads(pickle.dumps(shared))) == 0
+    copied = DataCollection().add(TrackingData(targets)).add(
+        SegmentationData(masks))
+    assert queue_bytes(pickle.loads(pickle.dumps(copied))) == 2 * 9 * 8 + 15
@@ -0,0 +1,75 @@
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from frame.producer import FrameData
+from pipeline.data import CloseData, DataCollection
+from pipeline.reorder import ReorderBuffer
+
+
+def create_data(
+    sequence: int,
+    skipped: Optional[List[int]] = None
+) -> DataCollection:
+    frame_data = FrameData(
+        np.zeros((2, 2, 3), dtype=np.uint8), sequence=sequence)
+    frame_data.skipped = skipped or []
+    return DataCollection().add(frame_data)
+
+
+def sequences(data: List[DataCollection]) -> List[int]:
+    return [d.get(FrameData).sequence for d in data]
+
+
+def test_reorder() -> None:
+    reorder = ReorderBuffer(latency=None)
+    reorder.push(create_data(1))
+    assert sequences(reorder.pop()) == [1]
+    for sequence in [3, 4]:
+        reorder.push(create_data(sequence))
+    assert reorder.pop() == []
+    reorder.push(create_data(2))
+    assert sequences(reorder.pop()) == [2, 3, 4]
+    reorder.push(create_data(1))
+    assert reorder.pop() == []
+    assert reorder.late_frames == 1
+
+
+def test_reorder_gives_up_late_frames() -> None:
+    reorder = ReorderBuffer(latency=0.01)
+    reorder.push(create_data(1))
+    reorder.push(create_data(3))
+    assert sequences(reorder.pop()) == [1]
+    time.sleep(0.02)
+    assert sequences(reorder.pop()) == [3]
+    assert reorder.skipped_frames == 1
+    reorder.push(create_data(2))
+    assert reorder.pop() == []
+    assert reorder.late_frames == 1
+
+
+def test_reorder_does_not_wait_for_discarded_frames() -> None:
+    reorder = ReorderBuffer(latency=None)
+    reorder.push(create_data(1))
+    assert sequences(reorder.pop()) == [1]
+    # 2 and 4 were discarded by a stage after the sequence was assigned
+    reorder.push(create_data(3, [2]))
+    assert sequences(reorder.pop()) == [3]
+    reorder.push(create_data(6, [4]))
+    assert reorder.pop() == []
+    reorder.push(create_data(5))
+    assert sequences(reorder.pop()) == [5, 6]
+    assert reorder.skipped_frames == 0
+    assert not reorder.discarded
+
+
+def test_reorder_flushes_on_close() -> None:
+    reorder = ReorderBuffer(latency=None)
+    for sequence in [1, 4, 3]:
+        reorder.push(create_data(sequence))
+    close = DataCollection().add(CloseData())
+    reorder.push(close)
+    ready = reorder.pop()
+    assert sequences(ready[:-1]) == [1, 3, 4]
+    assert ready[-1] is close
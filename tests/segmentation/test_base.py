@@ -0,0 +1,22 @@
+import numpy as np
+
+from segmentation.base import pad_point_prompts
+
+
+def test_pad_point_prompts() -> None:
+    points = [
+        np.array([[1., 2.], [3., 4.]]),
+        None,
+        np.array([[5., 6.], [7., 8.], [9., 10.]]),
+    ]
+    modes = [None, None, np.array([1., 0., 1.])]
+    coords, labels = pad_point_prompts(3, points, modes)
+    assert coords is not None and labels is not None
+    assert coords.shape == (3, 3, 2)
+    assert labels.tolist() == [[1, 1, -1], [-1, -1, -1], [1, 0, 1]]
+    assert coords[0, :2].tolist() == points[0].tolist()  # type: ignore
+
+
+def test_pad_point_prompts_without_points() -> None:
+    assert pad_point_prompts(2) == (None, None)
+    assert pad_point_prompts(2, [None, np.zeros((0, 2))]) == (None, None)
@@ -0,0 +1,104 @@
+from argparse import ArgumentParser
+
+import numpy as np
+
+from segmentation.base import Predictor, Segmentation
+from segmentation.cache import (EmbeddingCache, EmbeddingCacheSettings,
+                                add_embedding_cache_parameters,
+                                parse_embedding_cache_settings)
+
+
+class CountingPredictor(Predictor):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def set_image(self, image: np.ndarray) -> None:
+        self.calls += 1
+
+
+def test_embedding_cache_reuses_static_scene() -> None:
+    cache = EmbeddingCache(EmbeddingCacheSettings(threshold=5, max_age=3))
+    image = np.full((90, 160, 3), 100, dtype=np.uint8)
+    reused = [cache.reuse(image) for _ in range(8)]
+    # encoded again once the embedding is max_age frames old
+    assert reused == [False, True, True, True, False, True, True, True]
+    assert cache.encoder_calls == 2
+    assert cache.hit_rate() == 6 / 8
+
+
+def test_embedding_cache_detects_local_change() -> None:
+    cache = EmbeddingCache(EmbeddingCacheSettings(threshold=5, max_age=100))
+    image = np.full((90, 160, 3), 100, dtype=np.uint8)
+    assert not cache.reuse(image)
+    # a small region changes, the whole image barely
+    image[:20, :40] = 200
+    assert not cache.reuse(image)
+    assert cache.reuse(image)
+    # other frame size can not use the embedding
+    assert not cache.reuse(np.full((120, 160, 3), 100, dtype=np.uint8))
+
+
+def test_embedding_cache_invalidate() -> None:
+    cache = EmbeddingCache(EmbeddingCacheSettings(threshold=5))
+    image = np.full((90, 160, 3), 100, dtype=np.uint8)
+    assert not cache.reuse(image)
+    assert cache.reuse(image)
+    cache.invalidate()
+    assert not cache.reuse(image)
+
+
+def test_embedding_cache_disabled_by_default() -> None:
+    segmentation = Segmentation()
+    predictor = CountingPredictor()
+    segmentation.predictor = predictor
+    image = np.zeros((90, 160, 3), dtype=np.uint8)
+    for _ in range(3):
+        segmentation.set_image(image)
+    assert predictor.calls == 3
+    assert segmentation.cache.hit_rate() == 0.0
+
+    segmentation = Segmentation(EmbeddingCacheSettings(threshold=5))
+    segmentation.predictor = predictor
+    for _ in range(3):
+        segmentation.set_image(image)
+    assert predictor.calls == 4
+
+
+class ExportCountingSegmentation(Segmentation):
+    def __init__(self) -> None:
+        super().__init__(EmbeddingCacheSettings(threshold=5))
+        self.predictor = CountingPredictor()
+        self.exports = 0
+
+    def get_image_embedding(self) -> np.ndarray:
+        self.exports += 1
+        return np.full((1, 256, 4, 4), self.predictor.calls)
+
+
+def test_image_embedding_exported_on_access() -> None:
+    assert ExportCountingSegmentation().image_embedding is None
+    segmentation = ExportCountingSegmentation()
+    image = np.zeros((90, 160, 3), dtype=np.uint8)
+    for _ in range(3):
+        segmentation.set_image(image)
+    assert segmentation.exports == 0
+    assert segmentation.image_embedding[0, 0, 0, 0] == 1
+    assert segmentation.image_embedding[0, 0, 0, 0] == 1
+    assert segmentation.exports == 1
+
+    # a newly encoded image is exported again on access
+    segmentation.set_image(np.full((90, 160, 3), 255, dtype=np.uint8))
+    assert segmentation.exports == 1
+    assert segmentation.image_embedding[0, 0, 0, 0] == 2
+    assert segmentation.exports == 2
+
+
+def test_parse_embedding_cache_settings() -> None:
+    parser = add_embedding_cache_parameters(ArgumentParser())
+    args = vars(parser.parse_args(
+        ['--segment-cache', '4', '--segment-cache-age', '10']))
+    assert parse_embedding_cache_settings(args) == \
+        EmbeddingCacheSettings(4.0, 10)
+    defaults = vars(parser.parse_args([]))
+    assert parse_embedding_cache_settings(defaults) == \
+        EmbeddingCacheSettings()
@@ -0,0 +1,56 @@
+from argparse import ArgumentParser
+
+import numpy as np
+
+from segmentation.crop import (CropSettings, SegmentationCrop,
+                               add_crop_parameters, fit_region,
+                               parse_crop_settings)
+
+IMAGE_SHAPE = (1080, 1920, 3)
+
+
+def test_fit_region() -> None:
+    # a standing person is widened to a square with margin
+    region = fit_region(np.array([900, 300, 1000, 700]), IMAGE_SHAPE, 0.1)
+    assert region == (710, 260, 1190, 740)
+    # shifted into the image at the border
+    region = fit_region(np.array([0, 600, 100, 1000]), IMAGE_SHAPE, 0.1)
+    assert region == (0, 560, 480, 1040)
+    # distant people get at least the minimal size
+    region = fit_region(np.array([500, 500, 520, 540]), IMAGE_SHAPE, 0.1, 256)
+    assert region == (382, 392, 638, 648)
+    # regions larger than the image height only grow in width
+    region = fit_region(np.array([100, 0, 1800, 1080]), IMAGE_SHAPE, 0.1)
+    assert region == (0, 0, 1920, 1080)
+
+
+def test_segmentation_crop_keeps_region() -> None:
+    crop = SegmentationCrop(CropSettings(True, 0.1))
+    boxes = np.array([[900, 300, 1000, 700]], dtype=float)
+    region, changed = crop.update(boxes, IMAGE_SHAPE)
+    assert changed and region == (710, 260, 1190, 740)
+    # small movements stay within the region
+    region, changed = crop.update(boxes + 20, IMAGE_SHAPE)
+    assert not changed and region == (710, 260, 1190, 740)
+
+    # a second person enlarges the region to the union of the boxes
+    boxes = np.array([[900, 300, 1000, 700], [1600, 400, 1700, 800]])
+    region, changed = crop.update(boxes, IMAGE_SHAPE)
+    assert changed and region[0] <= 900 and region[2] >= 1700
+    # and leaving shrinks it again
+    region, changed = crop.update(boxes[:1], IMAGE_SHAPE)
+    assert changed and region == (710, 260, 1190, 740)
+
+    region, changed = crop.update(np.zeros((0, 4)), IMAGE_SHAPE)
+    assert changed and region is None
+    region, changed = crop.update(np.zeros((0, 4)), IMAGE_SHAPE)
+    assert not changed
+
+
+def test_parse_crop_settings() -> None:
+    parser = add_crop_parameters(ArgumentParser())
+    args = vars(parser.parse_args(
+        ['--segment-crop', '--segment-crop-margin', '0.2']))
+    assert parse_crop_settings(args) == CropSettings(True, 0.2)
+    assert parse_crop_settings(vars(parser.parse_args([]))) == \
+        CropSettings()
@@ -0,0 +1,121 @@
+import os
+from argparse import ArgumentParser
+from typing import Iterator
+
+import cv2
+import numpy as np
+import pytest
+import torch
+from segment_anything import SamPredictor
+from segment_anything.modeling import (ImageEncoderViT, MaskDecoder,
+                                       PromptEncoder, Sam, TwoWayTransformer)
+
+from segmentation.export import (export_decoder, export_encoder,
+                                 quantize_encoder)
+from segmentation.onnx_sam import (OnnxSam, OnnxSamSettings,
+                                   add_onnx_sam_parameters, encoder_path,
+                                   parse_onnx_sam_settings)
+from util.session import SessionSettings
+
+MODEL_DIR = 'tests/tmp'
+
+
+def small_sam() -> Sam:
+    """
+    SAM with random weights and a single encoder block, the embedding has
+    the shape of the released models.
+    """
+    torch.manual_seed(0)
+    encoder = ImageEncoderViT(
+        depth=1, embed_dim=32, img_size=1024, mlp_ratio=2, num_heads=2,
+        patch_size=16, qkv_bias=True, use_rel_pos=True, window_size=14,
+        out_chans=256, global_attn_indexes=())
+    prompt_encoder = PromptEncoder(
+        embed_dim=256, image_embedding_size=(64, 64),
+        input_image_size=(1024, 1024), mask_in_chans=16)
+    decoder = MaskDecoder(
+        num_multimask_outputs=3,
+        transformer=TwoWayTransformer(
+            depth=2, embedding_dim=256, mlp_dim=512, num_heads=8),
+        transformer_dim=256, iou_head_depth=3, iou_head_hidden_dim=256)
+    return Sam(encoder, prompt_encoder, decoder,
+               pixel_mean=[123.675, 116.28, 103.53],
+               pixel_std=[58.395, 57.12, 57.375]).eval()
+
+
+def fixture_image() -> np.ndarray:
+    image = np.full((480, 640, 3), 60, dtype=np.uint8)
+    image[:, :, 0] = np.linspace(0, 255, 640, dtype=np.uint8)
+    cv2.rectangle(image, (100, 60), (220, 420), (30, 200, 90), -1)
+    cv2.circle(image, (450, 180), 80, (240, 240, 20), -1)
+    return image
+
+
+def iou(a: np.ndarray, b: np.ndarray) -> float:
+    return np.sum(a & b) / max(np.sum(a | b), 1)
+
+
+@pytest.fixture(scope='module')
+def model() -> Iterator[Sam]:
+    sam = small_sam()
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    export_encoder(sam, os.path.join(MODEL_DIR, 'small_sam_encoder.onnx'))
+    export_decoder(sam, os.path.join(MODEL_DIR, 'small_sam_decoder.onnx'))
+    yield sam
+
+
+def test_onnx_sam_masks_match_torch(model: Sam) -> None:
+    image = fixture_image()
+    predictor = SamPredictor(model)
+    predictor.set_image(image)
+    segment = OnnxSam(OnnxSamSettings('small_sam', model_dir=MODEL_DIR))
+    segment.set_image(image)
+    assert segment.image_embedding.shape == (1, 256, 64, 64)
+    # resizing differs slightly from the PIL resize of SamPredictor
+    assert np.allclose(segment.image_embedding,
+                       predictor.get_image_embedding().numpy(), atol=0.05)
+
+    # more boxes than the batch size
+    boxes = np.array([[90, 50, 230, 350], [360, 90, 540, 270],
+                      [0, 0, 640, 480], [300, 200, 400, 300],
+                      [80, 40, 560, 300]], dtype=float)
+    masks = segment.bbox_masks_batch(boxes)
+    assert masks.shape == (5, 1, 480, 640)
+    for id, box in enumerate(boxes):
+        expected, _, _ = predictor.predict(
+            box=box[None, :], multimask_output=False)
+        assert expected.any() and not expected.all()
+        assert iou(masks[id, 0], expected[0]) > 0.95
+
+    points = np.array([[450, 180], [380, 120]])
+    modes = np.array([1, 0])
+    expected, _, _ = predictor.predict(
+        points, modes, boxes[1][None, :], multimask_output=False)
+    mask = segment.bbox_masks(boxes[1], points, modes)
+    assert mask.shape == (1, 480, 640)
+    assert iou(mask[0], expected[0]) > 0.95
+
+
+def test_onnx_sam_quantized_encoder(model: Sam) -> None:
+    settings = OnnxSamSettings('small_sam', model_dir=MODEL_DIR)
+    quantize_encoder(encoder_path(settings),
+                     os.path.join(MODEL_DIR, 'small_sam_encoder_int8.onnx'))
+    image = fixture_image()
+    box = np.array([90, 50, 230, 350], dtype=float)
+    masks = []
+    for quantized in [False, True]:
+        segment = OnnxSam(OnnxSamSettings(
+            'small_sam', quantized, MODEL_DIR,
+            SessionSettings(io_binding=True)))
+        segment.set_image(image)
+        masks.append(segment.bbox_masks(box))
+    assert iou(masks[0], masks[1]) > 0.8
+
+
+def test_parse_onnx_sam_settings() -> None:
+    parser = add_onnx_sam_parameters(ArgumentParser())
+    args = vars(parser.parse_args(
+        ['--segment-onnx', 'sam', '--segment-int8', '--segment-threads', '2']))
+    assert parse_onnx_sam_settings(args) == OnnxSamSettings(
+        'sam', True, session=SessionSettings(2))
+    assert parse_onnx_sam_settings(vars(parser.parse_args([]))) is None
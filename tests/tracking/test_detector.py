@@ -0,0 +1,126 @@
+import os
+from argparse import ArgumentParser
+from typing import Iterator, List, Union
+
+import numpy as np
+import onnx
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+from tracking.detector import (DETECTORS, DetectorModel, DetectorSettings,
+                               YoloxDetector, add_detector_parameters,
+                               create_detector, parse_detector_settings,
+                               register_detector)
+from tracking.quantize import quantize_detector
+
+MODEL_DIR = 'tests/tmp'
+
+
+def save_yolox_like_model(path: str, input_size: Union[int, str]) -> None:
+    """
+    Saves a model with random weights and the output layout of YOLOX, one
+    convolution per stride.
+    """
+    rng = np.random.default_rng(0)
+    nodes = []
+    initializers = []
+    outputs = []
+    for stride in [8, 16, 32]:
+        weight = rng.normal(0, 0.01, (85, 3, stride, stride))
+        initializers += [
+            numpy_helper.from_array(weight.astype(np.float32), f'w{stride}'),
+            numpy_helper.from_array(np.zeros(85, np.float32), f'b{stride}'),
+        ]
+        nodes += [
+            helper.make_node('Conv', ['images', f'w{stride}', f'b{stride}'],
+                             [f'conv{stride}'], strides=[stride, stride]),
+            helper.make_node('Reshape', [f'conv{stride}', 'shape'],
+                             [f'flat{stride}']),
+        ]
+        outputs.append(f'flat{stride}')
+    initializers.append(numpy_helper.from_array(
+        np.array([1, 85, -1], dtype=np.int64), 'shape'))
+    nodes += [
+        helper.make_node('Concat', outputs, ['concat'], axis=2),
+        helper.make_node('Transpose', ['concat'], ['output'],
+                         perm=[0, 2, 1]),
+    ]
+    graph = helper.make_graph(
+        nodes, 'yolox_like',
+        [helper.make_tensor_value_info(
+            'images', TensorProto.FLOAT, [1, 3, input_size, input_size])],
+        [helper.make_tensor_value_info(
+            'output', TensorProto.FLOAT, [1, None, 85])],
+        initializers)
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+def frames(count: int) -> Iterator[np.ndarray]:
+    rng = np.random.default_rng(1)
+    for _ in range(count):
+        yield rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def models() -> Iterator[List[str]]:
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    save_yolox_like_model(os.path.join(MODEL_DIR, 'fixed.onnx'), 64)
+    save_yolox_like_model(os.path.join(MODEL_DIR, 'dynamic.onnx'), 'size')
+    register_detector('fixed', DetectorModel(YoloxDetector, 'fixed', 32))
+    register_detector('dynamic', DetectorModel(YoloxDetector, 'dynamic', 32))
+    yield ['fixed', 'dynamic']
+    del DETECTORS['fixed']
+    del DETECTORS['dynamic']
+
+
+def test_create_detector(models: List[str]) -> None:
+    image = next(frames(1))
+    detector = create_detector(DetectorSettings(
+        'fixed', model_dir=MODEL_DIR, score_thr=0.0))
+    assert detector.input_shape == (64, 64)
+    detections = detector.detect(image)
+    assert detections.shape[1] == 5
+    assert len(detections) > 0
+    with pytest.raises(AssertionError):
+        create_detector(DetectorSettings(
+            'fixed', input_size=96, model_dir=MODEL_DIR))
+
+    dynamic = create_detector(DetectorSettings(
+        'dynamic', model_dir=MODEL_DIR))
+    assert dynamic.input_shape == (32, 32)
+    dynamic = create_detector(DetectorSettings(
+        'dynamic', input_size=96, model_dir=MODEL_DIR, score_thr=0.0))
+    assert dynamic.input_shape == (96, 96)
+    assert dynamic.detect(image).shape[1] == 5
+
+
+def test_quantize_detector(models: List[str]) -> None:
+    count = quantize_detector(
+        os.path.join(MODEL_DIR, 'fixed.onnx'),
+        os.path.join(MODEL_DIR, 'fixed_int8.onnx'),
+        frames(4),
+        (64, 64))
+    assert count == 4
+    operators = {node.op_type for node in onnx.load(
+        os.path.join(MODEL_DIR, 'fixed_int8.onnx')).graph.node}
+    assert 'QuantizeLinear' in operators
+
+    settings = DetectorSettings('fixed', quantized=True, model_dir=MODEL_DIR)
+    detector = create_detector(settings)
+    assert isinstance(detector, YoloxDetector)
+    assert detector.session.session._model_path.endswith('fixed_int8.onnx')
+    assert detector.detect(next(frames(1))).shape[1] == 5
+
+
+def test_parse_detector_settings() -> None:
+    parser = add_detector_parameters(ArgumentParser())
+    args = vars(parser.parse_args([
+        '--track-model', 'yolox-s', '--track-input-size', '512',
+        '--track-int8', '--track-score', '0.3', '--track-nms', '0.5']))
+    assert parse_detector_settings(args) == DetectorSettings(
+        'yolox-s', 512, True, 0.3, 0.5)
+    defaults = vars(parser.parse_args([]))
+    assert parse_detector_settings(defaults) == DetectorSettings()
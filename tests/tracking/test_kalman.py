@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from ocsort.kalmanfilter import KalmanFilterNew
+from tracking.kalman import BOX_F, BOX_H, BoxKalmanFilter, box_noise
+
+
+def reference_filter(z: np.ndarray) -> KalmanFilterNew:
+    kf = KalmanFilterNew(dim_x=7, dim_z=4)
+    kf.F = BOX_F.copy()
+    kf.H = BOX_H.copy()
+    kf.P, kf.Q, kf.R = box_noise()
+    kf.x[:4] = z
+    return kf
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_box_filter_matches_generic_filter() -> None:
+    rng = np.random.default_rng(0)
+    z = np.array([[200.], [150.], [5000.], [0.5]])
+    expected = reference_filter(z)
+    result = BoxKalmanFilter(z)
+    for step in range(100):
+        expected.predict()
+        result.predict()
+        z = z + np.array([[3.], [-2.], [20.], [0.]]) \
+            + rng.normal(0, 1, (4, 1)) * [[1.], [1.], [10.], [0.01]]
+        # gaps of increasing length to exercise the re-update
+        observation = None if step % 15 > 14 - step // 15 else z
+        expected.update(observation)
+        result.update(observation)
+        assert np.allclose(expected.x, result.x)
+        assert np.allclose(expected.P, result.P)
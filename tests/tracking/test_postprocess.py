@@ -0,0 +1,77 @@
+import numpy as np
+
+from ocsort.utils import demo_postprocess, multiclass_nms, nms
+from tracking.postprocess import YoloxPostprocessor, nms_boxes
+
+INPUT_SHAPE = (416, 416)
+ANCHOR_COUNT = 52 * 52 + 26 * 26 + 13 * 13
+
+
+def yolox_output(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    output = np.zeros((1, ANCHOR_COUNT, 85), dtype=np.float32)
+    output[..., :2] = rng.uniform(0, 1, (ANCHOR_COUNT, 2))
+    output[..., 2:4] = rng.normal(1, 0.5, (ANCHOR_COUNT, 2))
+    # few anchors see an object
+    output[..., 4] = np.where(rng.uniform(0, 1, ANCHOR_COUNT) < 0.05,
+                              rng.uniform(0.3, 1, ANCHOR_COUNT), 0.01)
+    output[..., 5:] = rng.uniform(0, 1, (ANCHOR_COUNT, 80)) ** 2
+    return output
+
+
+def reference(
+    output: np.ndarray,
+    ratio: float,
+    score_thr: float,
+    nms_thr: float
+) -> np.ndarray:
+    # postprocessing of all classes as done by the tracker before
+    predictions = demo_postprocess(output.copy(), INPUT_SHAPE)[0]
+    boxes = predictions[:, :4]
+    scores = predictions[:, 4:5] * predictions[:, 5:]
+    boxes_xyxy = np.ones_like(boxes)
+    boxes_xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2.
+    boxes_xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2.
+    boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2.
+    boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2.
+    boxes_xyxy /= ratio
+    detections = multiclass_nms(boxes_xyxy, scores, nms_thr, score_thr)
+    return detections[detections[:, 5] == 0][:, :-1]
+
+
+def test_postprocess_matches_reference() -> None:
+    postprocess = YoloxPostprocessor()
+    for seed, ratio in enumerate([1.0, 0.65, 0.216]):
+        output = yolox_output(seed)
+        expected = reference(output, ratio, 0.1, 0.7)
+        result = postprocess(output[0], INPUT_SHAPE, ratio, 0.1, 0.7)
+        assert len(expected) > 0
+        assert result.shape == expected.shape
+        assert np.allclose(result, expected, rtol=1e-5)
+    assert len(postprocess.grids) == 1
+
+
+def test_postprocess_without_detections() -> None:
+    output = yolox_output(0)
+    output[..., 4] = 0.
+    result = YoloxPostprocessor()(output[0], INPUT_SHAPE, 1.0, 0.1, 0.7)
+    assert result.shape == (0, 5)
+
+
+def test_nms_boxes_matches_nms() -> None:
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        count = rng.integers(1, 300)
+        corners = rng.uniform(0, 1000, (count, 2))
+        boxes = np.concatenate(
+            [corners, corners + rng.uniform(20, 200, (count, 2))], 1)
+        scores = rng.uniform(0.1, 1, count)
+        assert list(nms_boxes(boxes, scores, 0.7)) == \
+            list(nms(boxes, scores, 0.7))
+
+
+def test_nms_boxes_top_k() -> None:
+    boxes = np.array([[0, 0, 10, 10], [100, 100, 110, 110],
+                      [200, 200, 210, 210]], dtype=float)
+    scores = np.array([0.5, 0.9, 0.7])
+    assert list(nms_boxes(boxes, scores, 0.7, top_k=2)) == [1, 2]
@@ -0,0 +1,29 @@
+import numpy as np
+
+from ocsort.preprocess import preproc
+from tracking.preprocess import LetterboxPreprocessor
+
+INPUT_SHAPE = (416, 416)
+
+
+def test_preprocess_matches_preproc() -> None:
+    rng = np.random.default_rng(0)
+    preprocess = LetterboxPreprocessor(INPUT_SHAPE)
+    # frame sizes change to check that old content is padded again
+    for shape in [(1080, 1920, 3), (1920, 1080, 3), (1080, 1920, 3),
+                  (240, 320, 3)]:
+        image = rng.integers(0, 256, shape, dtype=np.uint8)
+        expected, expected_ratio = preproc(image, INPUT_SHAPE, None, None)
+        tensor, ratio = preprocess(image)
+        assert tensor.shape == (1, 3, *INPUT_SHAPE)
+        assert tensor.dtype == np.float32
+        assert ratio == expected_ratio
+        assert np.array_equal(tensor[0], expected)
+
+
+def test_preprocess_reuses_tensor() -> None:
+    preprocess = LetterboxPreprocessor(INPUT_SHAPE)
+    image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    first, _ = preprocess(image)
+    second, _ = preprocess(image)
+    assert first is second
@@ -0,0 +1,31 @@
+import numpy as np
+
+from tracking.schedule import DetectionScheduler, DetectionSettings
+
+
+def test_detection_interval() -> None:
+    schedule = DetectionScheduler(DetectionSettings(interval=3))
+    image = np.zeros((90, 160, 3), dtype=np.uint8)
+    detected = [schedule(image) for _ in range(9)]
+    assert detected == [True, False, False] * 3
+    assert schedule.detection_rate() == 1 / 3
+
+
+def test_detection_every_frame_by_default() -> None:
+    schedule = DetectionScheduler()
+    image = np.zeros((90, 160, 3), dtype=np.uint8)
+    assert all(schedule(image) for _ in range(5))
+
+
+def test_detection_on_motion() -> None:
+    schedule = DetectionScheduler(
+        DetectionSettings(interval=100, motion_threshold=10.0))
+    image = np.zeros((90, 160, 3), dtype=np.uint8)
+    assert schedule(image)
+    assert not schedule(image)
+    # slow changes add up until the detector runs
+    image[:, :40] = 30
+    assert not schedule(image)
+    image[:, :80] = 30
+    assert schedule(image)
+    assert not schedule(image)
@@ -3,7 +3,8 @@ from typing import Tuple
 import numpy as np
 import pytest
 
-from util.image import clip_section, create_black_image, scale_image
+from util.image import (clip_section, create_black_image, gray_thumbnail,
+                        region_change, scale_image)
 
 
 @pytest.mark.parametrize('shape', [(20, 10), (10, 10, 3)])
@@ -35,3 +36,13 @@ def test_clip_section(
     box, image_size, expected_box = data
     black_image = create_black_image((image_size[1], image_size[0], 3))
     assert clip_section(*box, black_image) == expected_box
+
+
+def test_region_change() -> None:
+    image = np.full((360, 640, 3), 100, dtype=np.uint8)
+    reference = gray_thumbnail(image)
+    assert reference.shape == (36, 64)
+    assert region_change(gray_thumbnail(image), reference) == 0
+    # a change in one of 4x4 regions is not averaged over the image
+    image[:90, :160] = 140
+    assert region_change(gray_thumbnail(image), reference) == 40
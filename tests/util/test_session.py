@@ -0,0 +1,79 @@
+import os
+from argparse import ArgumentParser
+
+import numpy as np
+import onnx
+import onnxruntime
+from onnx import TensorProto, helper, numpy_helper
+
+from util.session import (OnnxSession, SessionSettings, add_session_parameters,
+                          create_session_options, parse_session_settings)
+
+MODEL_DIR = 'tests/tmp'
+
+
+def save_scale_model(path: str, scale: float) -> None:
+    graph = helper.make_graph(
+        [helper.make_node('Mul', ['input', 'scale'], ['output'])],
+        'scale',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, [2])],
+        [helper.make_tensor_value_info('output', TensorProto.FLOAT, [2])],
+        [numpy_helper.from_array(
+            np.full(2, scale, dtype=np.float32), 'scale')])
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+def test_parse_session_settings() -> None:
+    parser = add_session_parameters(ArgumentParser(), 'track')
+    args = vars(parser.parse_args([
+        '--track-threads', '2', '--track-parallel',
+        '--track-optimization', 'basic',
+        '--track-model-cache', 'models/cache.onnx', '--track-io-binding']))
+    assert parse_session_settings(args, 'track') == SessionSettings(
+        2, 0, True, 'basic', 'models/cache.onnx', True)
+    defaults = vars(parser.parse_args([]))
+    assert parse_session_settings(defaults, 'track') == SessionSettings()
+
+
+def test_create_session_options() -> None:
+    settings = SessionSettings(
+        intra_op_threads=2, inter_op_threads=1, parallel=True,
+        optimization='extended', optimized_model='tests/tmp/cache.onnx')
+    options = create_session_options(settings)
+    assert options.intra_op_num_threads == 2
+    assert options.inter_op_num_threads == 1
+    assert options.execution_mode == onnxruntime.ExecutionMode.ORT_PARALLEL
+    assert options.graph_optimization_level == \
+        onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    assert options.optimized_model_filepath == 'tests/tmp/cache.onnx'
+    assert options.enable_mem_pattern
+    assert not create_session_options(
+        SessionSettings(memory_pattern=False)).enable_mem_pattern
+    cached = create_session_options(settings, cached=True)
+    assert cached.graph_optimization_level == \
+        onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+    assert cached.optimized_model_filepath == ''
+
+
+def test_optimized_model_cache_follows_source_model() -> None:
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    model_path = os.path.join(MODEL_DIR, 'scale.onnx')
+    settings = SessionSettings(
+        optimized_model=os.path.join(MODEL_DIR, 'scale_optimized.onnx'))
+    input = np.ones(2, dtype=np.float32)
+    save_scale_model(model_path, 2.0)
+    assert np.all(OnnxSession(model_path, settings).run(input) == 2.0)
+    assert os.path.exists(f'{settings.optimized_model}.source')
+    assert np.all(OnnxSession(model_path, settings).run(input) == 2.0)
+
+    # a changed model with the same cache path is optimized again
+    modified = os.stat(model_path).st_mtime
+    save_scale_model(model_path, 3.0)
+    os.utime(model_path, (modified + 1, modified + 1))
+    assert np.all(OnnxSession(model_path, settings).run(input) == 3.0)
+    other_path = os.path.join(MODEL_DIR, 'other_scale.onnx')
+    save_scale_model(other_path, 4.0)
+    assert np.all(OnnxSession(other_path, settings).run(input) == 4.0)